@@ -0,0 +1,488 @@
+#!/usr/bin/env python3
+"""
+Bench Suite — reproducible benchmarks with local stand-ins
+Author: Vitalie Procopan
+
+Goal:
+    Replace guesswork about parallel_ping / parallel_fetch / parallel_ssh,
+    the day4 config loaders and disk usage with numbers that can be
+    compared between two commits.
+
+Features:
+    1️⃣ Local stand-ins only: loopback hosts, an http.server farm, paramiko SSH servers,
+       generated YAML/JSON corpora and synthetic directory trees
+    2️⃣ Warmup + repetitions; throughput, p50/p99 latency and peak RSS per workload
+    3️⃣ Every workload runs in a fresh interpreter, so peak RSS is its own
+    4️⃣ Results saved as JSON (commit, Python, CPU count, parameters)
+    5️⃣ --compare BASE.json [NEW.json]: flags throughput / p99 / RSS regressions, exit 1
+    💡 devops-tool bench [--only fetch,ssh] [--reps 5] [--scale 0.2]
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+
+DEFAULT_THRESHOLD = 0.10  # relative change that counts as a regression
+
+
+@dataclass
+class WorkloadResult:
+    name: str
+    items: int = 0                 # operations per repetition
+    reps: int = 0
+    warmup: int = 0
+    seconds: float = 0.0           # measured wall time, all repetitions
+    throughput: float = 0.0        # items per second
+    p50_ms: float | None = None
+    p99_ms: float | None = None
+    mean_ms: float | None = None
+    latency: str = "item"          # what one latency sample is: "item" or "rep"
+    baseline_rss_mb: float = 0.0   # after stand-ins are up, before the first run
+    peak_rss_mb: float = 0.0
+    skipped: str | None = None
+    error: str | None = None
+
+
+@dataclass
+class Workload:
+    """What a setup function hands to the harness.
+
+    `run()` does one repetition of `items` operations and may return
+    per-item latencies in seconds; when it returns None the harness uses
+    the repetition's wall time as the latency sample.
+    """
+
+    run: object
+    items: int
+    notes: dict = field(default_factory=dict)
+
+
+class Skip(Exception):
+    """A workload cannot run here (missing dependency or privilege)."""
+
+
+def percentile(values, pct) -> float:
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def peak_rss_mb() -> float:
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / 1024 if sys.platform != "darwin" else peak / 2**20, 1)  # KiB on Linux
+
+
+@contextlib.contextmanager
+def _quiet():
+    """Workloads print like the CLI does; send it to /dev/null (line buffered, like a tty)."""
+    with open(os.devnull, "w", buffering=1) as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+# ──────────────────────────────────────────────
+# Stand-ins & workloads
+# ──────────────────────────────────────────────
+@contextlib.contextmanager
+def bench_ping(scale):
+    """parallel_ping over loopback addresses 127.0.x.y (one echo each)."""
+    import fleet_ping
+    import stage6_concurrency
+
+    try:
+        fleet_ping.open_icmp_socket()[0].close()
+    except fleet_ping.IcmpUnavailable as e:
+        if shutil.which("ping") is None:
+            raise Skip(f"no ICMP socket ({e}) and no ping binary") from None
+    hosts = [f"127.0.{i // 250}.{i % 250 + 1}" for i in range(max(1, int(256 * scale)))]
+
+    def run():
+        results = stage6_concurrency.parallel_ping(hosts, count=1, timeout=1.0) or []
+        return [rtt / 1000 for r in results for rtt in r.rtts] or None
+
+    yield Workload(run, len(hosts), {"hosts": len(hosts)})
+
+
+@contextlib.contextmanager
+def bench_fetch(scale, servers=4):
+    """parallel_fetch against a farm of keep-alive http.server instances."""
+    import http_checker
+    import stage6_concurrency
+
+    farm = [http_checker.start_local_server() for _ in range(servers)]
+    per_server = max(1, int(500 * scale))
+    urls = [f"{base}/item/{i}" for i in range(per_server) for _, base in farm]
+
+    def run():
+        results = stage6_concurrency.parallel_fetch(urls)
+        failed = [r for r in results if r.error or r.status != 200]
+        if failed:
+            raise RuntimeError(f"{len(failed)} fetches failed: {failed[0].error or failed[0].status}")
+        return [r.elapsed_ms / 1000 for r in results]
+
+    try:
+        yield Workload(run, len(urls), {"servers": servers, "urls": len(urls)})
+    finally:
+        for server, _ in farm:
+            server.shutdown()
+            server.server_close()
+
+
+@contextlib.contextmanager
+def bench_ssh(scale, servers=4):
+    """parallel_ssh over pooled sessions to paramiko stand-in servers (ssh_pool.StandInSSH)."""
+    try:
+        import paramiko
+    except ImportError:
+        raise Skip("paramiko not installed") from None
+    import ssh_pool
+    import stage6_concurrency
+
+    class TimedPool(ssh_pool.SSHSessionPool):
+        def run_many(self, host, commands, *args, **kwargs):
+            results = super().run_many(host, commands, *args, **kwargs)
+            # Each command's own channel time, not its host batch's
+            self.latencies.extend(r.elapsed_ms / 1000 for r in results if r.elapsed_ms is not None)
+            return results
+
+    tmp = tempfile.mkdtemp(prefix="bench-ssh-")
+    key_file = os.path.join(tmp, "id_rsa")
+    paramiko.RSAKey.generate(2048).write_private_key_file(key_file)
+    host_key = paramiko.RSAKey.generate(2048)
+    commands = [f"echo {i}" for i in range(max(1, int(8 * scale)))]
+    with contextlib.ExitStack() as stack:
+        stand_ins = [stack.enter_context(ssh_pool.StandInSSH(host_key)) for _ in range(servers)]
+        hosts = [f"127.0.0.1:{s.port}" for s in stand_ins]
+        pool = TimedPool(missing_host_key_policy=paramiko.AutoAddPolicy())
+        stack.callback(pool.close)
+
+        def run():
+            pool.latencies = []
+            stage6_concurrency.parallel_ssh(hosts, user="bench", key_file=key_file, cmd=commands, pool=pool)
+            if len(pool.latencies) != len(hosts) * len(commands):
+                raise RuntimeError("some SSH commands did not run")
+            return pool.latencies
+
+        try:
+            yield Workload(run, len(hosts) * len(commands), {"servers": servers, "commands_per_host": len(commands)})
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+
+def _corpus(kind, files):
+    from config_loader import _values_yaml, parse_file
+
+    tmp = tempfile.mkdtemp(prefix=f"bench-{kind}-")
+    paths = []
+    for i in range(files):
+        path = os.path.join(tmp, f"values-{i}.{kind}")
+        text = _values_yaml(i)
+        if kind == "json":
+            yaml_path = path + ".yaml"
+            with open(yaml_path, "w") as f:
+                f.write(text)
+            text = json.dumps(parse_file(yaml_path), indent=2)
+            os.unlink(yaml_path)
+        with open(path, "w") as f:
+            f.write(text)
+        paths.append(path)
+    return tmp, paths
+
+
+def _bench_config(kind, scale):
+    """One cold load per file through config_loader, the parser behind the day4 loaders."""
+    from config_loader import ConfigLoader
+
+    tmp, paths = _corpus(kind, max(1, int(200 * scale)))
+
+    def run():
+        loader = ConfigLoader()  # a fresh process: empty cache, real parses
+        latencies = []
+        for path in paths:
+            t0 = time.perf_counter()
+            loader.load(path)
+            latencies.append(time.perf_counter() - t0)
+        return latencies
+
+    try:
+        size = sum(os.path.getsize(p) for p in paths)
+        yield Workload(run, len(paths), {"files": len(paths), "bytes": size})
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+@contextlib.contextmanager
+def bench_config_yaml(scale):
+    """Cold YAML loads (values.yaml-style documents)."""
+    yield from _bench_config("yaml", scale)
+
+
+@contextlib.contextmanager
+def bench_config_json(scale):
+    """Cold JSON loads (the same documents as JSON)."""
+    yield from _bench_config("json", scale)
+
+
+@contextlib.contextmanager
+def _synthetic_tree(files):
+    from du_scan import make_tree
+
+    tmp = tempfile.mkdtemp(prefix="bench-tree-")
+    try:
+        make_tree(tmp, files)
+        yield tmp
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+@contextlib.contextmanager
+def bench_disk_usage(scale):
+    """sysinfo.disk_usage on a synthetic tree (statvfs + report)."""
+    import sysinfo
+
+    calls = max(1, int(1000 * scale))
+    with _synthetic_tree(1000) as root:
+        def run():
+            latencies = []
+            for _ in range(calls):
+                t0 = time.perf_counter()
+                sysinfo.disk_usage(root)
+                latencies.append(time.perf_counter() - t0)
+            return latencies
+
+        yield Workload(run, calls, {"calls": calls})
+
+
+@contextlib.contextmanager
+def bench_du_scan(scale):
+    """du_scan.scan_tree (info --du) over a synthetic tree; one item = one file."""
+    import du_scan
+
+    files = max(100, int(20_000 * scale))
+    with _synthetic_tree(files) as root:
+        yield Workload(lambda: du_scan.scan_tree(root, one_filesystem=False) and None, files, {"files": files})
+
+
+# name → setup; each is a context manager yielding a Workload
+WORKLOADS = {
+    "ping": bench_ping,
+    "fetch": bench_fetch,
+    "ssh": bench_ssh,
+    "config-yaml": bench_config_yaml,
+    "config-json": bench_config_json,
+    "disk-usage": bench_disk_usage,
+    "du-scan": bench_du_scan,
+}
+
+
+# ──────────────────────────────────────────────
+# Harness
+# ──────────────────────────────────────────────
+def run_workload(name, reps=5, warmup=1, scale=1.0) -> WorkloadResult:
+    """Run one workload in this process."""
+    result = WorkloadResult(name, reps=reps, warmup=warmup)
+    try:
+        with WORKLOADS[name](scale) as workload:
+            result.items = workload.items
+            result.baseline_rss_mb = peak_rss_mb()
+            samples, per_rep = [], []
+            with _quiet():
+                for i in range(warmup + reps):
+                    t0 = time.perf_counter()
+                    latencies = workload.run()
+                    elapsed = time.perf_counter() - t0
+                    if i >= warmup:
+                        per_rep.append(elapsed)
+                        samples.extend(latencies if latencies is not None else [elapsed])
+            result.latency = "item" if len(samples) > len(per_rep) else "rep"
+    except Skip as e:
+        result.skipped = str(e)
+        return result
+    except Exception as e:
+        result.error = f"{e.__class__.__name__}: {e}"
+        return result
+    result.seconds = round(sum(per_rep), 6)
+    result.throughput = round(workload.items * reps / result.seconds, 1)
+    result.p50_ms = round(percentile(samples, 50) * 1000, 3)
+    result.p99_ms = round(percentile(samples, 99) * 1000, 3)
+    result.mean_ms = round(sum(samples) / len(samples) * 1000, 3)
+    result.peak_rss_mb = peak_rss_mb()
+    return result
+
+
+def _run_isolated(name, reps, warmup, scale) -> WorkloadResult:
+    """Run one workload in a fresh interpreter so its peak RSS and caches are its own."""
+    cmd = [sys.executable, os.path.abspath(__file__), "--worker", name,
+           "--reps", str(reps), "--warmup", str(warmup), "--scale", str(scale)]
+    proc = subprocess.run(cmd, capture_output=True, text=True)
+    if proc.returncode != 0 or not proc.stdout.strip():
+        tail = (proc.stderr.strip().splitlines() or ["no output"])[-1]
+        return WorkloadResult(name, reps=reps, warmup=warmup, error=f"worker failed: {tail}")
+    return WorkloadResult(**json.loads(proc.stdout.splitlines()[-1]))
+
+
+def _commit() -> str | None:
+    try:
+        sha = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True,
+                               text=True, cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return (sha + ("-dirty" if dirty else "")) or None
+
+
+def run_suite(names=None, reps=5, warmup=1, scale=1.0, on_result=None) -> dict:
+    """Run workloads (default: all), each in its own process; return the results document."""
+    doc = {
+        "meta": {
+            "commit": _commit(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "reps": reps, "warmup": warmup, "scale": scale,
+        },
+        "workloads": {},
+    }
+    for name in names or WORKLOADS:
+        result = _run_isolated(name, reps, warmup, scale)
+        doc["workloads"][name] = asdict(result)
+        if on_result:
+            on_result(result)
+    return doc
+
+
+def format_result(r: WorkloadResult) -> str:
+    if r.skipped:
+        return f"{r.name:<12} ⏭️  skipped: {r.skipped}"
+    if r.error:
+        return f"{r.name:<12} ❌ {r.error}"
+    return (f"{r.name:<12} {r.throughput:>12,.1f}/s  p50 {r.p50_ms:>9.3f} ms  p99 {r.p99_ms:>9.3f} ms"
+            f"  ({r.latency})  peak RSS {r.peak_rss_mb:>6.1f} MiB  [{r.items} × {r.reps}]")
+
+
+# ──────────────────────────────────────────────
+# Comparing runs
+# ──────────────────────────────────────────────
+def compare(base: dict, new: dict, threshold=DEFAULT_THRESHOLD) -> list[dict]:
+    """Per-metric changes for workloads present and measured in both runs.
+
+    A change is a regression when throughput falls, or p99 / peak RSS
+    grows, by more than `threshold` (a fraction).
+    """
+    rows = []
+    for name, new_r in new["workloads"].items():
+        old_r = base["workloads"].get(name)
+        if not old_r or old_r.get("skipped") or old_r.get("error") or new_r.get("skipped") or new_r.get("error"):
+            continue
+        for metric, higher_is_better in (("throughput", True), ("p99_ms", False), ("peak_rss_mb", False)):
+            old, cur = old_r.get(metric), new_r.get(metric)
+            if not old or cur is None:
+                continue
+            change = (cur - old) / old
+            worse = -change if higher_is_better else change
+            rows.append({"workload": name, "metric": metric, "base": old, "new": cur,
+                         "change": round(change, 4), "regression": worse > threshold})
+    return rows
+
+
+def format_comparison(rows, base_meta, new_meta) -> str:
+    lines = [f"🔀 {base_meta.get('commit') or base_meta.get('created')} → {new_meta.get('commit') or new_meta.get('created')}"]
+    differ = [k for k in ("scale", "reps", "warmup", "cpus", "python") if base_meta.get(k) != new_meta.get(k)]
+    if differ:
+        lines.append("⚠️  runs differ in " + ", ".join(f"{k} ({base_meta.get(k)} vs {new_meta.get(k)})" for k in differ))
+    for row in rows:
+        mark = "🔴" if row["regression"] else "  "
+        lines.append(f"{mark} {row['workload']:<12} {row['metric']:<12} {row['base']:>12,.3f} → "
+                     f"{row['new']:>12,.3f}  {row['change'] * 100:+6.1f}%")
+    regressions = sum(row["regression"] for row in rows)
+    lines.append(f"{'❌' if regressions else '✅'} {regressions} regression(s)")
+    return "\n".join(lines) + "\n"
+
+
+def default_output(doc) -> str:
+    stamp = doc["meta"]["commit"] or time.strftime("%Y%m%d-%H%M%S")
+    return os.path.join("bench-results", f"bench-{stamp}.json")
+
+
+# ──────────────────────────────────────────────
+# CLI (also `devops-tool bench`)
+# ──────────────────────────────────────────────
+def build_parser(parser):
+    parser.add_argument("--only", help=f"Comma-separated workloads ({', '.join(WORKLOADS)})")
+    parser.add_argument("--reps", type=int, default=5, help="Measured repetitions (default: 5)")
+    parser.add_argument("--warmup", type=int, default=1, help="Unmeasured warmup runs (default: 1)")
+    parser.add_argument("--scale", type=float, default=1.0, help="Workload size factor (default: 1.0)")
+    parser.add_argument("--output", help="Results JSON (default: bench-results/bench-<commit>.json)")
+    parser.add_argument("--compare", nargs="+", metavar="FILE",
+                        help="Compare this run against BASE.json, or two saved files BASE.json NEW.json")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Relative change counted as a regression (default: 0.10)")
+    parser.add_argument("--list", action="store_true", help="List workloads and exit")
+    return parser
+
+
+def run_cli(args) -> int:
+    """Shared by `python bench_suite.py` and `devops-tool bench`; exit 1 on regressions."""
+    if args.list:
+        for name, setup in WORKLOADS.items():
+            print(f"{name:<12} {setup.__doc__.splitlines()[0]}")
+        return 0
+    if args.compare and len(args.compare) > 2:
+        sys.exit("❌ Error: --compare takes BASE.json [NEW.json]")
+    try:
+        base = None
+        if args.compare:
+            with open(args.compare[0]) as f:
+                base = json.load(f)
+        if args.compare and len(args.compare) == 2:
+            with open(args.compare[1]) as f:
+                new = json.load(f)
+        else:
+            names = args.only.split(",") if args.only else None
+            unknown = sorted(set(names or ()) - WORKLOADS.keys())
+            if unknown:
+                sys.exit(f"❌ Error: unknown workload(s): {', '.join(unknown)}")
+            print(f"🏁 reps={args.reps} warmup={args.warmup} scale={args.scale}", flush=True)
+            new = run_suite(names, args.reps, args.warmup, args.scale,
+                            on_result=lambda r: print(format_result(r), flush=True))
+            output = args.output or default_output(new)
+            os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+            with open(output, "w") as f:
+                json.dump(new, f, indent=2)
+            print(f"💾 Saved {output}")
+    except (OSError, ValueError) as e:
+        sys.exit(f"❌ Error: {e}")
+    if base is None:
+        return 0
+    rows = compare(base, new, args.threshold)
+    sys.stdout.write(format_comparison(rows, base["meta"], new["meta"]))
+    return 1 if any(row["regression"] for row in rows) else 0
+
+
+def main():
+    parser = build_parser(argparse.ArgumentParser(description="Benchmarks against local stand-ins"))
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        print(json.dumps(asdict(run_workload(args.worker, args.reps, args.warmup, args.scale))))
+        return
+    sys.exit(run_cli(args))
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        sys.exit("\n🛑 Interrupted by user.")
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Command Runner — concurrent subprocesses with streaming output and deadlines
+Author: Vitalie Procopan
+
+Goal:
+    Run many shell commands at once from one event loop without buffering
+    whole outputs in memory or waiting forever on a hung command.
+
+Features:
+    1️⃣ N commands in flight, bounded by a semaphore
+    2️⃣ stdout/stderr streamed line by line into callbacks and bounded buffers
+    3️⃣ Per-command timeout and a global deadline; the whole process group is killed
+    4️⃣ Wall, user and sys time per command from os.wait4 rusage
+    💡 Benchmark: serial subprocess.run vs the concurrent runner
+"""
+
+import argparse
+import asyncio
+import os
+import shlex
+import signal
+import subprocess
+import sys
+import time
+from collections import deque
+from dataclasses import dataclass, field
+
+POSIX = os.name == "posix"
+LINE_LIMIT = 1 << 20  # longer lines are delivered in pieces
+
+
+# ──────────────────────────────────────────────
+# Command / result types
+# ──────────────────────────────────────────────
+@dataclass
+class Command:
+    cmd: list[str]
+    desc: str = ""
+    timeout: float | None = None  # overrides the runner's per-command timeout
+
+
+@dataclass
+class CommandResult:
+    cmd: list[str]
+    desc: str = ""
+    index: int = 0
+    returncode: int | None = None
+    stdout: deque = field(default_factory=deque)
+    stderr: deque = field(default_factory=deque)
+    dropped: int = 0  # lines that fell out of the bounded buffers
+    wall: float = 0.0  # seconds
+    user: float | None = None  # CPU seconds from rusage (None where wait4 is unavailable)
+    sys: float | None = None
+    timed_out: bool = False
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0 and not self.timed_out
+
+    @property
+    def stdout_text(self) -> str:
+        return "\n".join(self.stdout)
+
+    @property
+    def stderr_text(self) -> str:
+        return "\n".join(self.stderr)
+
+    def as_dict(self) -> dict:
+        return {
+            "cmd": self.cmd,
+            "desc": self.desc,
+            "returncode": self.returncode,
+            "wall": round(self.wall, 6),
+            "user": self.user,
+            "sys": self.sys,
+            "timed_out": self.timed_out,
+            "dropped": self.dropped,
+            "error": self.error,
+        }
+
+
+def _as_command(item) -> Command:
+    if isinstance(item, Command):
+        return item
+    if isinstance(item, str):
+        return Command(shlex.split(item), item)
+    if isinstance(item, tuple):
+        return Command(list(item[0]), *item[1:])
+    return Command(list(item))
+
+
+# ──────────────────────────────────────────────
+# Process helpers
+# ──────────────────────────────────────────────
+def _signal_group(proc, sig):
+    try:
+        if POSIX:
+            os.killpg(proc.pid, sig)  # start_new_session made pid the group id
+        else:
+            proc.kill()
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+async def _reap(loop, proc):
+    """Wait for proc and return its rusage (None where os.wait4 is missing)."""
+    if not hasattr(os, "wait4"):
+        await loop.run_in_executor(None, proc.wait)
+        return None
+    pidfd = None
+    if hasattr(os, "pidfd_open"):
+        try:
+            pidfd = os.pidfd_open(proc.pid)
+        except OSError:
+            pidfd = None
+    if pidfd is not None:
+        # Readable once the child exits; no thread per process
+        exited = loop.create_future()
+        loop.add_reader(pidfd, lambda: exited.done() or exited.set_result(None))
+        try:
+            await exited
+        finally:
+            loop.remove_reader(pidfd)
+            os.close(pidfd)
+        _, status, rusage = os.wait4(proc.pid, 0)
+    else:
+        _, status, rusage = await loop.run_in_executor(None, os.wait4, proc.pid, 0)
+    # Keep Popen consistent so it never tries to reap the pid again
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    return rusage
+
+
+async def _pump(loop, pipe, buffer, result, name, on_line):
+    reader = asyncio.StreamReader(limit=LINE_LIMIT)
+    transport, _ = await loop.connect_read_pipe(
+        lambda: asyncio.StreamReaderProtocol(reader), pipe)
+    try:
+        while True:
+            try:
+                raw = await reader.readuntil(b"\n")
+            except asyncio.IncompleteReadError as e:  # EOF: last line without a newline
+                raw = e.partial
+            except asyncio.LimitOverrunError:
+                # Line longer than LINE_LIMIT: nothing was consumed yet, so take
+                # it in LINE_LIMIT pieces (readline() would discard the buffer)
+                raw = await reader.read(LINE_LIMIT)
+            if not raw:
+                return
+            line = raw.decode(errors="replace").rstrip("\r\n")
+            if buffer.maxlen is not None and len(buffer) == buffer.maxlen:
+                result.dropped += 1
+            buffer.append(line)
+            if on_line:
+                on_line(result, name, line)
+    finally:
+        transport.close()
+
+
+# ──────────────────────────────────────────────
+# Runner
+# ──────────────────────────────────────────────
+class CommandRunner:
+    """Run commands concurrently with streaming output and deadlines.
+
+    `timeout` bounds each command, `deadline` bounds the whole batch
+    (both in seconds from the call to run()). On expiry the command's
+    process group gets SIGTERM, then SIGKILL after `kill_grace`.
+    Buffers keep the last `max_lines` lines per stream (None = all).
+    """
+
+    def __init__(self, concurrency=8, timeout=None, deadline=None, max_lines=1000,
+                 kill_grace=0.5, on_line=None, on_result=None):
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.deadline = deadline
+        self.max_lines = max_lines
+        self.kill_grace = kill_grace
+        self.on_line = on_line
+        self.on_result = on_result
+
+    def _limit(self, command, deadline_at):
+        limits = [t for t in (command.timeout or self.timeout,) if t is not None]
+        if deadline_at is not None:
+            limits.append(deadline_at - time.monotonic())
+        return min(limits) if limits else None
+
+    async def _terminate(self, proc, reap_task):
+        _signal_group(proc, signal.SIGTERM)
+        try:
+            await asyncio.wait_for(asyncio.shield(reap_task), self.kill_grace)
+        except asyncio.TimeoutError:
+            _signal_group(proc, signal.SIGKILL if POSIX else signal.SIGTERM)
+
+    async def _run_one(self, loop, sem, index, command, deadline_at) -> CommandResult:
+        result = CommandResult(command.cmd, command.desc, index,
+                               stdout=deque(maxlen=self.max_lines),
+                               stderr=deque(maxlen=self.max_lines))
+        async with sem:
+            limit = self._limit(command, deadline_at)
+            if limit is not None and limit <= 0:
+                result.timed_out = True
+                result.error = "deadline exceeded before start"
+                return result
+            start = time.perf_counter()
+            try:
+                proc = subprocess.Popen(command.cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                                        stderr=subprocess.PIPE, start_new_session=POSIX)
+            except FileNotFoundError:
+                result.returncode = 127
+                result.error = f"command not found: {command.cmd[0]}"
+                return result
+            except OSError as e:
+                result.returncode = 126
+                result.error = str(e)
+                return result
+            reap_task = asyncio.ensure_future(_reap(loop, proc))
+            pumps = asyncio.gather(
+                _pump(loop, proc.stdout, result.stdout, result, "stdout", self.on_line),
+                _pump(loop, proc.stderr, result.stderr, result, "stderr", self.on_line),
+            )
+            try:
+                try:
+                    await asyncio.wait_for(asyncio.shield(reap_task), limit)
+                except asyncio.TimeoutError:
+                    result.timed_out = True
+                    await self._terminate(proc, reap_task)
+                rusage = await reap_task
+                # Grandchildren may still hold the pipes open; give them what is left
+                try:
+                    if result.timed_out:
+                        rest = self.kill_grace
+                    else:
+                        rest = None if limit is None else max(0.0, start + limit - time.perf_counter())
+                    await asyncio.wait_for(asyncio.shield(pumps), rest)
+                except asyncio.TimeoutError:
+                    result.timed_out = True
+                    _signal_group(proc, signal.SIGKILL if POSIX else signal.SIGTERM)
+                    await pumps
+            finally:
+                if not reap_task.done():  # cancelled: never leave the group running
+                    _signal_group(proc, signal.SIGKILL if POSIX else signal.SIGTERM)
+                    reap_task.cancel()
+                    pumps.cancel()
+            result.wall = time.perf_counter() - start
+            result.returncode = proc.returncode
+            if rusage is not None:
+                result.user, result.sys = rusage.ru_utime, rusage.ru_stime
+            if result.timed_out and result.error is None:
+                result.error = "timeout"
+        return result
+
+    async def run(self, commands) -> list[CommandResult]:
+        """Run every command; results come back in input order."""
+        loop = asyncio.get_running_loop()
+        sem = asyncio.Semaphore(self.concurrency)
+        deadline_at = time.monotonic() + self.deadline if self.deadline is not None else None
+        tasks = [asyncio.ensure_future(self._run_one(loop, sem, i, _as_command(c), deadline_at))
+                 for i, c in enumerate(commands)]
+        results = [None] * len(tasks)
+        try:
+            for fut in asyncio.as_completed(tasks):
+                res = await fut
+                results[res.index] = res
+                if self.on_result:
+                    self.on_result(res)
+        finally:
+            for t in tasks:
+                t.cancel()
+        return results
+
+
+def run_commands(commands, concurrency=8, timeout=None, deadline=None, max_lines=1000,
+                 on_line=None, on_result=None) -> list[CommandResult]:
+    """Synchronous wrapper around CommandRunner.run."""
+    runner = CommandRunner(concurrency, timeout, deadline, max_lines,
+                           on_line=on_line, on_result=on_result)
+    return asyncio.run(runner.run(commands))
+
+
+def format_result(res: CommandResult) -> str:
+    cmd = " ".join(res.cmd)
+    cpu = f", user {res.user:.3f}s sys {res.sys:.3f}s" if res.user is not None else ""
+    if res.error and res.returncode in (None, 126, 127):
+        return f"❌ {cmd}: {res.error}"
+    status = "⏰ timeout" if res.timed_out else ("✅" if res.returncode == 0 else f"❌ exit {res.returncode}")
+    return f"{status} {cmd} (wall {res.wall:.3f}s{cpu})"
+
+
+# ──────────────────────────────────────────────
+# 💡 Benchmark
+# ──────────────────────────────────────────────
+def benchmark(count=64, concurrency=16, seconds=0.1):
+    cmd = [sys.executable, "-c", f"import time; time.sleep({seconds}); print('x' * 80)"]
+    t0 = time.perf_counter()
+    for _ in range(count):
+        subprocess.run(cmd, capture_output=True, check=False)
+    serial = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    results = run_commands([cmd] * count, concurrency=concurrency)
+    parallel = time.perf_counter() - t0
+    assert all(r.ok and r.stdout for r in results)
+    print(f"{count} × {seconds}s commands")
+    print(f"{'serial subprocess.run':<22}: {serial:7.2f} s")
+    print(f"{f'runner (×{concurrency})':<22}: {parallel:7.2f} s  ({serial / parallel:.1f}× faster)")
+    t0 = time.perf_counter()
+    [res] = run_commands([["sh", "-c", "sleep 30 & sleep 30"]], timeout=0.5)
+    print(f"{'timeout kill':<22}: {time.perf_counter() - t0:7.2f} s, timed_out={res.timed_out}")
+
+
+# ──────────────────────────────────────────────
+# MAIN
+# ──────────────────────────────────────────────
+def main():
+    parser = argparse.ArgumentParser(description="Run shell commands concurrently")
+    parser.add_argument("commands", nargs="*", help="Commands (quoted, split with shlex)")
+    parser.add_argument("--file", help="Read commands from a file (one per line)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Commands running at once")
+    parser.add_argument("--timeout", type=float, help="Per-command timeout in seconds")
+    parser.add_argument("--deadline", type=float, help="Deadline for the whole batch in seconds")
+    parser.add_argument("--quiet", action="store_true", help="Do not stream output lines")
+    parser.add_argument("--bench", type=int, metavar="N", help="Benchmark with N sleeping commands")
+    args = parser.parse_args()
+
+    if args.bench:
+        benchmark(args.bench)
+        return
+    commands = list(args.commands)
+    if args.file:
+        with open(args.file) as f:
+            commands += [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    if not commands:
+        parser.error("no commands given")
+
+    def show_line(res, stream, line):
+        print(f"[{res.index}{'!' if stream == 'stderr' else ''}] {line}")
+
+    start = time.perf_counter()
+    results = run_commands(commands, args.concurrency, args.timeout, args.deadline,
+                           on_line=None if args.quiet else show_line,
+                           on_result=lambda r: print(format_result(r)))
+    ok = sum(1 for r in results if r.ok)
+    print(f"\n📊 {ok}/{len(results)} commands succeeded in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        sys.exit("\n🛑 Interrupted by user.")
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Config Edit — atomic, batched edits of JSON/YAML/.env files
+Author: Vitalie Procopan
+
+Goal:
+    Apply any number of key changes to a config file with one write,
+    safely against crashes and other editors.
+
+Features:
+    1️⃣ Edits are collected in a transaction; repeated keys coalesce (last wins)
+    2️⃣ Applied under an advisory fcntl lock on `.<name>.lock`
+    3️⃣ Written once via temp file + fsync + os.replace (+ directory fsync)
+    4️⃣ .env files are patched line by line; comments and order are kept
+    💡 Self-check: many processes editing one file at the same time
+"""
+
+import argparse
+import fcntl
+import json
+import os
+import shutil
+import tempfile
+import time
+from multiprocessing import Pool
+from pathlib import Path
+
+from config_loader import DEFAULT_LOADER, _kind, dump_yaml, parse_file
+
+_DELETE = object()
+
+
+# ──────────────────────────────────────────────
+# Low-level helpers
+# ──────────────────────────────────────────────
+def lock_path(path: Path) -> Path:
+    # os.replace swaps the inode, so the lock lives in a separate file
+    return path.with_name(f".{path.name}.lock")
+
+
+def atomic_write(path, data: bytes, mode=None):
+    """Write data to path via a synced temp file in the same directory."""
+    path = Path(path)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        if mode is not None:
+            os.chmod(tmp, mode)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    dir_fd = os.open(path.parent, os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
+
+def _set_path(data, keys, value):
+    node = data
+    for k in keys[:-1]:
+        child = node.get(k)
+        if not isinstance(child, dict):
+            child = node[k] = {}
+        node = child
+    if value is _DELETE:
+        node.pop(keys[-1], None)
+    else:
+        node[keys[-1]] = value
+
+
+def _get_path(data, keys, default=None):
+    node = data
+    for k in keys:
+        if not isinstance(node, dict) or k not in node:
+            return default
+        node = node[k]
+    return node
+
+
+def patch_env(text: bytes, changes: dict) -> bytes:
+    """Apply {KEY: value | _DELETE} to .env bytes, touching only affected lines."""
+    lines = text.splitlines(keepends=True)
+    pending = dict(changes)
+    out = []
+    for line in lines:
+        stripped = line.strip()
+        if stripped and not stripped.startswith(b"#"):
+            key = line.partition(b"=")[0].strip().decode()
+            if key in pending:
+                value = pending.pop(key)
+                if value is _DELETE:
+                    continue
+                eol = line[len(line.rstrip(b"\r\n")):] or b"\n"
+                prefix = line[:line.index(b"=") + 1] if b"=" in line else key.encode() + b"="
+                line = prefix + str(value).encode() + eol
+        out.append(line)
+    if out and not out[-1].endswith(b"\n") and pending:
+        out[-1] += b"\n"
+    for key, value in pending.items():
+        if value is not _DELETE:
+            out.append(f"{key}={value}\n".encode())
+    return b"".join(out)
+
+
+# ──────────────────────────────────────────────
+# Transaction
+# ──────────────────────────────────────────────
+class _Update:
+    __slots__ = ("func", "default")
+
+    def __init__(self, func, default):
+        self.func = func
+        self.default = default
+
+
+class ConfigEdit:
+    """Collects edits for one file and applies them in a single locked write.
+
+    Keys are dotted paths ("app.replicas") for JSON/YAML and plain names
+    for .env. Use as a context manager; nothing is written if the block
+    raises.
+
+        with edit_config("values.yaml") as tx:
+            tx.set("app.replicas", 3)
+            tx.update("app.restarts", lambda n: (n or 0) + 1)
+    """
+
+    def __init__(self, path, json_indent=4):
+        self.path = Path(path)
+        self.kind = _kind(self.path)
+        self.json_indent = json_indent
+        self._ops = {}  # key → value | _DELETE | _Update
+
+    def set(self, key, value):
+        self._ops[key] = value
+        return self
+
+    def delete(self, key):
+        self._ops[key] = _DELETE
+        return self
+
+    def update(self, key, func, default=None):
+        """Set key to func(current value) at commit time, under the lock."""
+        previous = self._ops.get(key, _Update)
+        if previous is _Update:
+            self._ops[key] = _Update(func, default)
+        elif isinstance(previous, _Update):
+            self._ops[key] = _Update(lambda v: func(previous.func(v)), previous.default)
+        else:
+            self._ops[key] = func(default if previous is _DELETE else previous)
+        return self
+
+    def __len__(self):
+        return len(self._ops)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+
+    def commit(self) -> bool:
+        """Apply all pending edits; returns False when there was nothing to write."""
+        if not self._ops:
+            return False
+        lock = lock_path(self.path)
+        with open(lock, "a") as lf:
+            fcntl.flock(lf, fcntl.LOCK_EX)
+            try:
+                self._apply_locked()
+            finally:
+                fcntl.flock(lf, fcntl.LOCK_UN)
+        self._ops.clear()
+        DEFAULT_LOADER.invalidate(self.path)
+        return True
+
+    def _apply_locked(self):
+        try:
+            mode = os.stat(self.path).st_mode & 0o7777
+            exists = True
+        except FileNotFoundError:
+            mode, exists = None, False
+
+        if self.kind == "env":
+            original = self.path.read_bytes() if exists else b""
+            current = parse_file(self.path) if exists else {}
+            changes = {}
+            for key, op in self._ops.items():
+                if isinstance(op, _Update):
+                    op = op.func(current.get(key, op.default))
+                changes[key] = op
+            data = patch_env(original, changes)
+            if data == original:
+                return
+        else:
+            # Re-read under the lock; the cached copy may predate another writer
+            doc = (parse_file(self.path) if exists else None) or {}
+            for key, op in self._ops.items():
+                keys = key.split(".")
+                if isinstance(op, _Update):
+                    op = op.func(_get_path(doc, keys, op.default))
+                _set_path(doc, keys, op)
+            if self.kind == "json":
+                data = (json.dumps(doc, indent=self.json_indent) + "\n").encode()
+            else:
+                data = dump_yaml(doc).encode()
+        atomic_write(self.path, data, mode)
+
+
+def edit_config(path, **kwargs) -> ConfigEdit:
+    return ConfigEdit(path, **kwargs)
+
+
+def apply_edits(path, changes: dict, **kwargs) -> bool:
+    """One-shot: apply {key: value} to path in a single transaction."""
+    tx = ConfigEdit(path, **kwargs)
+    for key, value in changes.items():
+        tx.set(key, value)
+    return tx.commit()
+
+
+# ──────────────────────────────────────────────
+# 💡 Self-check and benchmark
+# ──────────────────────────────────────────────
+def _writer(args):
+    path, worker, rounds = args
+    for i in range(rounds):
+        with edit_config(path) as tx:
+            tx.update("counter", lambda n: int(n or 0) + 1, 0)  # .env values are strings
+            tx.set(f"workers.w{worker}", i + 1)
+    return worker
+
+
+def contention_check(writers=16, rounds=50, kind="json"):
+    """Many processes increment one counter; no update may be lost or torn."""
+    tmp = Path(tempfile.mkdtemp(prefix="cfg-edit-"))
+    try:
+        path = tmp / ("config.json" if kind == "json" else "values.yaml" if kind == "yaml" else ".env")
+        t0 = time.perf_counter()
+        with Pool(writers) as pool:
+            pool.map(_writer, [(path, w, rounds) for w in range(writers)])
+        elapsed = time.perf_counter() - t0
+        doc = parse_file(path)
+        expected = writers * rounds
+        if kind == "env":
+            counter = int(doc["counter"])
+            per_worker = [int(doc[f"workers.w{w}"]) for w in range(writers)]
+        else:
+            counter = doc["counter"]
+            per_worker = [doc["workers"][f"w{w}"] for w in range(writers)]
+        ok = counter == expected and per_worker == [rounds] * writers
+        print(f"contention ({kind:<4}): {writers} writers × {rounds} commits in {elapsed:.2f}s, "
+              f"counter={counter}/{expected} {'✅' if ok else '❌'}")
+        return ok
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def benchmark(edits=50):
+    tmp = Path(tempfile.mkdtemp(prefix="cfg-edit-"))
+    try:
+        path = tmp / "values.yaml"
+        path.write_text(dump_yaml({"app": {f"key{i}": i for i in range(500)}}))
+        t0 = time.perf_counter()
+        for i in range(edits):
+            apply_edits(path, {f"app.key{i}": -i})
+        one_by_one = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        apply_edits(path, {f"app.key{i}": i for i in range(edits)})
+        batched = time.perf_counter() - t0
+        print(f"{edits} edits: {one_by_one * 1000:.1f} ms as separate commits, "
+              f"{batched * 1000:.1f} ms as one transaction")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Atomic config edits: self-check and benchmark")
+    parser.add_argument("--writers", type=int, default=16, help="Parallel writer processes")
+    parser.add_argument("--rounds", type=int, default=50, help="Commits per writer")
+    parser.add_argument("--edits", type=int, default=50, help="Edits for the batching benchmark")
+    args = parser.parse_args()
+    results = [contention_check(args.writers, args.rounds, kind) for kind in ("json", "yaml", "env")]
+    benchmark(args.edits)
+    raise SystemExit(0 if all(results) else 1)
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Config Loader — fast, cached JSON/YAML/.env loading
+Author: Vitalie Procopan
+
+Goal:
+    Make loading hundreds of values.yaml-style files cheap: use libyaml
+    when present, never parse an unchanged file twice in one process,
+    and optionally let cold processes skip YAML parsing altogether.
+
+Features:
+    1️⃣ CSafeLoader / CSafeDumper automatically when PyYAML has libyaml
+    2️⃣ In-process LRU of parsed documents keyed by (path, mtime_ns, size)
+    3️⃣ Optional marshal/pickle sidecar cache next to each file
+    💡 Benchmark: 1,000 generated YAML files, cold vs warm
+"""
+
+import argparse
+import copy
+import json
+import marshal
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+import yaml
+
+import telemetry
+
+SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+SafeDumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+HAVE_LIBYAML = SafeLoader is not yaml.SafeLoader
+
+YAML_SUFFIXES = (".yaml", ".yml")
+SIDECAR_VERSION = 1
+_MARSHAL, _PICKLE = b"M", b"P"
+
+
+# ──────────────────────────────────────────────
+# Parsers
+# ──────────────────────────────────────────────
+def parse_env_text(text: str) -> dict:
+    """KEY=VALUE lines → dict (same rules as day4_config_files.parse_env_file)."""
+    env_vars = {}
+    for line in text.splitlines():
+        if line.strip() and not line.strip().startswith("#"):
+            key, _, value = line.partition("=")
+            env_vars[key.strip()] = value.strip()
+    return env_vars
+
+
+def _kind(path: Path) -> str:
+    if path.suffix in YAML_SUFFIXES:
+        return "yaml"
+    if path.suffix == ".json":
+        return "json"
+    if path.name == ".env" or path.suffix == ".env":
+        return "env"
+    raise ValueError(f"Unsupported config type: {path}")
+
+
+def parse_file(path) -> object:
+    """Parse a config file with no caching at all."""
+    path = Path(path)
+    kind = _kind(path)
+    with open(path, "rb") as f:
+        data = f.read()
+    if kind == "yaml":
+        return yaml.load(data, Loader=SafeLoader)
+    if kind == "json":
+        return json.loads(data)
+    return parse_env_text(data.decode())
+
+
+def dump_yaml(data, stream=None, **kwargs):
+    """yaml.dump through CSafeDumper when available (sort_keys=False by default)."""
+    kwargs.setdefault("sort_keys", False)
+    return yaml.dump(data, stream, Dumper=SafeDumper, **kwargs)
+
+
+# ──────────────────────────────────────────────
+# Sidecar (persistent) cache
+# ──────────────────────────────────────────────
+def sidecar_path(path: Path) -> Path:
+    return path.with_name(f".{path.name}.cache")
+
+
+def _read_sidecar(path: Path, key) -> tuple[bool, object]:
+    try:
+        with open(sidecar_path(path), "rb") as f:
+            blob = f.read()
+    except OSError:
+        return False, None
+    try:
+        fmt, body = blob[:1], blob[1:]
+        version, stored_key, data = (marshal.loads(body) if fmt == _MARSHAL else pickle.loads(body))
+    except Exception:
+        return False, None
+    if version != SIDECAR_VERSION or tuple(stored_key) != key:
+        return False, None
+    return True, data
+
+
+def _write_sidecar(path: Path, key, data):
+    record = (SIDECAR_VERSION, key, data)
+    try:
+        blob = _MARSHAL + marshal.dumps(record)
+    except ValueError:
+        # YAML timestamps, dates etc. are not marshallable
+        blob = _PICKLE + pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL)
+    target = sidecar_path(path)
+    try:
+        fd, tmp = tempfile.mkstemp(dir=target.parent, prefix=target.name, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(blob)
+        os.replace(tmp, target)
+    except OSError:
+        pass  # read-only config dirs simply go without a sidecar
+
+
+# ──────────────────────────────────────────────
+# Loader with LRU
+# ──────────────────────────────────────────────
+class ConfigLoader:
+    """Parse-once loader for JSON, YAML and .env files.
+
+    Documents are cached by (absolute path, mtime_ns, size); editing the
+    file changes the key, so stale results are never returned. With
+    `sidecar=True` parsed data is also stored in `.<name>.cache` next to
+    the file for other processes. Sidecars may contain pickle data, so
+    only enable them for directories you control.
+    """
+
+    def __init__(self, maxsize=1024, sidecar=False):
+        self.maxsize = maxsize
+        self.sidecar = sidecar
+        self._lru: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.sidecar_hits = 0
+
+    def load(self, path, copy_result=False):
+        """Parsed content of path. Treat the result as read-only unless copy_result is set."""
+        path = Path(path).resolve()
+        st = os.stat(path)
+        key = (str(path), st.st_mtime_ns, st.st_size)
+        with self._lock:
+            data = self._lru.get(key, self)
+            if data is not self:
+                self._lru.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(data) if copy_result else data
+        self.misses += 1
+        found = False
+        if self.sidecar:
+            found, data = _read_sidecar(path, key[1:])
+            self.sidecar_hits += found
+        if not found:
+            with telemetry.span("config_parse"):
+                data = parse_file(path)
+            if self.sidecar:
+                _write_sidecar(path, key[1:], data)
+        with self._lock:
+            self._lru[key] = data
+            while len(self._lru) > self.maxsize:
+                self._lru.popitem(last=False)
+        return copy.deepcopy(data) if copy_result else data
+
+    def invalidate(self, path=None):
+        with self._lock:
+            if path is None:
+                self._lru.clear()
+            else:
+                target = str(Path(path).resolve())
+                for key in [k for k in self._lru if k[0] == target]:
+                    del self._lru[key]
+
+
+DEFAULT_LOADER = ConfigLoader()
+
+
+def load_config(path, copy_result=False):
+    """Load through the shared process-wide ConfigLoader."""
+    with telemetry.span("load_config"):
+        return DEFAULT_LOADER.load(path, copy_result)
+
+
+# ──────────────────────────────────────────────
+# 💡 Benchmark
+# ──────────────────────────────────────────────
+def _values_yaml(i):
+    services = "\n".join(
+        f"  svc{j}:\n    image: registry.local/app{i}-{j}:1.{j}.{i % 7}\n"
+        f"    replicas: {j % 5 + 1}\n    env:\n"
+        + "".join(f"      - name: VAR_{k}\n        value: \"{i}-{j}-{k}\"\n" for k in range(6))
+        + f"    resources:\n      limits: {{cpu: \"{j * 100}m\", memory: \"{j * 64}Mi\"}}\n"
+        for j in range(12)
+    )
+    return f"# generated values {i}\napp:\n  name: app{i}\n  enabled: true\nservices:\n{services}"
+
+
+def benchmark(files=1000):
+    tmp = Path(tempfile.mkdtemp(prefix="cfg-bench-"))
+    try:
+        paths = []
+        for i in range(files):
+            p = tmp / f"values-{i}.yaml"
+            p.write_text(_values_yaml(i))
+            paths.append(p)
+        size = sum(p.stat().st_size for p in paths)
+        print(f"corpus              : {files} files, {size / 2**20:.1f} MiB, libyaml={'yes' if HAVE_LIBYAML else 'no'}")
+
+        def timed(label, fn):
+            t0 = time.perf_counter()
+            for p in paths:
+                fn(p)
+            elapsed = time.perf_counter() - t0
+            print(f"{label:<20}: {elapsed * 1000:8.1f} ms ({elapsed / files * 1e6:7.0f} µs/file)")
+
+        timed("pure SafeLoader", lambda p: yaml.load(p.read_bytes(), Loader=yaml.SafeLoader))
+        timed("CSafeLoader", lambda p: yaml.load(p.read_bytes(), Loader=SafeLoader))
+        loader = ConfigLoader(sidecar=True)
+        timed("cold + sidecar write", loader.load)
+        timed("warm LRU", loader.load)
+        cold = ConfigLoader(sidecar=True)  # new process: empty LRU, sidecars on disk
+        timed("cold, sidecar hit", cold.load)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Config loader benchmark")
+    parser.add_argument("--files", type=int, default=1000, help="Number of generated YAML files")
+    benchmark(parser.parse_args().files)
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Config Overlay — layered deep-merge with provenance
+Author: Vitalie Procopan
+
+Goal:
+    Combine base → environment → region → host config layers (JSON, YAML,
+    .env) into one view without copying the layers, and say which file
+    every value came from.
+
+Features:
+    1️⃣ Lazy deep-merge: nested mappings merge only when accessed
+    2️⃣ Copy-on-write: writes go to a per-view local layer, never the sources
+    3️⃣ Structural sharing: many variants reuse the same parsed base objects
+    4️⃣ Provenance per key (which layer won)
+    💡 Benchmark: memory and time for 500 per-host variants
+"""
+
+import argparse
+import copy
+import json
+import sys
+import time
+import tracemalloc
+from collections.abc import Mapping
+from pathlib import Path
+
+from config_loader import load_config
+
+_MISSING = object()
+DELETED = object()  # tombstone stored in a local layer by `del view[key]`
+OVERRIDE = "<override>"
+
+
+# ──────────────────────────────────────────────
+# Lazy overlay view
+# ──────────────────────────────────────────────
+class OverlayView(Mapping):
+    """Read-through view over (source, mapping) layers, lowest priority first.
+
+    Mappings present in several layers are merged key by key; any other
+    value (scalars, lists) from a higher layer replaces lower ones.
+    Nested views are built on first access and remembered per view.
+    """
+
+    __slots__ = ("_layers", "_local", "_local_src", "_children")
+
+    def __init__(self, layers=()):
+        self._layers = tuple(layers)
+        self._local = None       # this view's own writes (copy-on-write)
+        self._local_src = None   # key → source name for local writes
+        self._children = None    # key → nested OverlayView
+
+    # ── lookup ──────────────────────────────────
+    def _resolve(self, key):
+        """(value, source) of the winning layer for key; raises KeyError."""
+        if self._local is not None:
+            v = self._local.get(key, _MISSING)
+            if v is DELETED:
+                raise KeyError(key)
+            if v is not _MISSING:
+                return v, self._local_src[key]
+        if self._children is not None and key in self._children:
+            return self._children[key], None
+        subs = []
+        for source, layer in reversed(self._layers):
+            v = layer.get(key, _MISSING)
+            if v is _MISSING:
+                continue
+            if isinstance(v, Mapping):
+                subs.append((source, v))
+                continue
+            if subs:
+                break  # a mapping above a scalar wins outright
+            return v, source
+        if not subs:
+            raise KeyError(key)
+        child = OverlayView(reversed(subs))
+        if self._children is None:
+            self._children = {}
+        self._children[key] = child
+        return child, None
+
+    def __getitem__(self, key):
+        return self._resolve(key)[0]
+
+    def __iter__(self):
+        # Base order first, keys added by higher layers or local writes after
+        keys = dict.fromkeys(k for _, layer in self._layers for k in layer)
+        if self._children is not None:
+            keys.update(dict.fromkeys(self._children))
+        if self._local is not None:
+            for k, v in self._local.items():
+                if v is DELETED:
+                    keys.pop(k, None)
+                else:
+                    keys[k] = None
+        return iter(keys)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"OverlayView({self.to_dict()!r})"
+
+    # ── copy-on-write ───────────────────────────
+    def _ensure_local(self):
+        if self._local is None:
+            self._local, self._local_src = {}, {}
+
+    def __setitem__(self, key, value):
+        self.set(key, value)
+
+    def set(self, key, value, source=OVERRIDE):
+        """Set a key in this view only; mappings are wrapped, not copied."""
+        self._ensure_local()
+        if isinstance(value, Mapping) and not isinstance(value, OverlayView):
+            value = OverlayView([(source, value)])
+        self._local[key] = value
+        self._local_src[key] = source
+        if self._children is not None:
+            self._children.pop(key, None)
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self._ensure_local()
+        self._local[key] = DELETED
+        self._local_src[key] = OVERRIDE
+        if self._children is not None:
+            self._children.pop(key, None)
+
+    def child(self, key) -> "OverlayView":
+        """Nested view for key, created empty (locally) if missing or not a mapping."""
+        try:
+            v = self[key]
+        except KeyError:
+            v = None
+        if not isinstance(v, OverlayView):
+            v = OverlayView()
+            self._ensure_local()
+            self._local[key] = v
+            self._local_src[key] = OVERRIDE
+        return v
+
+    def set_path(self, dotted, value, source=OVERRIDE, sep="."):
+        """view.set_path("app.replicas", 3) — creates intermediate views as needed."""
+        *parents, last = dotted.split(sep)
+        node = self
+        for part in parents:
+            node = node.child(part)
+        node.set(last, value, source)
+
+    def get_path(self, dotted, default=None, sep="."):
+        node = self
+        for part in dotted.split(sep):
+            if not isinstance(node, Mapping) or part not in node:
+                return default
+            node = node[part]
+        return node
+
+    # ── provenance / export ─────────────────────
+    def source_of(self, dotted, sep="."):
+        """Name of the layer that supplied a leaf value (None for mappings)."""
+        *parents, last = dotted.split(sep)
+        node = self
+        for part in parents:
+            node = node[part]
+            if not isinstance(node, OverlayView):
+                raise KeyError(dotted)
+        return node._resolve(last)[1]
+
+    def provenance(self, prefix="") -> dict:
+        """Flattened {dotted.key: source} for every leaf."""
+        out = {}
+        for key in self:
+            value, source = self._resolve(key)
+            path = f"{prefix}{key}"
+            if isinstance(value, OverlayView):
+                out.update(value.provenance(path + "."))
+            else:
+                out[path] = source
+        return out
+
+    def to_dict(self) -> dict:
+        """Materialise the merged result as plain dicts (lists are shared)."""
+        return {k: v.to_dict() if isinstance(v, OverlayView) else v for k, v in self.items()}
+
+    def variant(self, *layers) -> "OverlayView":
+        """New view with extra (source, mapping) layers on top; sources are shared."""
+        return OverlayView(self._layers + tuple(layers))
+
+
+# ──────────────────────────────────────────────
+# Building views from files
+# ──────────────────────────────────────────────
+def nest_env(env: dict, sep="__") -> dict:
+    """APP__REPLICAS=3 → {"app": {"replicas": "3"}}; keys without sep stay flat.
+
+    Nested keys are lower-cased so they line up with YAML/JSON keys.
+    """
+    out = {}
+    for key, value in env.items():
+        if sep in key:
+            key = key.lower()
+        *parents, last = key.split(sep)
+        node = out
+        for part in parents:
+            node = node.setdefault(part, {})
+            if not isinstance(node, dict):
+                break
+        else:
+            node[last] = value
+    return out
+
+
+def load_layer(path, env_separator=None):
+    """(source name, parsed mapping) for a JSON, YAML or .env file.
+
+    Files come from config_loader's cache, so variants built from the
+    same base share its parsed objects. .env files use the same rules
+    as day4_config_files.parse_env_file.
+    """
+    data = load_config(path)
+    if env_separator and (Path(path).name == ".env" or Path(path).suffix == ".env"):
+        data = nest_env(data, env_separator)
+    if data is None:
+        data = {}
+    if not isinstance(data, Mapping):
+        raise ValueError(f"{path}: top level must be a mapping")
+    return str(path), data
+
+
+def overlay(*paths, env_separator=None) -> OverlayView:
+    """Merged view of config files, later paths overriding earlier ones."""
+    return OverlayView([load_layer(p, env_separator) for p in paths])
+
+
+def deep_merge(base: dict, override: Mapping) -> dict:
+    """Eager reference merge (copies base); used by the benchmark as the baseline."""
+    out = copy.deepcopy(base)
+    stack = [(out, override)]
+    while stack:
+        dst, src = stack.pop()
+        for k, v in src.items():
+            if isinstance(v, Mapping) and isinstance(dst.get(k), dict):
+                stack.append((dst[k], v))
+            else:
+                dst[k] = copy.deepcopy(v)
+    return out
+
+
+# ──────────────────────────────────────────────
+# 💡 Benchmark
+# ──────────────────────────────────────────────
+def benchmark(variants=500, services=200):
+    base = {
+        "global": {"registry": "registry.local", "pullPolicy": "IfNotPresent"},
+        "services": {
+            f"svc{i}": {
+                "image": f"app{i}:1.0.{i}",
+                "replicas": 2,
+                "env": [{"name": f"VAR_{k}", "value": str(k)} for k in range(5)],
+                "resources": {"limits": {"cpu": "500m", "memory": "256Mi"}},
+            }
+            for i in range(services)
+        },
+    }
+    env = {"global": {"pullPolicy": "Always"}, "services": {"svc1": {"replicas": 4}}}
+    region = {"global": {"registry": "eu.registry.local"}}
+    hosts = [{"services": {f"svc{h % services}": {"replicas": h % 7 + 1}}, "host": f"node{h}"}
+             for h in range(variants)]
+
+    def build_all(build):
+        out = [build(h) for h in hosts]
+        # Touch one value per variant so lazy views do real work
+        return out, [v["services"][f"svc{i % services}"]["replicas"] for i, v in enumerate(out)]
+
+    def run(label, build):
+        t0 = time.perf_counter()
+        build_all(build)
+        elapsed = time.perf_counter() - t0  # timed untraced; tracemalloc slows allocation
+        tracemalloc.start()
+        out, checks = build_all(build)
+        mem = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        print(f"{label:<14}: {elapsed * 1000:8.1f} ms, {mem / 2**20:7.2f} MiB for {variants} variants")
+        return checks
+
+    root = OverlayView([("base", base), ("env/prod", env), ("region/eu", region)])
+    lazy = run("overlay views", lambda h: root.variant((f"host/{h['host']}", h)))
+    merged = deep_merge(deep_merge(base, env), region)
+    eager = run("deep copies", lambda h: deep_merge(merged, h))
+    assert lazy == eager
+    v = root.variant(("host/node3", hosts[3]))
+    print(f"provenance    : services.svc3.replicas ← {v.source_of('services.svc3.replicas')}, "
+          f"global.registry ← {v.source_of('global.registry')}")
+
+
+# ──────────────────────────────────────────────
+# MAIN
+# ──────────────────────────────────────────────
+def main():
+    parser = argparse.ArgumentParser(description="Deep-merge layered JSON/YAML/.env configs")
+    parser.add_argument("files", nargs="*", help="Layers, lowest priority first")
+    parser.add_argument("--explain", action="store_true", help="Show which file set each key")
+    parser.add_argument("--env-separator", help="Nest .env keys on this separator (e.g. __)")
+    parser.add_argument("--bench", type=int, metavar="VARIANTS", help="Run the variants benchmark")
+    args = parser.parse_args()
+
+    if args.bench:
+        benchmark(args.bench)
+        return
+    if not args.files:
+        parser.error("no config files given")
+    view = overlay(*args.files, env_separator=args.env_separator)
+    if args.explain:
+        for key, source in sorted(view.provenance().items()):
+            print(f"{key:<40} ← {source}")
+    else:
+        json.dump(view.to_dict(), sys.stdout, indent=2, default=str)
+        print()
+
+
+if __name__ == "__main__":
+    main()
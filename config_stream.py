@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Config Stream — constant-memory iteration over huge JSON/YAML/.env inputs
+Author: Vitalie Procopan
+
+Goal:
+    Walk generated inventories of hundreds of MB item by item instead of
+    loading the whole document, so memory depends on the largest item,
+    not the file.
+
+Features:
+    1️⃣ JSON: top-level array items / object (key, value) pairs via raw_decode
+    2️⃣ YAML: event-based (yaml.parse); items or whole documents, multi-document streams
+    3️⃣ .env: byte-level line scanner, same rules as parse_env_file
+    💡 Benchmark: peak RSS and time vs full loading on a generated input
+"""
+
+import argparse
+import json
+import os
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import yaml
+
+from config_loader import SafeLoader, _kind, parse_file
+
+CHUNK = 1 << 20
+_NON_WS = re.compile(r"\S")
+_AFTER_VALUE = frozenset(" \t\r\n,:]}")
+
+
+# ──────────────────────────────────────────────
+# JSON
+# ──────────────────────────────────────────────
+class _JsonReader:
+    """Sliding text buffer over a file; values are decoded with raw_decode."""
+
+    def __init__(self, f, chunk):
+        self.f = f
+        self.chunk = chunk
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self, size) -> bool:
+        data = self.f.read(size)
+        if not data:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character ("" at EOF); pos is left on it."""
+        while True:
+            m = _NON_WS.search(self.buf, self.pos)
+            if m:
+                self.pos = m.start()
+                return self.buf[self.pos]
+            self.pos = len(self.buf)
+            if not self._fill(self.chunk):
+                return ""
+
+    def expect(self, chars) -> str:
+        c = self.peek()
+        if c not in chars or not c:
+            raise ValueError(f"expected one of {chars!r}, got {c or 'EOF'!r}")
+        self.pos += 1
+        return c
+
+    def value(self):
+        if not self.peek():  # raw_decode does not skip leading whitespace
+            raise ValueError("unexpected end of JSON input")
+        size = self.chunk
+        while True:
+            try:
+                obj, end = self.decoder.raw_decode(self.buf, self.pos)
+                # "12" or "-2." at the buffer edge may be a cut-off number;
+                # a complete value is always followed by a delimiter
+                if self.eof or (end < len(self.buf) and self.buf[end] in _AFTER_VALUE):
+                    self.pos = end
+                    return obj
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            # Grow reads geometrically so one huge item is not re-parsed O(n²) times
+            self._fill(size)
+            size *= 2
+
+
+def iter_json(path, chunk=CHUNK):
+    """Yield array items, or (key, value) pairs for an object, one at a time."""
+    with open(path, encoding="utf-8") as f:
+        r = _JsonReader(f, chunk)
+        first = r.peek()
+        if first == "[":
+            r.pos += 1
+            if r.peek() != "]":
+                while True:
+                    yield r.value()
+                    if r.expect(",]") == "]":
+                        break
+            else:
+                r.pos += 1
+        elif first == "{":
+            r.pos += 1
+            if r.peek() != "}":
+                while True:
+                    key = r.value()
+                    r.expect(":")
+                    yield key, r.value()
+                    if r.expect(",}") == "}":
+                        break
+            else:
+                r.pos += 1
+        elif first:
+            yield r.value()
+        if r.peek():
+            raise ValueError(f"{path}: trailing data after JSON document")
+
+
+# ──────────────────────────────────────────────
+# YAML
+# ──────────────────────────────────────────────
+class _Composer:
+    """Builds small node trees from parser events and constructs them."""
+
+    def __init__(self):
+        # Only used for tag resolution and construction of one item at a time
+        self.loader = yaml.SafeLoader("")
+        self.anchors = {}
+
+    def node(self, event, events):
+        if isinstance(event, yaml.AliasEvent):
+            return self.anchors[event.anchor]
+        if isinstance(event, yaml.ScalarEvent):
+            tag = event.tag
+            if tag is None or tag == "!":
+                tag = self.loader.resolve(yaml.ScalarNode, event.value, event.implicit)
+            node = yaml.ScalarNode(tag, event.value, event.start_mark, event.end_mark, style=event.style)
+        elif isinstance(event, yaml.SequenceStartEvent):
+            tag = event.tag
+            if tag is None or tag == "!":
+                tag = self.loader.resolve(yaml.SequenceNode, None, event.implicit)
+            node = yaml.SequenceNode(tag, [], event.start_mark, None, flow_style=event.flow_style)
+            if event.anchor:
+                self.anchors[event.anchor] = node
+            for ev in events:
+                if isinstance(ev, yaml.SequenceEndEvent):
+                    break
+                node.value.append(self.node(ev, events))
+            return node
+        elif isinstance(event, yaml.MappingStartEvent):
+            tag = event.tag
+            if tag is None or tag == "!":
+                tag = self.loader.resolve(yaml.MappingNode, None, event.implicit)
+            node = yaml.MappingNode(tag, [], event.start_mark, None, flow_style=event.flow_style)
+            if event.anchor:
+                self.anchors[event.anchor] = node
+            for ev in events:
+                if isinstance(ev, yaml.MappingEndEvent):
+                    break
+                key = self.node(ev, events)
+                node.value.append((key, self.node(next(events), events)))
+            return node
+        else:
+            raise ValueError(f"unexpected YAML event {event}")
+        if event.anchor:
+            self.anchors[event.anchor] = node
+        return node
+
+    def construct(self, event, events):
+        return self.loader.construct_document(self.node(event, events))
+
+
+def iter_yaml(path, depth=1, with_document=False):
+    """Stream a (multi-document) YAML file.
+
+    depth=1 yields the items of each document's top-level sequence, or
+    (key, value) pairs of its top-level mapping; depth=0 yields whole
+    documents. With with_document=True every item is (doc_index, item).
+    """
+    with open(path, "rb") as f:
+        events = iter(yaml.parse(f, Loader=SafeLoader))
+        doc = -1
+        composer = _Composer()
+        for event in events:
+            if not isinstance(event, yaml.DocumentStartEvent):
+                continue
+            doc += 1
+            composer.anchors = {}
+            root = next(events)
+            if depth == 0:
+                items = [composer.construct(root, events)]
+            elif isinstance(root, yaml.SequenceStartEvent):
+                items = _yaml_sequence(composer, events)
+            elif isinstance(root, yaml.MappingStartEvent):
+                items = _yaml_mapping(composer, events)
+            else:
+                items = [composer.construct(root, events)]
+            for item in items:
+                yield (doc, item) if with_document else item
+
+
+def _yaml_sequence(composer, events):
+    for ev in events:
+        if isinstance(ev, yaml.SequenceEndEvent):
+            return
+        yield composer.construct(ev, events)
+
+
+def _yaml_mapping(composer, events):
+    for ev in events:
+        if isinstance(ev, yaml.MappingEndEvent):
+            return
+        key = composer.construct(ev, events)
+        yield key, composer.construct(next(events), events)
+
+
+# ──────────────────────────────────────────────
+# .env
+# ──────────────────────────────────────────────
+def iter_env(path):
+    """Yield (key, value) pairs line by line (same rules as parse_env_file)."""
+    with open(path, "rb") as f:
+        for line in f:
+            stripped = line.strip()
+            if stripped and not stripped.startswith(b"#"):
+                key, _, value = stripped.partition(b"=")
+                yield key.strip().decode(), value.strip().decode()
+
+
+def iter_config(path, **kwargs):
+    """Dispatch on file type: iter_json, iter_yaml or iter_env."""
+    kind = _kind(Path(path))
+    if kind == "json":
+        return iter_json(path, **kwargs)
+    if kind == "yaml":
+        return iter_yaml(path, **kwargs)
+    return iter_env(path)
+
+
+# ──────────────────────────────────────────────
+# 💡 Benchmark
+# ──────────────────────────────────────────────
+def make_input(path, size_mb):
+    """Generate a host inventory of roughly size_mb MiB (format from suffix)."""
+    kind = _kind(Path(path))
+    target = size_mb << 20
+    written = 0
+    i = 0
+    with open(path, "w") as f:
+        if kind == "json":
+            f.write("[\n")
+        while written < target:
+            if kind == "json":
+                rec = json.dumps({"host": f"node{i}", "ip": f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}",
+                                  "roles": ["web", "db"][: i % 2 + 1], "labels": {"rack": i % 40, "zone": "eu"}})
+                chunk = ("" if i == 0 else ",\n") + rec
+            elif kind == "yaml":
+                chunk = (f"- host: node{i}\n  ip: 10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}\n"
+                         f"  roles: [web, db]\n  labels: {{rack: {i % 40}, zone: eu}}\n")
+            else:
+                chunk = f"HOST_{i}=node{i}.eu.example.internal\n"
+            f.write(chunk)
+            written += len(chunk)
+            i += 1
+        if kind == "json":
+            f.write("\n]\n")
+    return i
+
+
+def _measure(method, path):
+    """Run in a child process: consume the input one way, report peak RSS."""
+    t0 = time.perf_counter()
+    if method == "load":
+        data = parse_file(path)
+        count = len(data)
+    else:
+        count = sum(1 for _ in iter_config(path))
+    elapsed = time.perf_counter() - t0
+    peak_kib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({"count": count, "seconds": elapsed, "peak_mib": peak_kib / 1024}))
+
+
+def benchmark(size_mb=1024, kinds=("json", "yaml", "env"), directory=None):
+    tmp = Path(tempfile.mkdtemp(prefix="cfg-stream-", dir=directory))
+    names = {"json": "inventory.json", "yaml": "inventory.yaml", "env": "inventory.env"}
+    try:
+        for kind in kinds:
+            path = tmp / names[kind]
+            items = make_input(path, size_mb)
+            print(f"{kind:<4} {path.stat().st_size / 2**20:7.0f} MiB, {items:,} items")
+            for method in ("load", "stream"):
+                proc = subprocess.run([sys.executable, __file__, "--measure", method, str(path)],
+                                      capture_output=True, text=True)
+                if proc.returncode != 0:
+                    print(f"     {method:<6}: failed ({proc.stderr.strip().splitlines()[-1:]})")
+                    continue
+                r = json.loads(proc.stdout)
+                print(f"     {method:<6}: {r['seconds']:7.1f} s, peak RSS {r['peak_mib']:8.1f} MiB")
+            path.unlink()
+    finally:
+        for p in tmp.iterdir():
+            p.unlink()
+        tmp.rmdir()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stream large JSON/YAML/.env files item by item")
+    parser.add_argument("file", nargs="?", help="File to stream (prints one item per line)")
+    parser.add_argument("--depth", type=int, default=1, help="YAML: 1 = top-level items, 0 = whole documents")
+    parser.add_argument("--bench", type=int, metavar="MB", help="Benchmark on a generated input of MB MiB")
+    parser.add_argument("--kinds", nargs="+", default=["json", "yaml", "env"], help="Formats to benchmark")
+    parser.add_argument("--measure", nargs=2, metavar=("METHOD", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        _measure(*args.measure)
+    elif args.bench:
+        benchmark(args.bench, args.kinds)
+    elif args.file:
+        kwargs = {"depth": args.depth} if _kind(Path(args.file)) == "yaml" else {}
+        try:
+            for item in iter_config(args.file, **kwargs):
+                print(json.dumps(item, default=str))
+        except BrokenPipeError:
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+    else:
+        parser.print_help()
@@ -13,62 +13,118 @@ Features:
     4️⃣ Check Docker service/daemon status:
         • systemctl (Linux)
         • pgrep Docker.app (macOS)
+    5️⃣ Run independent checks in parallel (see cmd_runner)
+    6️⃣ Reuse recent Docker probe results instead of forking (see probe_cache)
+    7️⃣ Ask dockerd over its Unix socket before falling back to the CLI (see docker_api)
 """
 
-import subprocess
 import platform
 import re
 import sys
+import time
+from collections import deque
+
+from cmd_runner import CommandResult, format_result, run_commands
+from docker_api import engine_summary
+from probe_cache import STATUS_TTL, VERSION_TTL, ProbeResult, default_cache
 
 
 # ──────────────────────────────────────────────
 # Utility function for running shell commands
 # ──────────────────────────────────────────────
-def run_command(cmd: list[str], desc: str):
-    """Run a shell command safely and print its output."""
+def print_result(result, desc: str):
+    """Print a finished cmd_runner result the way run_command always has."""
     print(f"\n⚙️  {desc}")
-    try:
-        result = subprocess.run(
-            cmd,
-            text=True,
-            capture_output=True,
-            check=False
-        )
-        if result.stdout.strip():
-            print(result.stdout.strip())
-        if result.stderr.strip():
-            print("⚠️  STDERR:", result.stderr.strip())
-        return result.returncode, result.stdout + result.stderr
-    except FileNotFoundError:
-        print(f"❌ Command not found: {cmd[0]}")
-        return 127, ""
-    except Exception as e:
-        print(f"❌ Unexpected error: {e}")
-        return 1, ""
+    if result.error and result.returncode in (126, 127):
+        print(f"❌ Command not found: {result.cmd[0]}" if result.returncode == 127
+              else f"❌ Unexpected error: {result.error}")
+        return result.returncode, ""
+    stdout, stderr = result.stdout_text, result.stderr_text
+    if stdout.strip():
+        print(stdout.strip())
+    if stderr.strip():
+        print("⚠️  STDERR:", stderr.strip())
+    if result.timed_out:
+        print(f"⏰ Timed out after {result.wall:.1f}s")
+    return result.returncode, stdout + "\n" + stderr
+
+
+def run_command(cmd: list[str], desc: str, timeout: float | None = None):
+    """Run a shell command safely and print its output."""
+    [result] = run_commands([cmd], timeout=timeout, max_lines=None)
+    return print_result(result, desc)
+
+
+def _from_probe(probe: ProbeResult) -> CommandResult:
+    result = CommandResult(probe.cmd, returncode=probe.returncode,
+                           stdout=deque(probe.stdout.splitlines()), stderr=deque(probe.stderr.splitlines()))
+    if probe.returncode == 127:
+        result.error = probe.stderr
+    return result
+
+
+def _store_probe(key, result: CommandResult, ttl: float):
+    if result.timed_out:
+        return
+    probe = ProbeResult(result.cmd, result.returncode, result.stdout_text + "\n",
+                        result.stderr_text + "\n", time.time())
+    default_cache().store(key, probe, ttl)
+
+
+def run_probe(cmd: list[str], desc: str, ttl: float):
+    """run_command, answered from the probe cache while a result is younger than ttl."""
+    key, cached = default_cache().lookup(cmd, ttl)
+    if cached is not None:
+        code, output = print_result(_from_probe(cached), desc)
+        print(f"♻️  Cached result ({cached.age:.0f}s old)")
+        return code, output
+    [result] = run_commands([cmd], max_lines=None)
+    _store_probe(key, result, ttl)
+    return print_result(result, desc)
 
 
 # ──────────────────────────────────────────────
 # 1️⃣ Run ls -l / dir
 # ──────────────────────────────────────────────
-def run_ls():
+def ls_command():
     if platform.system() == "Windows":
-        cmd = ["cmd", "/c", "dir"]
-    else:
-        cmd = ["ls", "-l"]
-    run_command(cmd, "Listing current directory contents")
+        return ["cmd", "/c", "dir"], "Listing current directory contents"
+    return ["ls", "-l"], "Listing current directory contents"
+
+
+def run_ls():
+    run_command(*ls_command())
 
 
 # ──────────────────────────────────────────────
 # 2️⃣ Check if Docker is installed
 # ──────────────────────────────────────────────
-def check_docker_installation():
-    code, output = run_command(["docker", "--version"], "Checking if Docker is installed")
+def docker_version_command():
+    return ["docker", "--version"], "Checking if Docker is installed"
+
+
+def report_docker_installation(code, output):
     if code == 0:
         print("✅ Docker is installed.")
     else:
         print("❌ Docker is not installed or not in PATH.")
 
 
+def report_docker_engine(engine: dict):
+    print("\n⚙️  Asking the Docker daemon over its socket")
+    print(f"Docker Engine {engine['version']} (API {engine['api_version']}, {engine['os']})")
+    print(f"Containers: {engine['running']}/{engine['containers']} running, {engine['images']} images")
+    print("✅ Docker is installed and the daemon is running.")
+
+
+def check_docker_installation():
+    engine = engine_summary()
+    if engine:
+        report_docker_engine(engine)
+        return
+    report_docker_installation(*run_probe(*docker_version_command(), VERSION_TTL))
+
+
 # ──────────────────────────────────────────────
 # 3️⃣ Ping google.com and parse latency
 # ──────────────────────────────────────────────
@@ -90,28 +146,93 @@ def ping_google():
 # ──────────────────────────────────────────────
 # 4️⃣ Check Docker daemon / service status
 # ──────────────────────────────────────────────
-def check_docker_status():
+def docker_status_command():
+    """(cmd, desc) for this OS, or None when there is no service check."""
     system = platform.system()
-    print(f"\n🧩 Checking Docker service status on {system}")
-
     if system == "Linux":
         # systemd-based
-        code, output = run_command(["systemctl", "is-active", "docker"], "Checking Docker daemon (Linux)")
-        if "active" in output:
+        return ["systemctl", "is-active", "docker"], "Checking Docker daemon (Linux)"
+    if system == "Darwin":
+        # macOS — Docker Desktop runs via launchd
+        return ["pgrep", "-fl", "Docker"], "Checking for Docker Desktop processes"
+    if system == "Windows":
+        return ["sc", "query", "com.docker.service"], "Checking Docker Windows service"
+    return None
+
+
+def report_docker_status(code, output):
+    system = platform.system()
+    if system == "Linux":
+        # "inactive" contains "active" as well
+        if output.split() and output.split()[0] == "active":
             print("✅ Docker daemon is running.")
         else:
             print("❌ Docker daemon is not active.")
     elif system == "Darwin":
-        # macOS — Docker Desktop runs via launchd
-        code, output = run_command(["pgrep", "-fl", "Docker"], "Checking for Docker Desktop processes")
         if "Docker.app" in output or "com.docker.backend" in output:
             print("✅ Docker Desktop is running.")
         else:
             print("❌ Docker Desktop is not running. Open it from Applications.")
-    elif system == "Windows":
-        run_command(["sc", "query", "com.docker.service"], "Checking Docker Windows service")
-    else:
+
+
+def check_docker_status():
+    print(f"\n🧩 Checking Docker service status on {platform.system()}")
+    command = docker_status_command()
+    if command is None:
         print("⚠️  Unsupported OS for Docker service check.")
+        return
+    report_docker_status(*run_probe(*command, STATUS_TTL))
+
+
+# ──────────────────────────────────────────────
+# 5️⃣ Run independent checks in parallel
+# ──────────────────────────────────────────────
+def run_checks_parallel(timeout=30.0):
+    """Run ls, the Docker version check and the Docker status check at once.
+
+    Each command's output is printed as one block when it finishes,
+    followed by its report, so parallel output never interleaves.
+    Docker probes are skipped when dockerd answers on its socket or a
+    fresh cached result exists.
+    """
+    checks = [(ls_command(), None, 0)]
+    engine = engine_summary()
+    if engine:
+        # The daemon answered: no need for the docker CLI or service manager
+        report_docker_engine(engine)
+    else:
+        checks.append((docker_version_command(), report_docker_installation, VERSION_TTL))
+        status = docker_status_command()
+        if status is None:
+            print(f"\n⚠️  Unsupported OS for Docker service check ({platform.system()}).")
+        else:
+            checks.append((status, report_docker_status, STATUS_TTL))
+
+    cache = default_cache()
+    to_run, keys = [], []
+    for (cmd, desc), report, ttl in checks:
+        key, cached = cache.lookup(cmd, ttl) if ttl else (None, None)
+        if cached is None:
+            to_run.append((cmd, desc, report, ttl))
+            keys.append(key)
+            continue
+        code, output = print_result(_from_probe(cached), desc)
+        if report:
+            report(code, output)
+        print(f"   ♻️  Cached result ({cached.age:.0f}s old), no fork")
+
+    def on_result(result):
+        _, desc, report, ttl = to_run[result.index]
+        if ttl:
+            _store_probe(keys[result.index], result, ttl)
+        code, output = print_result(result, desc)
+        if report:
+            report(code, output)
+        if result.returncode not in (126, 127):
+            print(f"   {format_result(result)}")
+
+    return run_commands([cmd for cmd, *_ in to_run], timeout=timeout, max_lines=None,
+                        on_result=on_result)
 
 
 # ──────────────────────────────────────────────
@@ -120,10 +241,8 @@ def check_docker_status():
 def main():
     print("🚀 Day 3 — Automating Shell Commands (Cross-Platform)\n")
 
-    run_ls()
-    check_docker_installation()
+    run_checks_parallel()
     ping_google()
-    check_docker_status()
 
     print("\n✅ All checks completed.\n")
 
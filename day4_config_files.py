@@ -12,13 +12,16 @@ Exercises:
     2️⃣ Update one key and save back
     3️⃣ Load and print a values.yaml file
     4️⃣ Parse a .env file into key/value pairs
+    5️⃣ Show layered configs (base → env → region → host) merged, with provenance
+    6️⃣ Stream huge inventories item by item with constant memory
 """
 
 import json
-import yaml
 from pathlib import Path
 from datetime import datetime
 
+# The config_* helpers pull in PyYAML, so each exercise imports what it uses
+
 # ──────────────────────────────────────────────
 # Utility functions
 # ──────────────────────────────────────────────
@@ -49,18 +52,18 @@ def handle_json_config(file_path="config.json"):
         ),
     )
 
+    from config_edit import edit_config
+    from config_loader import load_config
+
     print("\n📖 Reading JSON configuration...")
-    with open(path) as f:
-        data = json.load(f)
+    data = load_config(path)
     print(json.dumps(data, indent=4))
 
     # Modify one field
     print("\n🛠️  Updating replicas → 3")
-    data["replicas"] = 3
-    data["updated"] = str(datetime.now())
-
-    with open(path, "w") as f:
-        json.dump(data, f, indent=4)
+    with edit_config(path) as tx:
+        tx.set("replicas", 3)
+        tx.set("updated", str(datetime.now()))
     print("✅ JSON config updated.")
 
 
@@ -83,9 +86,11 @@ resources:
 """
     )
 
+    from config_edit import edit_config
+    from config_loader import load_config
+
     print("\n📖 Reading YAML configuration...")
-    with open(path) as f:
-        data = yaml.safe_load(f)
+    data = load_config(path)
 
     # Display nested values
     print(f"App Name: {data['app']['name']}")
@@ -93,10 +98,9 @@ resources:
     print(f"Replicas: {data['app']['replicas']}")
     print(f"Memory Limit: {data['resources']['limits']['memory']}")
 
-    # Update a field
-    data["app"]["replicas"] = 3
-    with open(path, "w") as f:
-        yaml.safe_dump(data, f, sort_keys=False)
+    # Update a field (locked, atomic write)
+    with edit_config(path) as tx:
+        tx.set("app.replicas", 3)
     print("✅ YAML config updated (replicas → 3).")
 
 
@@ -110,12 +114,10 @@ def parse_env_file(file_path=".env"):
         "ENV=production\nDB_HOST=localhost\nDB_PORT=5432\nSECRET_KEY=example123\n",
     )
 
+    from config_loader import load_config
+
     print("\n📖 Parsing .env file...")
-    env_vars = {}
-    for line in path.read_text().splitlines():
-        if line.strip() and not line.strip().startswith("#"):
-            key, _, value = line.partition("=")
-            env_vars[key.strip()] = value.strip()
+    env_vars = load_config(path, copy_result=True)
 
     for k, v in env_vars.items():
         print(f"{k} = {v}")
@@ -124,6 +126,36 @@ def parse_env_file(file_path=".env"):
     return env_vars
 
 
+# ──────────────────────────────────────────────
+# 4️⃣ Layers: merge base → env → region → host overlays
+# ──────────────────────────────────────────────
+def show_layered_config(*file_paths):
+    """Deep-merge config files (later ones win) and show where each value came from."""
+    from config_overlay import overlay
+
+    print("\n📚 Merging layers: " + " → ".join(str(p) for p in file_paths))
+    view = overlay(*file_paths, env_separator="__")
+    for key, source in view.provenance().items():
+        print(f"{key} = {view.get_path(key)!r}  ({source})")
+    return view
+
+
+# ──────────────────────────────────────────────
+# 5️⃣ Stream: walk very large inventories item by item
+# ──────────────────────────────────────────────
+def stream_config_items(file_path, limit=5):
+    """Print the first items of a (possibly huge) config without loading it whole."""
+    from config_stream import iter_config
+
+    print(f"\n🌊 Streaming {file_path}...")
+    count = 0
+    for count, item in enumerate(iter_config(file_path), 1):
+        if count <= limit:
+            print(f"  {item!r}")
+    print(f"✅ Streamed {count} items.")
+    return count
+
+
 # ──────────────────────────────────────────────
 # MAIN
 # ──────────────────────────────────────────────
@@ -132,6 +164,8 @@ def main():
     handle_json_config()
     handle_yaml_config()
     parse_env_file()
+    show_layered_config("values.yaml", ".env")
+    stream_config_items("values.yaml")
     print("\n✅ Configuration file exercises completed.\n")
 
 
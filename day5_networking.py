@@ -13,15 +13,19 @@ Exercises:
     💡 Stretch: Check multiple URLs from a file and report status codes
 """
 
-import requests
 import json
 import sys
 from pathlib import Path
 
+# requests and http_checker are imported by the functions that use them,
+# so importing this module (or running one check) stays cheap.
+
 # ──────────────────────────────────────────────
 # 1️⃣ Get your public IP
 # ──────────────────────────────────────────────
 def get_public_ip():
+    import requests
+
     print("\n🌐 Fetching public IP...")
     try:
         resp = requests.get("https://api.ipify.org?format=json", timeout=5)
@@ -38,6 +42,8 @@ def get_public_ip():
 # 2️⃣ Query GitHub API for rate-limit info
 # ──────────────────────────────────────────────
 def check_github_api():
+    import requests
+
     print("\n🐙 Checking GitHub API rate limits...")
     try:
         resp = requests.get("https://api.github.com", timeout=5)
@@ -56,19 +62,26 @@ def check_github_api():
 # ──────────────────────────────────────────────
 def safe_get(url, timeout=5):
     """Perform an HTTP GET safely, returning (status_code, ok)."""
-    try:
-        r = requests.get(url, timeout=timeout)
-        print(f"{url:<50} → {r.status_code}")
-        return r.status_code, True
-    except requests.exceptions.RequestException as e:
-        print(f"{url:<50} → ❌ {e}")
-        return None, False
+    import dns_cache
+    import requests
+    import telemetry
+
+    dns_cache.install()  # once per process; later calls find it in place
+    with telemetry.span("safe_get") as span:
+        try:
+            r = requests.get(url, timeout=timeout)
+            print(f"{url:<50} → {r.status_code}")
+            return r.status_code, True
+        except requests.exceptions.RequestException as e:
+            span.fail()
+            print(f"{url:<50} → ❌ {e}")
+            return None, False
 
 
 # ──────────────────────────────────────────────
 # 💡 Stretch Goal — check URLs from file
 # ──────────────────────────────────────────────
-def check_urls_from_file(file_path="urls.txt"):
+def check_urls_from_file(file_path="urls.txt", concurrency=64, per_host=8):
     file = Path(file_path)
     if not file.exists():
         print(f"\n⚠️  File '{file}' not found. Creating an example one.")
@@ -83,8 +96,10 @@ def check_urls_from_file(file_path="urls.txt"):
 
     print(f"\n📋 Checking URLs from: {file.resolve()}")
     urls = [line.strip() for line in file.read_text().splitlines() if line.strip()]
-    for url in urls:
-        safe_get(url)
+    # Pooled keep-alive checks; results print as each URL finishes
+    import http_checker
+
+    return http_checker.check_urls(urls, on_result=print, concurrency=concurrency, per_host=per_host)
 
 
 # ──────────────────────────────────────────────
@@ -11,96 +11,495 @@ Features:
     ✅ Structured logging to console & file
     ✅ Modular functions
     ✅ Ready for packaging with setuptools entry point
+    ✅ Prometheus metrics and span timings on --metrics-port (telemetry)
 """
 
 import argparse
-import logging
-import platform
 import os
-import subprocess
 import sys
-from datetime import datetime
+import time
+
+# Heavier modules (logging, platform, subprocess, log_follow, metric_log,
+# docker_api, probe_cache, log_pipeline) are imported inside the code paths
+# that use them: this script runs thousands of times a day, so startup
+# matters, and --help / follow never log.
+# `python startup_bench.py` checks the budget.
 
 # ──────────────────────────────────────────────
 # Logging Setup
 # ──────────────────────────────────────────────
-def setup_logging(log_file="devops.log", verbose=False):
-    """Configure global logging."""
+def setup_logging(log_file="devops.log", verbose=False, async_mode=False, json_lines=False,
+                  queue_size=10_000, drop_policy="drop-new"):
+    """Configure global logging.
+
+    With async_mode, records go through a bounded queue and are
+    formatted and written in batches by a background thread
+    (see log_pipeline); json_lines switches either mode to JSON output.
+    """
+    import logging
+
     log_level = logging.DEBUG if verbose else logging.INFO
+    if async_mode:
+        from log_pipeline import build_handler
+
+        handlers = [build_handler(log_file, console=True, json_lines=json_lines,
+                                  max_queue=queue_size, policy=drop_policy)]
+    else:
+        handlers = [
+            logging.FileHandler(log_file, encoding="utf-8", delay=True),  # opened on first record
+            logging.StreamHandler(sys.stdout),
+        ]
+        if json_lines:
+            from log_pipeline import JsonLinesFormatter
+
+            for handler in handlers:
+                handler.setFormatter(JsonLinesFormatter())
     logging.basicConfig(
         level=log_level,
         format="%(asctime)s [%(levelname)s] %(message)s",
-        handlers=[
-            logging.FileHandler(log_file, encoding="utf-8"),
-            logging.StreamHandler(sys.stdout),
-        ],
+        handlers=handlers,
+        force=True,  # the resident daemon configures logging once per request
     )
     logging.info("🔧 Logging initialized.")
-    logging.debug(f"Log file: {os.path.abspath(log_file)}")
+    logging.debug("Log file: %s", os.path.abspath(log_file))
 
 
 # ──────────────────────────────────────────────
 # Core DevOps Utility Functions
 # ──────────────────────────────────────────────
 def show_system_info():
+    import logging
+
     logging.info("🧠 Gathering system information...")
+    if hasattr(os, "uname"):
+        # The fields platform reports on POSIX, without importing it (~4 ms)
+        uname = os.uname()
+        host, system, release, machine = uname.nodename, uname.sysname, uname.release, uname.machine
+    else:  # Windows
+        import platform
+
+        host, system, release, machine = platform.node(), platform.system(), platform.release(), platform.machine()
     info = {
-        "Hostname": platform.node(),
-        "OS": f"{platform.system()} {platform.release()}",
-        "Architecture": platform.machine(),
-        "Python": platform.python_version(),
+        "Hostname": host,
+        "OS": f"{system} {release}",
+        "Architecture": machine,
+        "Python": "%d.%d.%d" % sys.version_info[:3],
         "CWD": os.getcwd(),
     }
     for k, v in info.items():
-        logging.info(f"{k}: {v}")
+        logging.info("%s: %s", k, v)
     return info
 
 
 def run_shell_command(cmd):
     """Run a shell command safely."""
-    logging.info(f"💻 Executing: {' '.join(cmd)}")
-    try:
-        result = subprocess.run(cmd, text=True, capture_output=True, check=False)
-        if result.returncode == 0:
-            logging.debug(result.stdout.strip())
-        else:
-            logging.warning(result.stderr.strip())
-        return result.returncode, result.stdout.strip()
-    except FileNotFoundError:
-        logging.error(f"Command not found: {cmd[0]}")
+    import logging
+    import subprocess
+
+    import telemetry
+
+    logging.info("💻 Executing: %s", " ".join(cmd))
+    with telemetry.span("run_shell_command") as span:
+        try:
+            result = subprocess.run(cmd, text=True, capture_output=True, check=False)
+            if result.returncode == 0:
+                logging.debug(result.stdout.strip())
+            else:
+                span.fail()
+                logging.warning(result.stderr.strip())
+            return result.returncode, result.stdout.strip()
+        except FileNotFoundError:
+            span.fail()
+            logging.error("Command not found: %s", cmd[0])
+            return 127, ""
+        except Exception as e:
+            span.fail()
+            logging.error("Unexpected error: %s", e)
+            return 1, ""
+
+
+def probe_shell_command(cmd, ttl=None):
+    """run_shell_command for detection probes: reuses a recent result instead of forking."""
+    import logging
+
+    from probe_cache import VERSION_TTL, probe
+
+    result = probe(cmd, VERSION_TTL if ttl is None else ttl)
+    if result.cached:
+        logging.debug("♻️  Cached probe (%.0fs old): %s", result.age, " ".join(cmd))
+    else:
+        logging.info("💻 Executing: %s", " ".join(cmd))
+    if result.returncode == 127:
+        logging.error("Command not found: %s", cmd[0])
         return 127, ""
-    except Exception as e:
-        logging.error(f"Unexpected error: {e}")
-        return 1, ""
+    if result.returncode == 0:
+        logging.debug(result.stdout.strip())
+    else:
+        logging.warning(result.stderr.strip())
+    return result.returncode, result.stdout.strip()
 
 
 def check_docker():
     """Check if Docker is installed and running."""
+    import logging
+
     logging.info("🐳 Checking Docker installation...")
-    code, output = run_shell_command(["docker", "--version"])
+    # Same rule as docker_api.default_socket(); checked here so that hosts
+    # without a daemon socket never import the HTTP stack
+    docker_host = os.environ.get("DOCKER_HOST", "")
+    socket_path = docker_host[len("unix://"):] if docker_host.startswith("unix://") else "/var/run/docker.sock"
+    engine = None
+    if os.path.exists(socket_path):
+        from docker_api import engine_summary
+
+        engine = engine_summary(socket_path)  # straight from dockerd, no CLI fork
+    if engine:
+        logging.info("✅ Docker Engine %s (API %s) running: %d/%d containers up, %d images",
+                     engine["version"], engine["api_version"], engine["running"],
+                     engine["containers"], engine["images"])
+        return True
+    code, output = probe_shell_command(["docker", "--version"])
     if code == 0:
-        logging.info(f"✅ Docker installed: {output}")
+        logging.info("✅ Docker installed: %s", output)
     else:
         logging.warning("❌ Docker not found or not in PATH.")
+    return code == 0
 
 
 def ping_host(host):
     """Ping a single host."""
-    logging.info(f"🌐 Pinging {host}")
+    import logging
+    import platform
+
+    logging.info("🌐 Pinging %s", host)
     cmd = ["ping", "-c", "2", host] if platform.system() != "Windows" else ["ping", "-n", "2", host]
     code, output = run_shell_command(cmd)
     if code == 0:
-        logging.info(f"✅ {host} reachable")
+        logging.info("✅ %s reachable", host)
     else:
-        logging.warning(f"❌ {host} unreachable")
+        logging.warning("❌ %s unreachable", host)
+    return code == 0
+
+
+# ──────────────────────────────────────────────
+# Subcommands
+# ──────────────────────────────────────────────
+# Each handler imports the module it wraps, so `devops-tool ping` never
+# loads requests or paramiko. Handlers return an exit status (None = 0).
+def cmd_info(args):
+    import sysinfo
+
+    sysinfo.banner()
+    sysinfo.system_info()
+    for path in args.path:
+        sysinfo.disk_usage(path)
+    if args.du:
+        from du_scan import print_result, scan_tree
+
+        for path in args.path:
+            print_result(scan_tree(path, top_n=args.top))
+    if args.env:
+        sysinfo.show_env(args.limit, args.env_prefix, args.env_match, args.env_pid, not args.no_redact)
+
+
+def cmd_watch(args):
+    import sysinfo
+    from metrics_store import MetricsStore
+
+    store = MetricsStore()
+    try:
+        sysinfo.watch(args.interval, args.path, args.count, store)
+    except KeyboardInterrupt:
+        print("\n🛑 Interrupted by user.")
+    except RuntimeError as e:
+        sys.exit(f"❌ Error: {e}")
+    sysinfo.print_summary(store)
+
+
+def cmd_system(args):
+    import stage2_system
+
+    stage2_system.show_system_info()
+    stage2_system.list_files(args.path)
+    stage2_system.count_log_files(args.path)
+    stage2_system.summarize_logs(args.path, tail=args.tail)
+
+
+def cmd_ping(args):
+    from stage6_concurrency import parallel_ping
+
+    results = parallel_ping(args.hosts, count=args.count, timeout=args.timeout)
+    return 0 if results is None or all(r.reachable for r in results) else 1
+
+
+def cmd_fetch(args):
+    if args.file:
+        from day5_networking import check_urls_from_file
+
+        results = check_urls_from_file(args.file, args.concurrency, args.per_host)
+    else:
+        from stage6_concurrency import parallel_fetch
+
+        results = parallel_fetch(args.urls, args.concurrency, args.per_host)
+    return 0 if all(r.ok for r in results or ()) else 1
+
+
+def cmd_ssh(args):
+    from stage6_concurrency import parallel_ssh
+
+    parallel_ssh(args.hosts, user=args.user, key_file=args.key_file, cmd=args.cmd or ["hostname"])
+
+
+def cmd_public_ip(args):
+    from day5_networking import get_public_ip
+
+    return 0 if get_public_ip() else 1
+
+
+def cmd_github(args):
+    from day5_networking import check_github_api
+
+    check_github_api()
+
+
+def cmd_scan(args):
+    from port_scan import run_cli
+
+    return run_cli(args)
+
+
+def cmd_bench(args):
+    from bench_suite import run_cli
+
+    return run_cli(args)
+
+
+def cmd_top(args):
+    import proc_top
+
+    try:
+        if args.watch:
+            proc_top.watch(args.watch, args.top, args.sort, args.count)
+        else:
+            # default_table(): in the daemon the previous call's scan gives the deltas
+            sys.stdout.write(proc_top.once(args.top, args.sort))
+    except RuntimeError as e:
+        sys.exit(f"❌ Error: {e}")
+
+
+def cmd_docker(args):
+    return 0 if check_docker() else 1
+
+
+def cmd_follow(args):
+    from log_follow import build_parser as build_follow_parser, follow
+
+    follow_args = build_follow_parser(argparse.ArgumentParser(
+        prog=f"{os.path.basename(sys.argv[0])} follow",
+        description="Follow many log files at once via inotify (polling fallback).",
+        formatter_class=_HelpFormatter,
+    )).parse_args(args.rest)
+    follow(follow_args.paths, follow_args.level, follow_args.checkpoint,
+           follow_args.from_start, follow_args.poll)
+
+
+# Modules the daemon imports up front, so the first request is warm too
+WARM_MODULES = ("sysinfo", "du_scan", "stage2_system", "log_scan", "fleet_ping", "http_checker",
+                "stage6_concurrency", "ssh_pool", "day5_networking", "docker_api", "probe_cache", "proc_top", "port_scan",
+                "metric_log", "log_pipeline", "config_loader", "telemetry")
+
+
+def cmd_daemon(args):
+    import devops_daemon
+
+    if args.status or args.stop:
+        status = devops_daemon.control("stop" if args.stop else "status", args.socket)
+        if status is None:
+            print(f"⚪ No devops-tool daemon listening on {args.socket or devops_daemon.default_socket_path()}")
+            return 1
+        return status
+
+    import importlib
+    import logging
+    import signal
+
+    for name in WARM_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError as e:  # optional dependency missing: that command stays cold
+            logging.debug("Not preloading %s: %s", name, e)
+
+    def request_done():
+        root = logging.getLogger()
+        for handler in root.handlers[:]:
+            root.removeHandler(handler)
+            handler.close()
+        probe_cache = sys.modules.get("probe_cache")
+        if probe_cache is not None and probe_cache._DEFAULT is not None:
+            probe_cache._DEFAULT.flush()
+
+    daemon = devops_daemon.DevopsDaemon(lambda argv: main(argv, resident=True),
+                                        args.socket, on_request_done=request_done)
+    signal.signal(signal.SIGTERM, lambda *_: daemon.stop())
+    print(f"🛰️  devops-tool daemon (pid {os.getpid()}) listening on {daemon.socket_path}", flush=True)
+    daemon.serve_forever()
+    print("🏁 devops-tool daemon stopped.")
+
+
+COMMANDS = {
+    "info": cmd_info,
+    "watch": cmd_watch,
+    "system": cmd_system,
+    "ping": cmd_ping,
+    "fetch": cmd_fetch,
+    "ssh": cmd_ssh,
+    "public-ip": cmd_public_ip,
+    "github": cmd_github,
+    "scan": cmd_scan,
+    "top": cmd_top,
+    "docker": cmd_docker,
+    "follow": cmd_follow,
+    "daemon": cmd_daemon,
+    "bench": cmd_bench,
+}
+# Commands that run without the logging setup (they stream their own output
+# and must not write to devops.log), and that the thin client never forwards
+LOCAL_ONLY = ("follow", "watch", "daemon", "bench")
+
+
+# Commands whose stdout is machine-readable (NDJSON): no console log lines
+RAW_OUTPUT = ("scan",)
+
+
+def runs_locally(args) -> bool:
+    return args.command in LOCAL_ONLY or (args.command == "top" and bool(args.watch))
 
 
 # ──────────────────────────────────────────────
 # CLI Definition
 # ──────────────────────────────────────────────
-def parse_args():
+class _HelpFormatter(argparse.HelpFormatter):
+    """argparse.HelpFormatter sized without shutil.
+
+    argparse builds a formatter for every add_argument() and sizes it with
+    shutil.get_terminal_size(); importing shutil (zlib, bz2, lzma) cost
+    every devops-tool run ~4 ms. Same rule: $COLUMNS, then the tty, then 80.
+    """
+
+    def __init__(self, prog, indent_increment=2, max_help_position=24, width=None):
+        if width is None:
+            try:
+                columns = int(os.environ["COLUMNS"])
+            except (KeyError, ValueError):
+                columns = 0
+            if columns <= 0:
+                try:
+                    columns = os.get_terminal_size(sys.__stdout__.fileno()).columns
+                except (AttributeError, ValueError, OSError):
+                    columns = 0
+            width = (columns or 80) - 2
+        super().__init__(prog, indent_increment, max_help_position, width)
+
+
+def _info_args(info):
+    info.add_argument("--path", nargs="+", default=["/"], help="Path(s) for disk usage")
+    info.add_argument("--du", action="store_true", help="Also size the subtrees under --path")
+    info.add_argument("--top", type=int, default=10, help="Largest directories shown by --du")
+    info.add_argument("--env", action="store_true", help="Show environment variables")
+    info.add_argument("--limit", type=int, help="Limit number of env vars shown")
+    info.add_argument("--env-prefix", action="append", default=[], metavar="PREFIX",
+                      help="Only env vars starting with PREFIX (repeatable)")
+    info.add_argument("--env-match", metavar="REGEX", help="Only env vars whose name matches REGEX")
+    info.add_argument("--env-pid", type=int, metavar="PID", help="Environment of another process")
+    info.add_argument("--no-redact", action="store_true", help="Print secret env values as they are")
+
+
+def _watch_args(watch):
+    watch.add_argument("interval", type=float, nargs="?", default=1.0, help="Seconds between samples")
+    watch.add_argument("--path", nargs="+", default=["/"], help="Path(s) for disk usage")
+    watch.add_argument("--count", type=int, help="Stop after this many samples")
+
+
+def _system_args(system):
+    system.add_argument("path", nargs="?", default=".", help="Directory to inspect (default: .)")
+    system.add_argument("--tail", type=int, default=3, help="Last lines shown per log file")
+
+
+def _ping_args(ping):
+    ping.add_argument("hosts", nargs="+", metavar="HOST")
+    ping.add_argument("--count", type=int, default=1, help="Echo requests per host")
+    ping.add_argument("--timeout", type=float, default=1.0, help="Seconds to wait per reply")
+
+
+def _fetch_args(fetch):
+    fetch.add_argument("urls", nargs="*", metavar="URL")
+    fetch.add_argument("--file", help="Read URLs from a file, one per line")
+    fetch.add_argument("--concurrency", type=int, default=64, help="Requests in flight")
+    fetch.add_argument("--per-host", type=int, default=8, help="Keep-alive connections per host")
+
+
+def _ssh_args(ssh):
+    ssh.add_argument("hosts", nargs="+", metavar="HOST")
+    ssh.add_argument("--cmd", action="append", help="Command to run (repeatable, default: hostname)")
+    ssh.add_argument("--user", default="root", help="SSH user (default: root)")
+    ssh.add_argument("--key-file", default="~/.ssh/id_rsa", help="Private key file")
+
+
+def _scan_args(scan):
+    from port_scan import build_parser as build_scan_parser
+
+    build_scan_parser(scan)
+
+
+def _top_args(top):
+    from proc_top import build_parser as build_top_parser
+
+    build_top_parser(top)
+
+
+def _bench_args(bench):
+    from bench_suite import build_parser as build_bench_parser
+
+    build_bench_parser(bench)
+
+
+def _daemon_args(daemon):
+    daemon.add_argument("--socket", help="Socket path (default: $XDG_RUNTIME_DIR/devops-tool.sock, "
+                                         "else /tmp/devops-tool-UID/daemon.sock)")
+    control = daemon.add_mutually_exclusive_group()
+    control.add_argument("--status", action="store_true", help="Report on the running daemon")
+    control.add_argument("--stop", action="store_true", help="Stop the running daemon")
+
+
+# name → (help, function adding the subcommand's options)
+SUBCOMMANDS = {
+    "info": ("System, disk and environment diagnostics (sysinfo)", _info_args),
+    "watch": ("Sample CPU/memory/load/disk I/O (sysinfo --watch)", _watch_args),
+    "system": ("OS info, file listing and log summary (stage2)", _system_args),
+    "ping": ("Ping many hosts from one ICMP socket (stage6)", _ping_args),
+    "fetch": ("Check HTTP status of many URLs (day5 / stage6)", _fetch_args),
+    "ssh": ("Run commands on many hosts over pooled SSH (stage6)", _ssh_args),
+    "scan": ("TCP connect scan of host:port / CIDR × port targets (NDJSON)", _scan_args),
+    "top": ("Top processes by CPU / RSS / IO from /proc", _top_args),
+    "public-ip": ("Show this host's public IP (day5)", None),
+    "github": ("Show GitHub API rate-limit headers (day5)", None),
+    "docker": ("Check Docker Engine / CLI (same as --check-docker)", None),
+    # Options are parsed by log_follow itself, so it is only imported when `follow` runs
+    "follow": ("Stream new lines from log files (tail -F with rotation handling)", None),
+    "daemon": ("Stay resident and serve devops-tool calls over a Unix socket", _daemon_args),
+    "bench": ("Benchmark ping/fetch/ssh/config/disk against local stand-ins", _bench_args),
+}
+
+
+def build_parser(command=None, listing=True):
+    """Top-level parser; only `command` gets its options.
+
+    listing=False also leaves out the other subcommands (~0.4 ms each):
+    they only show up in --help and in "invalid choice" errors.
+    """
     parser = argparse.ArgumentParser(
-        description="Day 7 — DevOps Utility CLI with logging and packaging support."
+        description="Day 7 — DevOps Utility CLI with logging and packaging support.",
+        formatter_class=_HelpFormatter,
     )
     parser.add_argument(
         "--info",
@@ -122,32 +521,139 @@ def parse_args():
         default="devops.log",
         help="Path to log file (default: devops.log)",
     )
+    parser.add_argument(
+        "--metric-log",
+        metavar="DIR",
+        help="Also append results to a binary metric log in DIR",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        metavar="PORT",
+        help="Serve Prometheus metrics on 127.0.0.1:PORT while running (see telemetry)",
+    )
+    parser.add_argument(
+        "--async-log",
+        action="store_true",
+        help="Queue log records and write them in batches from a background thread",
+    )
+    parser.add_argument(
+        "--log-json",
+        action="store_true",
+        help="Write logs as JSON lines",
+    )
+    parser.add_argument(
+        "--log-queue-size",
+        type=int,
+        default=10_000,
+        help="Max queued records in --async-log mode (default: 10000)",
+    )
+    parser.add_argument(
+        "--log-drop-policy",
+        choices=["drop-new", "drop-old", "block"],
+        default="drop-new",
+        help="What --async-log does when the queue is full (default: drop-new)",
+    )
     parser.add_argument(
         "--verbose",
         action="store_true",
         help="Enable debug output",
     )
-    return parser.parse_args()
+    parser.add_argument(
+        "--no-daemon",
+        action="store_true",
+        help="Run in this process even if a devops-tool daemon is listening",
+    )
+
+    subparsers = parser.add_subparsers(dest="command", metavar="COMMAND")
+    # Only the subcommand being run gets its options: building all of them
+    # costs more start-up than most commands take to run
+    for name, (help_text, configure) in SUBCOMMANDS.items():
+        if not listing and name != command:
+            continue
+        sub = subparsers.add_parser(name, help=help_text, add_help=name != "follow",
+                                    formatter_class=_HelpFormatter)
+        if name == command and configure is not None:
+            configure(sub)
+    return parser
+
+
+def parse_args(argv=None):
+    from devops_tool import command_of
+
+    argv_list = sys.argv[1:] if argv is None else argv
+    command = command_of(argv_list)
+    # --help / --he... (argparse accepts prefixes) before a known command lists them all
+    wants_help = any(a == "-h" or (len(a) > 2 and "--help".startswith(a)) for a in argv_list)
+    parser = build_parser(command, listing=command not in SUBCOMMANDS and (command is not None or wants_help))
+    args, args.rest = parser.parse_known_args(argv)
+    if args.rest and args.command != "follow":
+        parser.error(f"unrecognized arguments: {' '.join(args.rest)}")
+    return args
 
 
 # ──────────────────────────────────────────────
 # Entry Point
 # ──────────────────────────────────────────────
-def main():
-    args = parse_args()
-    setup_logging(args.log_file, args.verbose)
+def main(argv=None, resident=False):
+    """Run one devops-tool invocation and return its exit status.
+
+    resident=True is set by the daemon, which calls this once per
+    forwarded request with sys.stdout/sys.stderr pointing at the client.
+    """
+    args = parse_args(argv)
+    if resident and runs_locally(args):
+        print(f"❌ '{args.command}' runs in the client, not in the daemon", file=sys.stderr)
+        return 2
+    if args.metrics_port is not None:
+        import telemetry
+
+        try:
+            telemetry.serve(args.metrics_port)  # no-op when already serving (e.g. in the daemon)
+        except OSError as e:
+            print(f"❌ Error: metrics port {args.metrics_port}: {e}", file=sys.stderr)
+            return 1
+    if runs_locally(args) or args.command in RAW_OUTPUT:
+        # No logging setup: following devops.log must not write to it, and
+        # NDJSON on stdout must not be interleaved with log lines
+        if args.command == "daemon" and not (args.status or args.stop) and args.verbose:
+            import logging
+
+            logging.basicConfig(level=logging.DEBUG)
+        return COMMANDS[args.command](args) or 0
+    import logging
 
-    logging.info(f"🚀 DevOps Utility Started — {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    setup_logging(args.log_file, args.verbose, args.async_log, args.log_json,
+                  args.log_queue_size, args.log_drop_policy)
 
+    logging.info("🚀 DevOps Utility Started — %s", time.strftime("%Y-%m-%d %H:%M:%S"))
+
+    status = 0
+    metrics = {}
+    if args.command:
+        status = COMMANDS[args.command](args) or 0
     if args.info:
         show_system_info()
     if args.ping:
-        ping_host(args.ping)
+        start = time.perf_counter()
+        metrics[f"ping_reachable:{args.ping}"] = int(ping_host(args.ping))
+        metrics[f"ping_duration_ms:{args.ping}"] = (time.perf_counter() - start) * 1000.0
     if args.check_docker:
-        check_docker()
+        metrics["docker_installed"] = int(check_docker())
+
+    if args.metric_log and metrics:
+        from metric_log import MetricLogWriter
+
+        with MetricLogWriter(args.metric_log) as writer:
+            writer.append_many(metrics)
+        logging.debug("Wrote %d metric(s) to %s", len(metrics), args.metric_log)
 
     logging.info("🏁 DevOps Utility Finished.")
+    return status
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        sys.exit("\n🛑 Interrupted by user.")
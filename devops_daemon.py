@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+DevOps Daemon — resident devops-tool server on a local Unix socket
+Author: Vitalie Procopan
+
+Goal:
+    Pay interpreter start, imports, SSH/HTTP pools and caches once:
+    a resident process runs devops-tool commands for thin clients.
+
+Features:
+    1️⃣ Unix socket in $XDG_RUNTIME_DIR (or a private 0700 dir in /tmp), mode 0600;
+       both ends check the peer's uid (socket owner + SO_PEERCRED)
+    2️⃣ Compact binary protocol: NUL-joined argv + environment in, typed output frames back
+    3️⃣ Output streams to the client while the command runs
+    4️⃣ Warm state: modules, ssh_pool / probe_cache / config_loader caches stay loaded
+    5️⃣ `daemon --status` / `daemon --stop` control requests
+
+Protocol:
+    request  = u32 length + b"\\0".join([cwd, arg1, arg2, ...])   (UTF-8, surrogateescape)
+             + u32 length + b"\\0".join([b"KEY=value", ...])     (client environment)
+    response = frames of (1 byte kind, u32 length, payload):
+               b"1" stdout text, b"2" stderr text, b"x" exit status (i32)
+"""
+
+import _socket  # the C module: `socket` costs the client ~13 ms of imports (enum, selectors)
+import os
+import stat
+import struct
+import sys
+import time
+
+FRAME = struct.Struct(">cI")
+LENGTH = struct.Struct(">I")
+STATUS = struct.Struct(">i")
+CONTROL = "__devops_daemon__"  # argv[0] of control requests
+MAX_REQUEST = 1 << 20
+FALLBACK_DIR = "/tmp/devops-tool-{uid}"  # without $XDG_RUNTIME_DIR; created 0700
+
+
+def default_socket_path() -> str:
+    override = os.environ.get("DEVOPS_DAEMON_SOCKET")
+    if override:
+        return override
+    runtime = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime and os.path.isdir(runtime):
+        return os.path.join(runtime, "devops-tool.sock")
+    return os.path.join(FALLBACK_DIR.format(uid=os.getuid()), "daemon.sock")
+
+
+def _peer_uid(sock) -> int | None:
+    """uid of the process at the other end (None where SO_PEERCRED is missing)."""
+    opt = getattr(_socket, "SO_PEERCRED", None)
+    if opt is None:
+        return None
+    return struct.unpack("3i", sock.getsockopt(_socket.SOL_SOCKET, opt, 12))[1]
+
+
+def _recv_exact(sock, n) -> bytes:
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            raise ConnectionError("connection closed mid-frame")
+        buf += chunk
+    return bytes(buf)
+
+
+def _encode_args(args) -> bytes:
+    return b"\0".join(os.fsencode(a) for a in args)
+
+
+def _encode_env() -> bytes:
+    environb = getattr(os, "environb", None)  # POSIX only, like AF_UNIX
+    items = environb.items() if environb is not None else ((os.fsencode(k), os.fsencode(v))
+                                                             for k, v in os.environ.items())
+    return b"\0".join(k + b"=" + v for k, v in items)
+
+
+# ──────────────────────────────────────────────
+# Thin client (kept import-light: os, _socket, struct, sys)
+# ──────────────────────────────────────────────
+def forward(argv, socket_path=None, out=None, err=None) -> int | None:
+    """Run argv in the daemon and stream its output; None if no daemon is listening.
+
+    Only a socket owned by, and served by a process of, the calling user
+    is trusted: anything else would receive our argv and environment and
+    could fake output and exit status. The command runs with our cwd and
+    environment, not the daemon's.
+    """
+    path = socket_path or default_socket_path()
+    out = out or sys.stdout.buffer
+    err = err or sys.stderr.buffer
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    uid = os.getuid()
+    if st.st_uid != uid or not stat.S_ISSOCK(st.st_mode):
+        err.write(f"devops-tool: ignoring {path}: not a socket owned by uid {uid}\n".encode())
+        return None
+    sock = _socket.socket(_socket.AF_UNIX, _socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+        peer = _peer_uid(sock)
+    except OSError:
+        sock.close()
+        return None  # stale socket file: run locally
+    if peer is not None and peer != uid:
+        sock.close()
+        err.write(f"devops-tool: ignoring {path}: served by uid {peer}\n".encode())
+        return None
+    try:
+        payload = _encode_args([os.getcwd(), *argv])
+        env = _encode_env()
+        sock.sendall(LENGTH.pack(len(payload)) + payload + LENGTH.pack(len(env)) + env)
+        while True:
+            kind, length = FRAME.unpack(_recv_exact(sock, FRAME.size))
+            data = _recv_exact(sock, length)
+            if kind == b"x":
+                return STATUS.unpack(data)[0]
+            stream = out if kind == b"1" else err
+            stream.write(data)
+            stream.flush()
+    except BrokenPipeError:
+        # Our own stdout went away (`devops-tool ... | head`): stop quietly like a local run
+        if out is sys.stdout.buffer:
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 141
+    except ConnectionError:
+        err.write(b"devops-tool: daemon closed the connection\n")
+        return 1
+    finally:
+        sock.close()
+
+
+def control(action, socket_path=None) -> int | None:
+    """Send a control request (status / stop)."""
+    return forward([CONTROL, action], socket_path)
+
+
+# ──────────────────────────────────────────────
+# Server
+# ──────────────────────────────────────────────
+class _FrameWriter:
+    """Text stream that sends each write to the client as one frame."""
+
+    def __init__(self, sock, kind: bytes, line_buffered=True):
+        self.sock = sock
+        self.kind = kind
+        self.line_buffered = line_buffered
+        self.closed = False
+        self.encoding = "utf-8"
+        self.errors = "surrogateescape"
+        self._pending = []
+        self._size = 0
+
+    def write(self, text) -> int:
+        if not text or self.closed:
+            return len(text)
+        # print() writes the text and the "\n" separately; batch them per line
+        self._pending.append(text)
+        self._size += len(text)
+        if (self.line_buffered and "\n" in text) or self._size >= 1 << 16:
+            self.flush()
+        return len(text)
+
+    def flush(self):
+        if not self._pending or self.closed:
+            return
+        data = "".join(self._pending).encode(self.encoding, self.errors)
+        self._pending.clear()
+        self._size = 0
+        try:
+            self.sock.sendall(FRAME.pack(self.kind, len(data)) + data)
+        except OSError:
+            self.closed = True  # client went away; let the command finish quietly
+
+    def close(self):
+        # Logging handlers close their streams; the socket outlives the request
+        self.flush()
+
+    def isatty(self) -> bool:
+        return False
+
+    def fileno(self):
+        raise OSError("daemon output stream has no file descriptor")
+
+    @property
+    def buffer(self):
+        return self
+
+
+class DevopsDaemon:
+    """Serve `handler(argv) -> exit status` on a Unix socket, one request at a time.
+
+    Requests are serialised because commands write to sys.stdout and
+    change directory; the point is to skip start-up, not to run many
+    commands at once. Streaming commands (follow, watch) are run by the
+    client itself.
+    """
+
+    def __init__(self, handler, socket_path=None, on_request_done=None):
+        self.handler = handler
+        self.socket_path = socket_path or default_socket_path()
+        self.on_request_done = on_request_done
+        self.started = time.time()
+        self.served = 0
+        self._stopping = False  # set from a signal handler or a control request
+        self._sock = None
+
+    def _bind(self):
+        import socket
+
+        directory = os.path.dirname(os.path.abspath(self.socket_path))
+        if directory == FALLBACK_DIR.format(uid=os.getuid()):
+            # Shared /tmp: the directory must be ours alone, or another user
+            # could swap the socket for their own
+            try:
+                os.mkdir(directory, 0o700)
+            except FileExistsError:
+                pass
+            st = os.lstat(directory)
+            if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or st.st_mode & 0o077:
+                raise RuntimeError(f"{directory} must be a directory owned by uid {os.getuid()}, mode 0700")
+        if os.path.exists(self.socket_path):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self.socket_path)
+                raise RuntimeError(f"a daemon is already listening on {self.socket_path}")
+            except (ConnectionRefusedError, FileNotFoundError):
+                os.unlink(self.socket_path)  # stale
+            finally:
+                probe.close()
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        old_umask = os.umask(0o177)  # socket is created 0600: only this user may connect
+        try:
+            sock.bind(self.socket_path)
+        finally:
+            os.umask(old_umask)
+        sock.listen(64)
+        sock.settimeout(0.5)
+        self._sock = sock
+
+    def serve_forever(self):
+        self._bind()
+        try:
+            while not self._stopping:
+                try:
+                    conn, _ = self._sock.accept()
+                except TimeoutError:
+                    continue
+                with conn:
+                    conn.settimeout(None)
+                    self._serve(conn)
+        finally:
+            self._sock.close()
+            try:
+                os.unlink(self.socket_path)
+            except FileNotFoundError:
+                pass
+
+    def stop(self):
+        self._stopping = True
+
+    def _serve(self, conn):
+        try:
+            peer = _peer_uid(conn)
+            if peer is not None and peer != os.getuid():
+                return
+            blocks = []
+            for _ in range(2):  # argv, then environment
+                (length,) = LENGTH.unpack(_recv_exact(conn, LENGTH.size))
+                if length > MAX_REQUEST:
+                    return
+                blocks.append(_recv_exact(conn, length))
+        except (ConnectionError, OSError):
+            return
+        parts = [os.fsdecode(p) for p in blocks[0].split(b"\0")]
+        env = dict(item.partition(b"=")[::2] for item in blocks[1].split(b"\0") if b"=" in item)
+        cwd, argv = parts[0], parts[1:]
+        out, err = _FrameWriter(conn, b"1"), _FrameWriter(conn, b"2")
+        if argv[:1] == [CONTROL]:
+            status = self._control(argv[1:], out)
+        else:
+            status = self._run(cwd, argv, env, out, err)
+        self.served += 1
+        try:
+            conn.sendall(FRAME.pack(b"x", STATUS.size) + STATUS.pack(status))
+        except OSError:
+            pass
+
+    def _run(self, cwd, argv, env, out, err) -> int:
+        saved = sys.stdout, sys.stderr, os.getcwd()
+        saved_env = dict(os.environb)
+        sys.stdout, sys.stderr = out, err
+        # The client's environment for this request (info --env, DOCKER_HOST,
+        # proxies, DEVOPS_NAMESERVER, ...); putenv, so child processes see it too
+        os.environb.clear()
+        os.environb.update(env)
+        try:
+            os.chdir(cwd)
+            status = self.handler(argv)
+        except SystemExit as e:
+            status = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+            if not isinstance(e.code, (int, type(None))):
+                err.write(f"{e.code}\n")
+        except KeyboardInterrupt:
+            status = 130
+        except Exception as e:  # keep serving after a failing command
+            err.write(f"❌ {e.__class__.__name__}: {e}\n")
+            status = 1
+        finally:
+            if self.on_request_done:
+                # Still pointed at the client: queued (--async-log) records
+                # drain into this request's frames, before its exit status
+                try:
+                    self.on_request_done()
+                except Exception as e:
+                    err.write(f"❌ {e.__class__.__name__}: {e}\n")
+            out.flush()
+            err.flush()
+            sys.stdout, sys.stderr = saved[0], saved[1]
+            os.chdir(saved[2])
+            os.environb.clear()
+            os.environb.update(saved_env)
+        return status or 0
+
+    def _control(self, args, out) -> int:
+        action = args[0] if args else "status"
+        if action == "stop":
+            out.write(f"🛑 devops-tool daemon (pid {os.getpid()}) stopping\n")
+            self.stop()
+            return 0
+        if action == "status":
+            uptime = time.time() - self.started
+            out.write(f"✅ devops-tool daemon pid {os.getpid()} on {self.socket_path}, "
+                      f"up {uptime:.0f}s, {self.served} request(s) served, "
+                      f"{len(sys.modules)} modules loaded\n")
+            return 0
+        out.write(f"unknown control action: {action}\n")
+        return 2
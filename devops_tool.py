@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+devops-tool — console entry point
+Author: Vitalie Procopan
+
+Goal:
+    Forward the call to a running `devops-tool daemon` when there is one
+    (a socket round trip instead of imports and warm-up), otherwise run
+    day7_devops_cli in this process.
+
+Features:
+    1️⃣ Imports only os, socket, struct and sys before deciding
+    2️⃣ follow / watch / top --watch / daemon / bench always run locally (streaming, control or timing)
+    3️⃣ --no-daemon (or DEVOPS_NO_DAEMON=1) forces a local run
+"""
+
+import os
+import sys
+
+# Commands the client never forwards (kept in sync with day7_devops_cli.runs_locally)
+LOCAL_ONLY = ("follow", "watch", "daemon", "bench")
+
+
+# Top-level options that take a value (the value is not the subcommand)
+_VALUE_OPTIONS = ("--ping", "--log-file", "--metric-log", "--metrics-port", "--log-queue-size",
+                  "--log-drop-policy")
+
+
+def command_of(argv):
+    """First positional argument, i.e. the subcommand (None for flag-only calls)."""
+    args = iter(argv)
+    for arg in args:
+        if arg in _VALUE_OPTIONS:
+            next(args, None)
+        elif not arg.startswith("-"):
+            return arg
+    return None
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    command = command_of(argv)
+    local = command in LOCAL_ONLY or (command == "top" and "--watch" in argv)
+    if not local and "--no-daemon" not in argv and os.environ.get("DEVOPS_NO_DAEMON") != "1":
+        from devops_daemon import forward
+
+        status = forward(argv)
+        if status is not None:
+            sys.exit(status)
+
+    from day7_devops_cli import main as run_local
+
+    try:
+        sys.exit(run_local(argv))
+    except KeyboardInterrupt:
+        sys.exit("\n🛑 Interrupted by user.")
+
+
+if __name__ == "__main__":
+    main()
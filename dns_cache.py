@@ -0,0 +1,781 @@
+#!/usr/bin/env python3
+"""
+DNS Cache — shared resolver for every host-based check
+Author: Vitalie Procopan
+
+Goal:
+    Resolve each hostname once per cache lifetime instead of once per
+    ping, fetch or SSH call, with the same answers the system would give.
+
+Features:
+    1️⃣ Positive and negative cache; system answers for default_ttl, DNS answers for their record TTLs
+    2️⃣ Request coalescing: concurrent lookups of one name share a single query (threads and coroutines)
+    3️⃣ By default the system resolver (nsswitch, every resolv.conf nameserver, search / ndots)
+    4️⃣ Async UDP DNS client only for an explicit DEVOPS_NAMESERVER / --nameserver:
+       /etc/hosts first, short names (no dot) and truncated (TC) replies go to the system resolver
+    5️⃣ Hit / miss / coalesced / query counters
+    6️⃣ getaddrinfo drop-in (install()) for requests-based callers
+    💡 Self-test and benchmark against a local stub DNS server
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import struct
+import sys
+import threading
+import time
+from dataclasses import dataclass
+
+QTYPE_A, QTYPE_CNAME, QTYPE_SOA, QTYPE_AAAA = 1, 5, 6, 28
+RCODE_NXDOMAIN = 3
+DNS_PORT = 53
+MAX_PACKET = 4096
+
+
+class ResolveError(socket.gaierror):
+    """Lookup failed. A gaierror, so existing `except socket.gaierror` keeps working."""
+
+
+class TruncatedResponse(ValueError):
+    """The reply had TC set: the full answer needs TCP, which this client does not speak."""
+
+
+@dataclass
+class Answer:
+    addresses: list[str]
+    ttl: float                  # seconds the answer (or the NXDOMAIN) may be cached
+    error: str | None = None    # set for negative answers
+
+
+# ──────────────────────────────────────────────
+# Wire format (RFC 1035)
+# ──────────────────────────────────────────────
+def build_query(name: str, qtype: int, query_id: int) -> bytes:
+    """Recursive query for one name; IDNA-encoded, trailing dot optional."""
+    qname = b"".join(
+        bytes([len(label)]) + label
+        for label in name.rstrip(".").encode("idna").split(b".") if label
+    ) + b"\0"
+    return struct.pack(">HHHHHH", query_id, 0x0100, 1, 0, 0, 0) + qname + struct.pack(">HH", qtype, 1)
+
+
+def _skip_name(data: bytes, off: int) -> int:
+    while True:
+        length = data[off]
+        if length == 0:
+            return off + 1
+        if length & 0xC0 == 0xC0:  # compression pointer ends the name
+            return off + 2
+        off += length + 1
+
+
+def parse_response(data: bytes, qtype: int) -> tuple[int, Answer]:
+    """(query id, Answer). Raises ValueError on malformed or truncated packets."""
+    try:
+        query_id, flags, qdcount, ancount, nscount, _ = struct.unpack_from(">HHHHHH", data)
+        if not flags & 0x8000:
+            raise ValueError("not a response")
+        if flags & 0x0200:
+            raise TruncatedResponse("truncated response (TC)")
+        rcode = flags & 0x000F
+        off = 12
+        for _ in range(qdcount):
+            off = _skip_name(data, off) + 4
+        addresses, ttls = [], []
+        for _ in range(ancount):
+            off = _skip_name(data, off)
+            rtype, _, ttl, rdlength = struct.unpack_from(">HHIH", data, off)
+            off += 10
+            if rtype == qtype == QTYPE_A and rdlength == 4:
+                addresses.append(socket.inet_ntop(socket.AF_INET, data[off:off + 4]))
+            elif rtype == qtype == QTYPE_AAAA and rdlength == 16:
+                addresses.append(socket.inet_ntop(socket.AF_INET6, data[off:off + 16]))
+            if rtype in (qtype, QTYPE_CNAME):
+                ttls.append(ttl)   # a CNAME chain is only as fresh as its shortest link
+            off += rdlength
+        if addresses:
+            return query_id, Answer(addresses, min(ttls))
+        if rcode not in (0, RCODE_NXDOMAIN):
+            raise ValueError(f"server error (rcode {rcode})")
+        # NXDOMAIN or no record of this type: cache for the SOA minimum (RFC 2308)
+        negative_ttl = None
+        for _ in range(nscount):
+            off = _skip_name(data, off)
+            rtype, _, ttl, rdlength = struct.unpack_from(">HHIH", data, off)
+            off += 10
+            if rtype == QTYPE_SOA:
+                end = _skip_name(data, _skip_name(data, off))
+                minimum = struct.unpack_from(">I", data, end + 16)[0]
+                negative_ttl = min(ttl, minimum)
+            off += rdlength
+        error = "name does not exist" if rcode == RCODE_NXDOMAIN else "no address record"
+        return query_id, Answer([], negative_ttl, error)
+    except (struct.error, IndexError) as e:
+        raise ValueError(f"malformed response: {e}") from None
+
+
+def _query_id() -> int:
+    return int.from_bytes(os.urandom(2), "big")  # unpredictable ids: harder to spoof than a counter
+
+
+def _new_socket(nameserver):
+    family = socket.AF_INET6 if ":" in nameserver[0] else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_DGRAM)
+    sock.connect(nameserver)  # connected UDP: replies from anyone else are dropped by the kernel
+    return sock
+
+
+def query(name: str, qtype: int, nameserver, timeout=2.0, attempts=2) -> Answer:
+    """Blocking UDP query (used from worker threads)."""
+    for _ in range(attempts):
+        query_id = _query_id()
+        with _new_socket(nameserver) as sock:
+            sock.settimeout(timeout)
+            sock.send(build_query(name, qtype, query_id))
+            deadline = time.monotonic() + timeout
+            try:
+                while True:
+                    got_id, answer = parse_response(sock.recv(MAX_PACKET), qtype)
+                    if got_id == query_id:
+                        return answer
+                    sock.settimeout(max(deadline - time.monotonic(), 0.001))
+            except (TimeoutError, ConnectionRefusedError):
+                problem = f"no reply from {nameserver[0]}"
+            except TruncatedResponse:
+                raise  # partial answer: the caller asks the system resolver instead
+            except ValueError as e:  # SERVFAIL / REFUSED / garbage: retry, never cache
+                problem = f"{nameserver[0]}: {e}"
+    raise ResolveError(socket.EAI_AGAIN, f"{name}: {problem}")
+
+
+async def aquery(name: str, qtype: int, nameserver, timeout=2.0, attempts=2) -> Answer:
+    """Async UDP query: a non-blocking socket on the running loop, no threads."""
+    loop = asyncio.get_running_loop()
+    for _ in range(attempts):
+        query_id = _query_id()
+        with _new_socket(nameserver) as sock:
+            sock.setblocking(False)
+            await loop.sock_sendall(sock, build_query(name, qtype, query_id))
+            deadline = loop.time() + timeout
+            try:
+                while True:
+                    data = await asyncio.wait_for(loop.sock_recv(sock, MAX_PACKET), deadline - loop.time())
+                    got_id, answer = parse_response(data, qtype)
+                    if got_id == query_id:
+                        return answer
+            except (TimeoutError, ConnectionRefusedError):
+                problem = f"no reply from {nameserver[0]}"
+            except TruncatedResponse:
+                raise
+            except ValueError as e:  # SERVFAIL / REFUSED / garbage: retry, never cache
+                problem = f"{nameserver[0]}: {e}"
+    raise ResolveError(socket.EAI_AGAIN, f"{name}: {problem}")
+
+
+# ──────────────────────────────────────────────
+# Configuration
+# ──────────────────────────────────────────────
+def parse_nameserver(spec: str) -> tuple[str, int]:
+    """"1.1.1.1", "127.0.0.1:5353" or "[::1]:53" → (host, port)."""
+    if spec.startswith("["):
+        host, _, port = spec[1:].partition("]")
+        return host, int(port.lstrip(":") or DNS_PORT)
+    if spec.count(":") == 1:
+        host, port = spec.split(":")
+        return host, int(port)
+    return spec, DNS_PORT
+
+
+def system_nameserver() -> tuple[str, int] | None:
+    """DEVOPS_NAMESERVER, else None: the system resolver is used.
+
+    resolv.conf is deliberately not read: the UDP client would honour only
+    its first nameserver and neither search nor ndots, and nsswitch not at all.
+    """
+    spec = os.environ.get("DEVOPS_NAMESERVER")
+    return parse_nameserver(spec) if spec else None
+
+
+def read_hosts(path="/etc/hosts") -> dict[str, list[str]]:
+    hosts: dict[str, list[str]] = {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                fields = line.split("#", 1)[0].split()
+                for name in fields[1:]:
+                    hosts.setdefault(name.lower(), []).append(fields[0])
+    except OSError:
+        pass
+    return hosts
+
+
+def _is_literal(host: str) -> bool:
+    for family in (socket.AF_INET, socket.AF_INET6):
+        try:
+            socket.inet_pton(family, host)
+            return True
+        except OSError:
+            pass
+    return False
+
+
+def _qtypes(family) -> tuple[int, ...]:
+    if family == socket.AF_INET:
+        return (QTYPE_A,)
+    if family == socket.AF_INET6:
+        return (QTYPE_AAAA,)
+    return (QTYPE_A, QTYPE_AAAA)
+
+
+def _merge(answers: list[Answer]) -> Answer:
+    found = [a for a in answers if a.addresses]
+    if found:
+        return Answer([ip for a in found for ip in a.addresses], min(a.ttl for a in found))
+    ttls = [a.ttl for a in answers if a.ttl is not None]
+    return Answer([], min(ttls) if ttls else None, answers[0].error)
+
+
+# ──────────────────────────────────────────────
+# Resolver
+# ──────────────────────────────────────────────
+class _Waiter:
+    __slots__ = ("event", "answer")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.answer = None
+
+
+class Resolver:
+    """Caching, coalescing resolver shared by threads and coroutines.
+
+    resolve() / aresolve() return a list of address strings or raise
+    ResolveError. Without a nameserver (argument or DEVOPS_NAMESERVER)
+    every name goes to the system resolver and only the caching and
+    coalescing are ours. TTLs are clamped to [min_ttl, max_ttl]; negative answers
+    without an SOA are kept for negative_ttl, and system-resolver answers
+    (which carry no TTL) for default_ttl. Timeouts and server errors are
+    not cached.
+    """
+
+    def __init__(self, nameserver=None, timeout=2.0, attempts=2, min_ttl=1.0, max_ttl=3600.0,
+                 negative_ttl=30.0, default_ttl=60.0, hosts_file="/etc/hosts"):
+        self.nameserver = parse_nameserver(nameserver) if isinstance(nameserver, str) else nameserver
+        if self.nameserver is None:
+            self.nameserver = system_nameserver()
+        self.timeout, self.attempts = timeout, attempts
+        self.min_ttl, self.max_ttl = min_ttl, max_ttl
+        self.negative_ttl, self.default_ttl = negative_ttl, default_ttl
+        self.hosts = read_hosts(hosts_file) if hosts_file else {}
+        self._cache: dict[tuple, tuple[float, Answer]] = {}
+        self._lock = threading.Lock()
+        self._waiting: dict[tuple, _Waiter] = {}
+        self._pending: dict[tuple, asyncio.Future] = {}
+        self.hits = self.negative_hits = self.misses = self.coalesced = 0
+        self.queries = self.system_lookups = 0
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self.hits, "negative_hits": self.negative_hits, "misses": self.misses,
+            "coalesced": self.coalesced, "queries": self.queries,
+            "system_lookups": self.system_lookups, "cached": len(self._cache),
+        }
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    # ── cache ────────────────────────────────
+    def _cached(self, key) -> Answer | None:
+        """Cached answer or None; counts the hit/miss. Caller holds the lock."""
+        entry = self._cache.get(key)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                if entry[1].addresses:
+                    self.hits += 1
+                else:
+                    self.negative_hits += 1
+                return entry[1]
+            del self._cache[key]
+        return None
+
+    def _store(self, key, answer: Answer):
+        if answer.ttl is None:
+            ttl = self.default_ttl if answer.addresses else self.negative_ttl
+        else:
+            ttl = min(max(answer.ttl, self.min_ttl), self.max_ttl)
+        with self._lock:
+            self._cache[key] = (time.monotonic() + ttl, answer)
+
+    @staticmethod
+    def _result(name, answer: Answer) -> list[str]:
+        if not answer.addresses:
+            raise ResolveError(socket.EAI_NONAME, f"{name}: {answer.error}")
+        return list(answer.addresses)
+
+    def _source(self, name) -> str:
+        if self.nameserver is None:
+            return "system"  # nsswitch reads /etc/hosts itself, in its configured order
+        if name in self.hosts:
+            return "hosts"
+        if "." not in name.rstrip("."):
+            return "system"
+        return "dns"
+
+    def _from_hosts(self, name, family) -> Answer:
+        want = {socket.AF_INET: False, socket.AF_INET6: True}.get(family)
+        found = [ip for ip in self.hosts[name] if want is None or (":" in ip) == want]
+        return Answer(found, None, None if found else "no address record")
+
+    @staticmethod
+    def _from_system(infos) -> Answer:
+        return Answer(list(dict.fromkeys(info[4][0] for info in infos)), None)
+
+    # ── blocking ─────────────────────────────
+    def resolve(self, host: str, family=socket.AF_INET) -> list[str]:
+        """Addresses for host (blocking; safe from many threads)."""
+        if _is_literal(host):
+            return [host]
+        name = host.lower().rstrip(".")
+        key = (name, family)
+        with self._lock:
+            answer = self._cached(key)
+            if answer is None:
+                waiter = self._waiting.get(key)
+                leader = waiter is None
+                if leader:
+                    waiter = self._waiting[key] = _Waiter()
+                    self.misses += 1
+                else:
+                    self.coalesced += 1
+        if answer is not None:
+            return self._result(host, answer)
+        if not leader:
+            waiter.event.wait()
+            if waiter.answer is None:  # the leader failed; try on our own
+                return self.resolve(host, family)
+            return self._result(host, waiter.answer)
+        try:
+            answer = waiter.answer = self._lookup(name, family)
+            self._store(key, answer)
+        finally:
+            with self._lock:
+                del self._waiting[key]
+            waiter.event.set()
+        return self._result(host, answer)
+
+    def _lookup(self, name, family) -> Answer:
+        source = self._source(name)
+        if source == "hosts":
+            return self._from_hosts(name, family)
+        if source == "system":
+            return self._system(name, family)
+        answers = []
+        try:
+            for qtype in _qtypes(family):
+                self.queries += 1
+                answers.append(query(name, qtype, self.nameserver, self.timeout, self.attempts))
+        except TruncatedResponse:
+            return self._system(name, family)
+        return _merge(answers)
+
+    def _system(self, name, family) -> Answer:
+        self.system_lookups += 1
+        try:
+            # not socket.getaddrinfo: after install() that is resolve() again
+            return self._from_system(_system_getaddrinfo(name, None, family, socket.SOCK_STREAM))
+        except socket.gaierror as e:
+            return self._system_error(e)
+
+    @staticmethod
+    def _system_error(e: socket.gaierror) -> Answer:
+        if e.errno in (socket.EAI_NONAME, getattr(socket, "EAI_NODATA", None)):
+            return Answer([], None, e.strerror)
+        raise e
+
+    def resolve_one(self, host: str, family=socket.AF_INET) -> str:
+        return self.resolve(host, family)[0]
+
+    # ── async ────────────────────────────────
+    async def aresolve(self, host: str, family=socket.AF_INET) -> list[str]:
+        """Addresses for host without blocking the loop (UDP queries need no thread)."""
+        if _is_literal(host):
+            return [host]
+        name = host.lower().rstrip(".")
+        key = (name, family)
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            answer = self._cached(key)
+            if answer is None:
+                future = self._pending.get(key)
+                if future is not None and future.get_loop() is not loop:
+                    future = None  # in flight on another thread's loop: can't await it here
+                if future is not None:
+                    self.coalesced += 1
+                else:
+                    self.misses += 1
+        if answer is not None:
+            return self._result(host, answer)
+        if future is not None:
+            return self._result(host, await asyncio.shield(future))
+        future = self._pending[key] = loop.create_future()
+        try:
+            answer = await self._alookup(name, family)
+            self._store(key, answer)
+            future.set_result(answer)
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # retrieved: no "never retrieved" warning without waiters
+            raise
+        finally:
+            if self._pending.get(key) is future:
+                del self._pending[key]
+        return self._result(host, answer)
+
+    async def _alookup(self, name, family) -> Answer:
+        source = self._source(name)
+        if source == "hosts":
+            return self._from_hosts(name, family)
+        if source == "system":
+            return await self._asystem(name, family)
+        qtypes = _qtypes(family)
+        self.queries += len(qtypes)
+        try:
+            answers = await asyncio.gather(*(
+                aquery(name, qtype, self.nameserver, self.timeout, self.attempts) for qtype in qtypes
+            ))
+        except TruncatedResponse:
+            return await self._asystem(name, family)
+        return _merge(list(answers))
+
+    async def _asystem(self, name, family) -> Answer:
+        self.system_lookups += 1
+        loop = asyncio.get_running_loop()
+        try:
+            # loop.getaddrinfo calls the (possibly installed) socket.getaddrinfo
+            infos = await loop.run_in_executor(None, _system_getaddrinfo, name, None, family, socket.SOCK_STREAM)
+        except socket.gaierror as e:
+            return self._system_error(e)
+        return self._from_system(infos)
+
+    async def aresolve_one(self, host: str, family=socket.AF_INET) -> str:
+        return (await self.aresolve(host, family))[0]
+
+    # ── getaddrinfo drop-in ──────────────────
+    def getaddrinfo(self, host, port, family=0, type=0, proto=0, flags=0):
+        """socket.getaddrinfo with names answered from the cache."""
+        if (not isinstance(host, str) or _is_literal(host) or flags & socket.AI_NUMERICHOST
+                or family not in (0, socket.AF_INET, socket.AF_INET6)):
+            return _system_getaddrinfo(host, port, family, type, proto, flags)
+        infos = []
+        for ip in self.resolve(host, family or socket.AF_UNSPEC):
+            infos.extend(_system_getaddrinfo(ip, port, family, type, proto, flags | socket.AI_NUMERICHOST))
+        return infos
+
+
+_system_getaddrinfo = socket.getaddrinfo
+_DEFAULT: Resolver | None = None
+_DEFAULT_SPEC: str | None = None
+_DEFAULT_LOCK = threading.Lock()
+
+
+def default_resolver() -> Resolver:
+    """Process-wide resolver shared by all checks.
+
+    Rebuilt when DEVOPS_NAMESERVER changes, e.g. between requests served
+    by the devops-tool daemon with different client environments.
+    """
+    global _DEFAULT, _DEFAULT_SPEC
+    spec = os.environ.get("DEVOPS_NAMESERVER")
+    if _DEFAULT is None or spec != _DEFAULT_SPEC:
+        with _DEFAULT_LOCK:
+            if _DEFAULT is None or spec != _DEFAULT_SPEC:
+                _DEFAULT, _DEFAULT_SPEC = Resolver(), spec
+    return _DEFAULT
+
+
+def create_connection(host, port, timeout=None, resolver=None) -> socket.socket:
+    """socket.create_connection with the name answered from the cache."""
+    resolver = resolver or default_resolver()
+    error = None
+    for address in resolver.resolve(host, socket.AF_UNSPEC):
+        try:
+            return socket.create_connection((address, port), timeout)
+        except OSError as e:
+            error = e
+    raise error
+
+
+def _default_getaddrinfo(host, port, family=0, type=0, proto=0, flags=0):
+    return default_resolver().getaddrinfo(host, port, family, type, proto, flags)
+
+
+def install(resolver: Resolver | None = None):
+    """Route socket.getaddrinfo (and so requests/urllib3) through the cache.
+
+    Without a resolver the process-wide default_resolver() is looked up on
+    each call, so one install() follows DEVOPS_NAMESERVER changes; calling
+    it again is a no-op.
+    """
+    target = resolver.getaddrinfo if resolver is not None else _default_getaddrinfo
+    if socket.getaddrinfo != target:
+        socket.getaddrinfo = target
+
+
+def uninstall():
+    socket.getaddrinfo = _system_getaddrinfo
+
+
+# ──────────────────────────────────────────────
+# Stub DNS server (self-test / benchmark)
+# ──────────────────────────────────────────────
+class StubDNS:
+    """UDP DNS server on 127.0.0.1 answering A/AAAA from a dict.
+
+    records: name → (ttl, [addresses]). Unknown names get NXDOMAIN with
+    an SOA whose minimum is `negative_ttl`. `delay` holds each reply back
+    so concurrent lookups overlap; `queries` counts requests received.
+    """
+
+    def __init__(self, records, negative_ttl=5, delay=0.0):
+        self.records = {k.lower(): v for k, v in records.items()}
+        self.negative_ttl, self.delay = negative_ttl, delay
+        self.truncate: set[str] = set()  # names answered with TC set
+        self.queries = 0
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(("127.0.0.1", 0))
+        self.address = self.sock.getsockname()
+        self._stop = False
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop = True
+        self.sock.close()
+
+    def _serve(self):
+        while not self._stop:
+            try:
+                data, peer = self.sock.recvfrom(MAX_PACKET)
+            except OSError:
+                return
+            self.queries += 1
+            if self.delay:
+                threading.Timer(self.delay, self._reply, (data, peer)).start()
+            else:
+                self._reply(data, peer)
+
+    def _reply(self, data, peer):
+        query_id = struct.unpack_from(">H", data)[0]
+        end = _skip_name(data, 12)
+        labels, off = [], 12
+        while data[off]:
+            labels.append(data[off + 1:off + 1 + data[off]].decode())
+            off += data[off] + 1
+        qtype = struct.unpack_from(">H", data, end)[0]
+        question = data[12:end + 4]
+        record = self.records.get(".".join(labels).lower())
+        answers = b""
+        if record is not None:
+            ttl, addresses = record
+            for ip in addresses:
+                family = socket.AF_INET6 if ":" in ip else socket.AF_INET
+                if (family == socket.AF_INET6) != (qtype == QTYPE_AAAA):
+                    continue
+                rdata = socket.inet_pton(family, ip)
+                answers += b"\xc0\x0c" + struct.pack(">HHIH", qtype, 1, ttl, len(rdata)) + rdata
+        count = answers.count(b"\xc0\x0c")
+        authority = b""
+        if not count:
+            soa = b"\x02ns\0\x05admin\0" + struct.pack(">IIIII", 1, 3600, 600, 86400, self.negative_ttl)
+            authority = b"\xc0\x0c" + struct.pack(">HHIH", QTYPE_SOA, 1, 3600, len(soa)) + soa
+        rcode = 0 if record is not None else RCODE_NXDOMAIN
+        if ".".join(labels).lower() in self.truncate:
+            rcode |= 0x0200
+        header = struct.pack(">HHHHHH", query_id, 0x8180 | rcode, 1, count, 1 if authority else 0, 0)
+        try:
+            self.sock.sendto(header + question + answers + authority, peer)
+        except OSError:
+            pass
+
+
+def self_test() -> bool:
+    checks = []
+
+    def check(label, ok):
+        checks.append(ok)
+        print(f"{'✅' if ok else '❌'} {label}")
+
+    records = {"web.test": (300, ["10.0.0.1", "10.0.0.2", "fd00::1"]), "short.test": (1, ["10.0.0.9"])}
+    with StubDNS(records, negative_ttl=5, delay=0.05) as stub:
+        r = Resolver(stub.address, timeout=1.0, hosts_file=None)
+        check("A records", r.resolve("web.test") == ["10.0.0.1", "10.0.0.2"])
+        check("AAAA records", r.resolve("web.test", socket.AF_INET6) == ["fd00::1"])
+        before = stub.queries
+        r.resolve("WEB.test.")
+        check("repeat lookup (any case, trailing dot) served from cache", stub.queries == before and r.hits == 1)
+        try:
+            r.resolve("missing.test")
+            check("NXDOMAIN raises ResolveError", False)
+        except ResolveError as e:
+            check("NXDOMAIN raises ResolveError (a gaierror)", isinstance(e, socket.gaierror))
+        before = stub.queries
+        try:
+            r.resolve("missing.test")
+        except socket.gaierror:
+            pass
+        check("negative answer cached", stub.queries == before and r.negative_hits == 1)
+        expires = r._cache[("missing.test", socket.AF_INET)][0] - time.monotonic()
+        check("negative TTL from SOA minimum (5 s)", 4 < expires <= 5)
+
+        r.resolve("short.test")
+        time.sleep(1.1)
+        before = stub.queries
+        r.resolve("short.test")
+        check("expired TTL re-queried", stub.queries == before + 1)
+
+        stub.queries = 0
+        threads = [threading.Thread(target=r.resolve, args=("coalesce.test",)) for _ in range(20)]
+        stub.records["coalesce.test"] = (60, ["10.0.1.1"])
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        check(f"20 threads, 1 query (coalesced {r.coalesced})", stub.queries == 1)
+
+        async def burst():
+            stub.records["async.test"] = (60, ["10.0.2.1"])
+            got = await asyncio.gather(*(r.aresolve("async.test") for _ in range(50)))
+            return got
+
+        stub.queries = 0
+        got = asyncio.run(burst())
+        check("50 coroutines, 1 query", stub.queries == 1 and all(g == ["10.0.2.1"] for g in got))
+
+        infos = r.getaddrinfo("web.test", 443, socket.AF_INET, socket.SOCK_STREAM)
+        check("getaddrinfo drop-in", [i[4] for i in infos] == [("10.0.0.1", 443), ("10.0.0.2", 443)])
+        check("literals bypass the cache", r.resolve("192.0.2.7") == ["192.0.2.7"])
+
+        stub.records["big.test"] = (300, ["10.0.3.1"])
+        stub.truncate.add("big.test")
+        before = r.system_lookups
+        try:
+            got = r.resolve("big.test")
+        except socket.gaierror:
+            got = None
+        check("TC reply → system resolver, partial answer not used",
+              got != ["10.0.3.1"] and r.system_lookups == before + 1)
+
+    dead = Resolver(("127.0.0.1", stub.address[1]), timeout=0.1, attempts=1, hosts_file=None)
+    try:
+        dead.resolve("web.test")
+        check("no server → EAI_AGAIN, not cached", False)
+    except ResolveError as e:
+        check("no server → EAI_AGAIN, not cached", e.errno == socket.EAI_AGAIN and not dead._cache)
+    hosts = Resolver(("127.0.0.1", 9), hosts_file=None)
+    hosts.hosts = {"db.internal": ["10.9.9.9"]}
+    check("/etc/hosts entries win", hosts.resolve("db.internal") == ["10.9.9.9"] and hosts.queries == 0)
+    install()
+    try:
+        # the system resolver must not re-enter the drop-in
+        system = Resolver(None, hosts_file=None)
+        for lookup in (lambda: system.resolve("localhost"), lambda: asyncio.run(system.aresolve("localhost")),
+                       lambda: socket.getaddrinfo("localhost", 80)):
+            worker = threading.Thread(target=lookup, daemon=True)
+            worker.start()
+            worker.join(5)
+            if worker.is_alive():
+                break
+        check("system lookups after install() do not re-enter it", not worker.is_alive())
+        check("system answers cached", system.system_lookups == 1 and system.hits >= 1)
+        install()
+        check("install() twice leaves one patch", socket.getaddrinfo is _default_getaddrinfo)
+    finally:
+        uninstall()
+    print(f"📊 {r.stats}")
+    passed = sum(checks)
+    print(f"\n{passed}/{len(checks)} checks passed")
+    return passed == len(checks)
+
+
+# ──────────────────────────────────────────────
+# Benchmark
+# ──────────────────────────────────────────────
+def benchmark(lookups=10_000, names=100):
+    records = {f"host{i}.bench": (300, [f"10.1.{i // 256}.{i % 256}"]) for i in range(names)}
+    hosts = list(records)
+    with StubDNS(records) as stub:
+        t0 = time.perf_counter()
+        for i in range(lookups // 10):
+            query(hosts[i % names], QTYPE_A, stub.address)
+        uncached = (time.perf_counter() - t0) / (lookups // 10)
+
+        r = Resolver(stub.address, hosts_file=None)
+        t0 = time.perf_counter()
+        for i in range(lookups):
+            r.resolve(hosts[i % names])
+        cached = (time.perf_counter() - t0) / lookups
+        sent = r.queries
+
+        async def burst():
+            r.clear()
+            return await asyncio.gather(*(r.aresolve(hosts[i % names]) for i in range(lookups)))
+
+        stub.queries = 0
+        t0 = time.perf_counter()
+        asyncio.run(burst())
+        concurrent = time.perf_counter() - t0
+    print(f"{lookups:,} lookups over {names} names (stub DNS on {stub.address[0]}:{stub.address[1]})")
+    print(f"uncached UDP query     : {uncached * 1e6:8.1f} µs/lookup")
+    print(f"Resolver (cached)      : {cached * 1e6:8.1f} µs/lookup ({uncached / cached:.0f}x), {sent} queries")
+    print(f"{lookups:,} concurrent aresolve: {concurrent * 1000:8.1f} ms, {stub.queries} queries (coalesced {r.coalesced})")
+
+
+# ──────────────────────────────────────────────
+# MAIN
+# ──────────────────────────────────────────────
+def main():
+    parser = argparse.ArgumentParser(description="Caching DNS resolver")
+    parser.add_argument("hosts", nargs="*", help="Names to resolve")
+    parser.add_argument("--nameserver", help="host[:port] to query over UDP (default: DEVOPS_NAMESERVER, "
+                                             "else the system resolver)")
+    parser.add_argument("-6", dest="ipv6", action="store_true", help="AAAA instead of A")
+    parser.add_argument("--timeout", type=float, default=2.0, help="Per-attempt timeout in seconds")
+    parser.add_argument("--self-test", action="store_true", help="Run checks against a local stub DNS server")
+    parser.add_argument("--bench", type=int, metavar="N", help="Benchmark N lookups against a stub server")
+    args = parser.parse_args()
+
+    if args.self_test:
+        sys.exit(0 if self_test() else 1)
+    if args.bench:
+        benchmark(args.bench)
+        return
+    if not args.hosts:
+        parser.error("give at least one host, --self-test or --bench")
+    resolver = Resolver(args.nameserver, timeout=args.timeout)
+    family = socket.AF_INET6 if args.ipv6 else socket.AF_INET
+
+    async def run():
+        return await asyncio.gather(*(resolver.aresolve(h, family) for h in args.hosts), return_exceptions=True)
+
+    failed = False
+    for host, result in zip(args.hosts, asyncio.run(run())):
+        if isinstance(result, Exception):
+            failed = True
+            print(f"❌ {host}: {result.strerror if isinstance(result, OSError) else result}")
+        else:
+            print(f"✅ {host}: {', '.join(result)}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        sys.exit("\n🛑 Interrupted by user.")
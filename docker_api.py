@@ -0,0 +1,484 @@
+#!/usr/bin/env python3
+"""
+Docker API — minimal Docker Engine client over the Unix socket
+Author: Vitalie Procopan
+
+Goal:
+    Ask dockerd directly instead of starting the `docker` CLI (a ~100 ms
+    Go binary) just to learn whether Docker is there and what it runs.
+
+Features:
+    1️⃣ HTTP/1.1 over one persistent AF_UNIX connection (keep-alive, chunked bodies)
+    2️⃣ /version, /info and the container list as structured data
+    3️⃣ Per-container CPU / memory stats
+    4️⃣ Streaming /events on a dedicated connection
+    💡 Self-test against a local Unix-socket stand-in that records requests
+"""
+
+import argparse
+import http.client
+import json
+import os
+import socket
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler
+from urllib.parse import quote, urlencode
+
+DEFAULT_SOCKET = "/var/run/docker.sock"
+USER_AGENT = "devops-tool-docker-api/1.0"
+
+
+class DockerUnavailable(OSError):
+    """Raised when the Docker socket cannot be reached."""
+
+
+class DockerAPIError(Exception):
+    """Non-2xx answer from the Engine API."""
+
+    def __init__(self, status, message):
+        super().__init__(f"{status}: {message}")
+        self.status = status
+        self.message = message
+
+
+def default_socket() -> str:
+    """Socket path from $DOCKER_HOST (unix:// only), else /var/run/docker.sock."""
+    host = os.environ.get("DOCKER_HOST", "")
+    if host.startswith("unix://"):
+        return host[len("unix://"):]
+    return DEFAULT_SOCKET
+
+
+# ──────────────────────────────────────────────
+# Result types
+# ──────────────────────────────────────────────
+@dataclass
+class Container:
+    id: str
+    name: str
+    image: str
+    state: str
+    status: str
+    cpu_pct: float | None = None
+    mem_bytes: int | None = None
+    mem_limit: int | None = None
+
+    @property
+    def mem_pct(self) -> float | None:
+        if self.mem_bytes is None or not self.mem_limit:
+            return None
+        return self.mem_bytes / self.mem_limit * 100.0
+
+    @classmethod
+    def from_api(cls, item: dict) -> "Container":
+        names = item.get("Names") or [""]
+        return cls(item["Id"], names[0].lstrip("/"), item.get("Image", ""),
+                   item.get("State", ""), item.get("Status", ""))
+
+
+def parse_stats(stats: dict) -> tuple[float | None, int | None, int | None]:
+    """(cpu %, memory bytes, memory limit) from a /containers/{id}/stats sample.
+
+    CPU % follows the docker CLI: container delta / system delta × CPUs.
+    Memory excludes the page cache, like `docker stats`.
+    """
+    cpu_pct = None
+    cpu, pre = stats.get("cpu_stats") or {}, stats.get("precpu_stats") or {}
+    try:
+        cpu_delta = cpu["cpu_usage"]["total_usage"] - pre["cpu_usage"]["total_usage"]
+        system_delta = cpu["system_cpu_usage"] - pre["system_cpu_usage"]
+        cpus = cpu.get("online_cpus") or len(cpu["cpu_usage"].get("percpu_usage") or [1])
+        if system_delta > 0 and cpu_delta >= 0:
+            cpu_pct = cpu_delta / system_delta * cpus * 100.0
+    except KeyError:
+        pass
+    mem = stats.get("memory_stats") or {}
+    usage = mem.get("usage")
+    if usage is not None:
+        detail = mem.get("stats") or {}
+        usage -= detail.get("inactive_file", detail.get("total_inactive_file", detail.get("cache", 0)))
+    return cpu_pct, usage, mem.get("limit")
+
+
+# ──────────────────────────────────────────────
+# Transport
+# ──────────────────────────────────────────────
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """http.client over AF_UNIX; reconnects transparently after the daemon closes it."""
+
+    def __init__(self, socket_path, timeout=5.0):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except OSError as e:
+            sock.close()
+            raise DockerUnavailable(f"{self.socket_path}: {e.strerror or e}") from e
+        self.sock = sock
+
+
+# ──────────────────────────────────────────────
+# Client
+# ──────────────────────────────────────────────
+class DockerClient:
+    """Engine API client keeping one keep-alive connection to dockerd.
+
+    Not thread-safe: use one client per thread (containers(stats=True)
+    does that internally). Use as a context manager to close the socket.
+
+        with DockerClient() as docker:
+            print(docker.version()["Version"])
+    """
+
+    def __init__(self, socket_path=None, timeout=5.0, api_version=None):
+        self.socket_path = socket_path or default_socket()
+        self.timeout = timeout
+        self.prefix = f"/v{api_version}" if api_version else ""
+        self._conn = None
+        self.requests = 0
+        self.connections_opened = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _connection(self) -> UnixHTTPConnection:
+        if self._conn is None:
+            self._conn = UnixHTTPConnection(self.socket_path, self.timeout)
+        if self._conn.sock is None:
+            self._conn.connect()
+            self.connections_opened += 1
+        return self._conn
+
+    def _url(self, path, params=None) -> str:
+        query = {k: v for k, v in (params or {}).items() if v is not None}
+        return self.prefix + path + (f"?{urlencode(query)}" if query else "")
+
+    def request(self, method, path, params=None):
+        """Send one request and return the decoded JSON body (or text)."""
+        url = self._url(path, params)
+        headers = {"User-Agent": USER_AGENT, "Accept": "application/json"}
+        for attempt in range(2):
+            conn = self._connection()
+            try:
+                conn.request(method, url, headers=headers)
+                resp = conn.getresponse()
+                body = resp.read()
+                break
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                # The daemon may drop idle keep-alive connections; retry once
+                self.close()
+                if attempt:
+                    raise
+        self.requests += 1
+        if resp.will_close:
+            self.close()
+        text = body.decode("utf-8", errors="replace")
+        is_json = resp.getheader("Content-Type", "").startswith("application/json")
+        data = json.loads(text) if is_json and text else text
+        if resp.status >= 300:
+            message = data.get("message", text) if isinstance(data, dict) else text
+            raise DockerAPIError(resp.status, message.strip())
+        return data
+
+    # ── endpoints ───────────────────────────────
+    def ping(self) -> bool:
+        try:
+            return self.request("GET", "/_ping") == "OK"
+        except (DockerUnavailable, DockerAPIError, OSError):
+            return False
+
+    def version(self) -> dict:
+        return self.request("GET", "/version")
+
+    def info(self) -> dict:
+        return self.request("GET", "/info")
+
+    def stats(self, container_id, one_shot=False) -> dict:
+        """One stats sample. one_shot skips the daemon's second sample (no CPU %)."""
+        return self.request("GET", f"/containers/{quote(container_id)}/stats",
+                            {"stream": "false", "one-shot": "true" if one_shot else None})
+
+    def containers(self, all=False, stats=False, workers=8) -> list[Container]:
+        """List containers; with stats, fetch a sample per running container in parallel."""
+        items = [Container.from_api(c) for c in
+                 self.request("GET", "/containers/json", {"all": "true" if all else None})]
+        running = [c for c in items if c.state == "running"]
+        if stats and running:
+            local = threading.local()
+            clients = []
+
+            def sample(container):
+                client = getattr(local, "client", None)
+                if client is None:
+                    client = local.client = DockerClient(self.socket_path, self.timeout)
+                    clients.append(client)
+                try:
+                    s = client.stats(container.id)
+                except DockerAPIError:
+                    return  # container exited meanwhile
+                container.cpu_pct, container.mem_bytes, container.mem_limit = parse_stats(s)
+
+            try:
+                with ThreadPoolExecutor(min(workers, len(running))) as pool:
+                    list(pool.map(sample, running))
+            finally:
+                for client in clients:
+                    client.close()
+        return items
+
+    def events(self, since=None, until=None, filters=None):
+        """Yield Engine events as dicts until the daemon ends the stream.
+
+        Uses its own connection (the stream occupies it) with no read
+        timeout unless `until` is set.
+        """
+        params = {"since": since, "until": until,
+                  "filters": json.dumps(filters) if filters else None}
+        conn = UnixHTTPConnection(self.socket_path, timeout=self.timeout if until else None)
+        try:
+            conn.request("GET", self._url("/events", params), headers={"User-Agent": USER_AGENT})
+            resp = conn.getresponse()
+            if resp.status >= 300:
+                raise DockerAPIError(resp.status, resp.read().decode(errors="replace").strip())
+            while True:
+                line = resp.readline()
+                if not line:
+                    return
+                if line.strip():
+                    yield json.loads(line)
+        finally:
+            conn.close()
+
+
+def engine_summary(socket_path=None, timeout=2.0) -> dict | None:
+    """Engine version, container counts and storage driver, or None without a daemon."""
+    try:
+        with DockerClient(socket_path, timeout) as docker:
+            return summarize(docker.version(), docker.info())
+    except (DockerUnavailable, DockerAPIError, OSError, ValueError):
+        return None
+
+
+def summarize(version: dict, info: dict) -> dict:
+    return {
+        "version": version.get("Version"),
+        "api_version": version.get("ApiVersion"),
+        "os": f"{version.get('Os')}/{version.get('Arch')}",
+        "containers": info.get("Containers", 0),
+        "running": info.get("ContainersRunning", 0),
+        "images": info.get("Images", 0),
+        "storage_driver": info.get("Driver"),
+    }
+
+
+# ──────────────────────────────────────────────
+# 💡 Stand-in daemon and self-test
+# ──────────────────────────────────────────────
+class _StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body, chunked=False):
+        data = json.dumps(body).encode() if not isinstance(body, bytes) else body
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json" if not isinstance(body, bytes) else "text/plain")
+        if chunked:
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for i in range(0, len(data), 7):
+                part = data[i:i + 7]
+                self.wfile.write(f"{len(part):x}\r\n".encode() + part + b"\r\n")
+            self.wfile.write(b"0\r\n\r\n")
+        else:
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests.append((self.command, self.path))
+        path = self.path.split("?")[0]
+        if path == "/_ping":
+            self._send(200, b"OK")
+        elif path == "/version":
+            self._send(200, {"Version": "27.0.0-standin", "ApiVersion": "1.46", "Os": "linux", "Arch": "amd64"})
+        elif path == "/info":
+            self._send(200, {"Containers": 2, "ContainersRunning": 1, "Images": 5, "Driver": "overlay2"},
+                       chunked=True)
+        elif path == "/containers/json":
+            items = [{"Id": "a1", "Names": ["/web"], "Image": "nginx", "State": "running", "Status": "Up 1h"}]
+            if "all=true" in self.path:
+                items.append({"Id": "b2", "Names": ["/job"], "Image": "busybox", "State": "exited",
+                              "Status": "Exited (0)"})
+            self._send(200, items)
+        elif path == "/containers/a1/stats":
+            self._send(200, {
+                "cpu_stats": {"cpu_usage": {"total_usage": 3_000_000}, "system_cpu_usage": 20_000_000,
+                              "online_cpus": 4},
+                "precpu_stats": {"cpu_usage": {"total_usage": 1_000_000}, "system_cpu_usage": 10_000_000},
+                "memory_stats": {"usage": 150 << 20, "limit": 1 << 30, "stats": {"inactive_file": 50 << 20}},
+            })
+        elif path == "/events":
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for i in range(3):
+                line = json.dumps({"Type": "container", "Action": "start", "id": f"c{i}"}).encode() + b"\n"
+                self.wfile.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+                self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+        else:
+            self._send(404, {"message": f"page not found: {path}"})
+
+
+class StandInDockerd(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Fake dockerd on a Unix socket; records (method, path) of every request."""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path):
+        super().__init__(socket_path, _StandInHandler)
+        self.lock = threading.Lock()
+        self.requests = []
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+        os.unlink(self.server_address)
+
+
+def self_test() -> bool:
+    tmp = tempfile.mkdtemp(prefix="docker-api-")
+    path = os.path.join(tmp, "docker.sock")
+    checks = []
+
+    def check(label, ok):
+        checks.append(ok)
+        print(f"{'✅' if ok else '❌'} {label}")
+
+    try:
+        with StandInDockerd(path) as server, DockerClient(path) as docker:
+            check("ping", docker.ping())
+            check("version", docker.version()["Version"] == "27.0.0-standin")
+            check("info (chunked body)", docker.info()["ContainersRunning"] == 1)
+            items = docker.containers(all=True, stats=True)
+            web = items[0]
+            check("container list", [c.name for c in items] == ["web", "job"])
+            check("stats: cpu 80% on 4 CPUs", web.cpu_pct is not None and abs(web.cpu_pct - 80.0) < 1e-9)
+            check("stats: memory without page cache", web.mem_bytes == 100 << 20)
+            check("exited container has no stats", items[1].cpu_pct is None)
+            try:
+                docker.request("GET", "/nope")
+                check("404 raises DockerAPIError", False)
+            except DockerAPIError as e:
+                check("404 raises DockerAPIError", e.status == 404 and "not found" in e.message)
+            check("event stream", [e["id"] for e in docker.events()] == ["c0", "c1", "c2"])
+            check("keep-alive: one connection for 5 requests", docker.connections_opened == 1)
+            recorded = [p for _, p in server.requests]
+            check("stand-in recorded requests", recorded[:3] == ["/_ping", "/version", "/info"]
+                  and "/containers/json?all=true" in recorded and "/containers/a1/stats?stream=false" in recorded)
+        check("missing socket raises DockerUnavailable", _raises(DockerUnavailable, DockerClient(path).version))
+        check("engine_summary() is None without a daemon", engine_summary(path) is None)
+        t0 = time.perf_counter()
+        with StandInDockerd(path), DockerClient(path) as docker:
+            for _ in range(1000):
+                docker.version()
+        print(f"💡 1000 × /version over one connection: {(time.perf_counter() - t0) * 1000:.0f} ms")
+    finally:
+        if os.path.exists(path):
+            os.unlink(path)
+        os.rmdir(tmp)
+    return all(checks)
+
+
+def _raises(exc_type, fn) -> bool:
+    try:
+        fn()
+    except exc_type:
+        return True
+    return False
+
+
+# ──────────────────────────────────────────────
+# MAIN
+# ──────────────────────────────────────────────
+def _fmt_bytes(n):
+    if n is None:
+        return "-"
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if n < 1024:
+            return f"{n:.0f} {unit}"
+        n /= 1024
+    return f"{n:.1f} TiB"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query dockerd over its Unix socket")
+    parser.add_argument("--socket", help=f"Socket path (default: $DOCKER_HOST or {DEFAULT_SOCKET})")
+    parser.add_argument("--ps", action="store_true", help="List containers with CPU/memory stats")
+    parser.add_argument("--all", action="store_true", help="With --ps: include stopped containers")
+    parser.add_argument("--events", action="store_true", help="Stream events (Ctrl+C to stop)")
+    parser.add_argument("--json", action="store_true", help="Print raw JSON")
+    parser.add_argument("--self-test", action="store_true", help="Run against a local stand-in daemon")
+    args = parser.parse_args()
+
+    if args.self_test:
+        return 0 if self_test() else 1
+    try:
+        with DockerClient(args.socket) as docker:
+            if args.ps:
+                items = docker.containers(all=args.all, stats=True)
+                if args.json:
+                    print(json.dumps([c.__dict__ for c in items], indent=2))
+                for c in [] if args.json else items:
+                    cpu = f"{c.cpu_pct:5.1f}%" if c.cpu_pct is not None else "    -"
+                    print(f"{c.id[:12]}  {c.name:<24} {c.state:<8} cpu {cpu}  mem {_fmt_bytes(c.mem_bytes)}")
+            elif args.events:
+                for event in docker.events():
+                    print(json.dumps(event) if args.json else
+                          f"{event.get('Type')} {event.get('Action')} {event.get('id', '')[:12]}")
+            elif args.json:
+                print(json.dumps({"version": docker.version(), "info": docker.info()}, indent=2))
+            else:
+                for k, v in summarize(docker.version(), docker.info()).items():
+                    print(f"{k:<15}: {v}")
+    except DockerUnavailable as e:
+        print(f"❌ Docker daemon not reachable: {e}")
+        return 1
+    except DockerAPIError as e:
+        print(f"❌ Docker API error {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        sys.exit("\n🛑 Interrupted by user.")
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+du Scan — parallel subtree sizer
+Author: Vitalie Procopan
+
+Goal:
+    `du`-style sizing of very large trees: fast, hardlink-correct, and
+    with memory bounded by tree depth rather than tree size.
+
+Features:
+    1️⃣ os.scandir walk with cached DirEntry.stat results
+    2️⃣ One thread-pool task per top-level directory
+    3️⃣ Hardlinks counted once, deduplicated by (st_dev, st_ino)
+    4️⃣ Stays on one filesystem unless told otherwise
+    5️⃣ Top-N largest directories (by bytes, apparent size or inodes) via a bounded heap
+    💡 Benchmark on a generated tree of N files
+"""
+
+import argparse
+import heapq
+import os
+import shutil
+import stat
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+METRICS = ("bytes", "apparent", "inodes")
+
+
+@dataclass
+class DirTotals:
+    bytes: int = 0      # allocated on disk (st_blocks * 512)
+    apparent: int = 0   # sum of st_size
+    inodes: int = 0     # files + dirs + links counted
+
+    def add(self, other):
+        self.bytes += other.bytes
+        self.apparent += other.apparent
+        self.inodes += other.inodes
+
+
+@dataclass
+class ScanResult:
+    root: str
+    totals: DirTotals
+    top: list[tuple[int, str]] = field(default_factory=list)  # (metric value, path), largest first
+    metric: str = "bytes"
+    errors: int = 0
+    skipped_mounts: int = 0
+    elapsed: float = 0.0
+    error: str | None = None  # root itself unreadable (missing, permission denied)
+
+
+class _Seen:
+    """Shared (st_dev, st_ino) set; only consulted for st_nlink > 1."""
+
+    def __init__(self):
+        self._set = set()
+        self._lock = threading.Lock()
+
+    def first_time(self, key) -> bool:
+        with self._lock:
+            if key in self._set:
+                return False
+            self._set.add(key)
+            return True
+
+
+class _TopN:
+    """Bounded min-heap of (value, path)."""
+
+    def __init__(self, n):
+        self.n = n
+        self.heap = []
+
+    def push(self, value, path):
+        if self.n <= 0:
+            return
+        if len(self.heap) < self.n:
+            heapq.heappush(self.heap, (value, path))
+        elif value > self.heap[0][0]:
+            heapq.heapreplace(self.heap, (value, path))
+
+
+# ──────────────────────────────────────────────
+# Walker
+# ──────────────────────────────────────────────
+class _Walker:
+    def __init__(self, root_dev, one_filesystem, seen, top_n, metric):
+        self.root_dev = root_dev
+        self.one_filesystem = one_filesystem
+        self.seen = seen
+        self.top = _TopN(top_n)
+        self.metric = metric
+        self.errors = 0
+        self.skipped_mounts = 0
+
+    def _account(self, st, totals):
+        if st.st_nlink > 1 and not stat.S_ISDIR(st.st_mode):
+            if not self.seen.first_time((st.st_dev, st.st_ino)):
+                return
+        totals.bytes += st.st_blocks * 512
+        totals.apparent += st.st_size
+        totals.inodes += 1
+
+    def walk(self, path, st) -> DirTotals:
+        """Post-order walk of path; returns its cumulative totals.
+
+        Only the current branch is kept in memory: one frame (open
+        scandir iterator + running totals) per directory level.
+        """
+        top_totals = DirTotals()
+        self._account(st, top_totals)
+        try:
+            it = os.scandir(path)
+        except OSError:
+            self.errors += 1
+            return top_totals
+        stack = [(path, it, top_totals)]
+        while stack:
+            dir_path, it, totals = stack[-1]
+            descended = False
+            try:
+                for entry in it:
+                    try:
+                        est = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        self.errors += 1
+                        continue
+                    if stat.S_ISDIR(est.st_mode):
+                        if self.one_filesystem and est.st_dev != self.root_dev:
+                            self.skipped_mounts += 1
+                            continue
+                        child = DirTotals()
+                        self._account(est, child)
+                        try:
+                            child_it = os.scandir(entry.path)
+                        except OSError:
+                            self.errors += 1
+                            totals.add(child)
+                            continue
+                        stack.append((entry.path, child_it, child))
+                        descended = True
+                        break
+                    self._account(est, totals)
+            except OSError:
+                self.errors += 1
+            if descended:
+                continue
+            it.close()
+            stack.pop()
+            self.top.push(getattr(totals, self.metric), dir_path)
+            if stack:
+                stack[-1][2].add(totals)
+        return top_totals
+
+
+# ──────────────────────────────────────────────
+# Public API
+# ──────────────────────────────────────────────
+def scan_tree(root, workers=8, top_n=20, metric="bytes", one_filesystem=True) -> ScanResult:
+    """Size the tree under root, one thread-pool task per top-level directory."""
+    if metric not in METRICS:
+        raise ValueError(f"metric must be one of {METRICS}")
+    start = time.perf_counter()
+    root = os.path.abspath(root)
+    result = ScanResult(root, DirTotals(), metric=metric)
+    try:
+        root_st = os.lstat(root)
+    except OSError as e:
+        result.error = e.strerror or str(e)
+        result.errors = 1
+        result.elapsed = time.perf_counter() - start
+        return result
+    seen = _Seen()
+    main = _Walker(root_st.st_dev, one_filesystem, seen, top_n, metric)
+    main._account(root_st, result.totals)
+
+    subdirs = []
+    if stat.S_ISDIR(root_st.st_mode):  # a file (or symlink) root is just its own lstat
+        try:
+            with os.scandir(root) as it:
+                for entry in it:
+                    try:
+                        est = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        main.errors += 1
+                        continue
+                    if stat.S_ISDIR(est.st_mode):
+                        if one_filesystem and est.st_dev != root_st.st_dev:
+                            main.skipped_mounts += 1
+                        else:
+                            subdirs.append((entry.path, est))
+                    else:
+                        main._account(est, result.totals)
+        except OSError:  # unreadable root directory: counted like any unreadable entry
+            main.errors += 1
+
+    walkers = []
+
+    def run(item):
+        w = _Walker(root_st.st_dev, one_filesystem, seen, top_n, metric)
+        walkers.append(w)
+        return w.walk(*item)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for totals in executor.map(run, subdirs):
+            result.totals.add(totals)
+
+    main.top.push(getattr(result.totals, metric), root)
+    heaps = [main.top.heap] + [w.top.heap for w in walkers]
+    result.top = heapq.nlargest(top_n, (item for h in heaps for item in h))
+    result.errors = main.errors + sum(w.errors for w in walkers)
+    result.skipped_mounts = main.skipped_mounts + sum(w.skipped_mounts for w in walkers)
+    result.elapsed = time.perf_counter() - start
+    return result
+
+
+def human(n: float) -> str:
+    for unit in ("B", "KiB", "MiB", "GiB", "TiB"):
+        if abs(n) < 1024 or unit == "TiB":
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+
+
+def print_result(result: ScanResult):
+    if result.error:
+        print(f"\n❌ {result.root}: {result.error}")
+        return
+    t = result.totals
+    print(f"\n📦 {result.root}: {human(t.bytes)} on disk, {human(t.apparent)} apparent, "
+          f"{t.inodes:,} inodes ({result.elapsed:.2f}s)")
+    if result.errors or result.skipped_mounts:
+        print(f"   ⚠️  {result.errors} unreadable entries, {result.skipped_mounts} mount points skipped")
+    print(f"   Top {len(result.top)} directories by {result.metric}:")
+    for value, path in result.top:
+        shown = f"{value:,}" if result.metric == "inodes" else human(value)
+        print(f"   {shown:>12}  {path}")
+
+
+# ──────────────────────────────────────────────
+# 💡 Benchmark
+# ──────────────────────────────────────────────
+def make_tree(root, files, fanout=32, files_per_dir=100):
+    """Generate a tree with `files` small files (every 50th one hardlinked)."""
+    made = 0
+    d = 0
+    while made < files:
+        parent = os.path.join(root, f"top{d % fanout:02d}", f"mid{(d // fanout) % fanout:02d}", f"leaf{d}")
+        os.makedirs(parent, exist_ok=True)
+        for i in range(min(files_per_dir, files - made)):
+            path = os.path.join(parent, f"f{i}.dat")
+            if made % 50 == 49:
+                os.link(os.path.join(parent, "f0.dat"), path)
+            else:
+                with open(path, "wb") as f:
+                    f.write(b"x" * (i % 7 * 512))
+            made += 1
+        d += 1
+
+
+def walk_baseline(root):
+    """Single-threaded os.walk + lstat, like a naive du."""
+    total = 0
+    for dirpath, dirnames, filenames in os.walk(root):
+        for name in filenames:
+            total += os.lstat(os.path.join(dirpath, name)).st_blocks * 512
+    return total
+
+
+def benchmark(files=1_000_000, workers=8, directory=None):
+    tmp = tempfile.mkdtemp(prefix="du-bench-", dir=directory)
+    try:
+        t0 = time.perf_counter()
+        make_tree(tmp, files)
+        print(f"generated    : {files:,} files in {time.perf_counter() - t0:.1f}s under {tmp}")
+        t0 = time.perf_counter()
+        walk_baseline(tmp)
+        base = time.perf_counter() - t0
+        print(f"os.walk+lstat: {base:.2f}s ({files / base:,.0f} files/s, single thread)")
+        for w in (1, workers):
+            res = scan_tree(tmp, workers=w, top_n=10)
+            print(f"scan_tree x{w:<3}: {res.elapsed:.2f}s ({files / res.elapsed:,.0f} files/s), "
+                  f"{res.totals.inodes:,} inodes")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+# ──────────────────────────────────────────────
+# MAIN
+# ──────────────────────────────────────────────
+def main():
+    parser = argparse.ArgumentParser(description="Parallel du-style subtree sizer")
+    parser.add_argument("paths", nargs="*", default=["."], help="Roots to scan (default: .)")
+    parser.add_argument("--top", type=int, default=20, help="How many largest directories to show")
+    parser.add_argument("--workers", type=int, default=8, help="Thread pool size")
+    parser.add_argument("--by", choices=METRICS, default="bytes", help="Ranking metric")
+    parser.add_argument("--cross-mounts", action="store_true", help="Descend into other filesystems")
+    parser.add_argument("--bench", type=int, metavar="FILES", help="Benchmark on a generated tree")
+    args = parser.parse_args()
+
+    if args.bench:
+        benchmark(args.bench, args.workers)
+        return
+    for path in args.paths:
+        print_result(scan_tree(path, args.workers, args.top, args.by, not args.cross_mounts))
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        sys.exit("\n🛑 Interrupted by user.")
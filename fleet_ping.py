@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+"""
+Fleet Ping — asyncio ICMP Echo Engine
+Author: Vitalie Procopan
+
+Goal:
+    Sweep thousands of hosts from a single event loop and a single ICMP
+    socket instead of forking one `ping` process per host.
+
+Features:
+    1️⃣ Unprivileged datagram ICMP socket (raw socket when allowed)
+    2️⃣ Thousands of probes in flight, replies matched by id/seq
+    3️⃣ Structured per-host RTT / loss results
+    4️⃣ Subprocess `ping` fallback when no ICMP socket can be opened
+"""
+
+import argparse
+import asyncio
+import os
+import platform
+import re
+import socket
+import struct
+import sys
+import time
+from dataclasses import dataclass, field
+
+import dns_cache
+
+ICMP_ECHO_REPLY = 0
+ICMP_ECHO_REQUEST = 8
+PAYLOAD = b"fleet-ping-payload-0123456789abc"  # 32 bytes, like `ping -s 24`
+
+
+class IcmpUnavailable(OSError):
+    """Raised when neither a datagram nor a raw ICMP socket can be opened."""
+
+
+# ──────────────────────────────────────────────
+# Result type
+# ──────────────────────────────────────────────
+@dataclass
+class PingResult:
+    host: str
+    address: str | None = None
+    sent: int = 0
+    received: int = 0
+    rtts: list[float] = field(default_factory=list)  # milliseconds
+    error: str | None = None
+
+    @property
+    def loss(self) -> float:
+        """Packet loss as a fraction (0.0 — 1.0)."""
+        return 1.0 - self.received / self.sent if self.sent else 1.0
+
+    @property
+    def reachable(self) -> bool:
+        return self.received > 0
+
+    @property
+    def rtt_min(self) -> float | None:
+        return min(self.rtts) if self.rtts else None
+
+    @property
+    def rtt_avg(self) -> float | None:
+        return sum(self.rtts) / len(self.rtts) if self.rtts else None
+
+    @property
+    def rtt_max(self) -> float | None:
+        return max(self.rtts) if self.rtts else None
+
+    def as_dict(self) -> dict:
+        return {
+            "host": self.host,
+            "address": self.address,
+            "sent": self.sent,
+            "received": self.received,
+            "loss": round(self.loss, 4),
+            "rtt_min": self.rtt_min,
+            "rtt_avg": self.rtt_avg,
+            "rtt_max": self.rtt_max,
+            "error": self.error,
+        }
+
+
+# ──────────────────────────────────────────────
+# ICMP packet helpers
+# ──────────────────────────────────────────────
+def checksum(data: bytes) -> int:
+    """RFC 1071 internet checksum."""
+    if len(data) % 2:
+        data += b"\x00"
+    total = sum(struct.unpack(f"!{len(data) // 2}H", data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+
+def build_echo_request(ident: int, seq: int, payload: bytes = PAYLOAD) -> bytes:
+    header = struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, 0, ident, seq)
+    csum = checksum(header + payload)
+    return struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, csum, ident, seq) + payload
+
+
+def open_icmp_socket() -> tuple[socket.socket, str]:
+    """Open a non-blocking ICMP socket, preferring the unprivileged kind."""
+    errors = []
+    for kind, sock_type in (("dgram", socket.SOCK_DGRAM), ("raw", socket.SOCK_RAW)):
+        try:
+            sock = socket.socket(socket.AF_INET, sock_type, socket.IPPROTO_ICMP)
+        except OSError as e:
+            errors.append(f"{kind}: {e}")
+            continue
+        sock.setblocking(False)
+        # Large receive buffer so bursts of replies are not dropped
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 << 20)
+        except OSError:
+            pass
+        return sock, kind
+    raise IcmpUnavailable("; ".join(errors))
+
+
+async def resolve(host: str) -> str:
+    """Return an IPv4 address for host from the shared DNS cache (see dns_cache)."""
+    return await dns_cache.default_resolver().aresolve_one(host)
+
+
+# ──────────────────────────────────────────────
+# Async engine
+# ──────────────────────────────────────────────
+class FleetPinger:
+    """Send ICMP echo to many hosts concurrently over one socket.
+
+    Every in-flight probe gets a unique 16-bit sequence number, so the
+    number of probes in flight is capped below 65536.
+    """
+
+    def __init__(self, count=1, timeout=1.0, interval=0.0, concurrency=4096):
+        self.count = count
+        self.timeout = timeout
+        self.interval = interval
+        self.concurrency = min(concurrency, 65000)
+        self.kind = None
+        self._sock = None
+        self._ident = os.getpid() & 0xFFFF
+        self._seq = 0
+        self._pending: dict[int, tuple[str, asyncio.Future]] = {}
+
+    # ── socket lifecycle ────────────────────────
+    def _open(self, loop):
+        self._sock, self.kind = open_icmp_socket()
+        loop.add_reader(self._sock.fileno(), self._on_readable)
+
+    def _close(self, loop):
+        if self._sock is not None:
+            loop.remove_reader(self._sock.fileno())
+            self._sock.close()
+            self._sock = None
+
+    def _next_seq(self) -> int:
+        for _ in range(65536):
+            self._seq = (self._seq + 1) & 0xFFFF
+            if self._seq not in self._pending:
+                return self._seq
+        raise RuntimeError("no free ICMP sequence numbers")
+
+    def _on_readable(self):
+        """Drain every queued reply and resolve the matching probe."""
+        sock = self._sock
+        while True:
+            try:
+                data, (addr, _) = sock.recvfrom(2048)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                return
+            now = time.perf_counter()
+            if self.kind == "raw":
+                # Raw sockets deliver the IP header as well
+                data = data[(data[0] & 0x0F) * 4:]
+            if len(data) < 8:
+                continue
+            icmp_type, _, _, ident, seq = struct.unpack_from("!BBHHH", data)
+            if icmp_type != ICMP_ECHO_REPLY:
+                continue
+            # Datagram sockets let the kernel own the identifier
+            if self.kind == "raw" and ident != self._ident:
+                continue
+            entry = self._pending.get(seq)
+            if entry is None or entry[0] != addr:
+                continue
+            fut = entry[1]
+            if not fut.done():
+                fut.set_result(now)
+
+    # ── probing ─────────────────────────────────
+    async def _probe(self, loop, address: str) -> float | None:
+        seq = self._next_seq()
+        fut = loop.create_future()
+        self._pending[seq] = (address, fut)
+        try:
+            packet = build_echo_request(self._ident, seq)
+            start = time.perf_counter()
+            await loop.sock_sendto(self._sock, packet, (address, 0))
+            received = await asyncio.wait_for(fut, self.timeout)
+            return (received - start) * 1000.0
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            self._pending.pop(seq, None)
+
+    async def _ping_one(self, loop, sem, host: str) -> PingResult:
+        result = PingResult(host)
+        async with sem:
+            try:
+                result.address = await resolve(host)
+            except socket.gaierror as e:
+                result.error = f"resolve failed: {e}"
+                return result
+            for i in range(self.count):
+                if i and self.interval:
+                    await asyncio.sleep(self.interval)
+                result.sent += 1
+                try:
+                    rtt = await self._probe(loop, result.address)
+                except OSError as e:
+                    result.error = str(e)
+                    break
+                if rtt is not None:
+                    result.received += 1
+                    result.rtts.append(rtt)
+        return result
+
+    async def run(self, hosts, on_result=None) -> list[PingResult]:
+        """Ping every host; `on_result` is called as each host finishes."""
+        loop = asyncio.get_running_loop()
+        self._open(loop)
+        sem = asyncio.Semaphore(self.concurrency)
+        results = []
+        try:
+            tasks = [asyncio.ensure_future(self._ping_one(loop, sem, h)) for h in hosts]
+            for fut in asyncio.as_completed(tasks):
+                res = await fut
+                results.append(res)
+                if on_result:
+                    on_result(res)
+        finally:
+            self._close(loop)
+        return results
+
+
+# ──────────────────────────────────────────────
+# Subprocess fallback
+# ──────────────────────────────────────────────
+async def _subprocess_ping_one(sem, host, count, timeout) -> PingResult:
+    system = platform.system()
+    if system == "Windows":
+        cmd = ["ping", "-n", str(count), "-w", str(int(timeout * 1000)), host]
+    else:
+        cmd = ["ping", "-c", str(count), "-W", str(max(1, int(timeout))), host]
+    result = PingResult(host, sent=count)
+    async with sem:
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL
+            )
+            out, _ = await asyncio.wait_for(proc.communicate(), timeout * count + 5)
+        except FileNotFoundError:
+            result.error = "ping command not found"
+            return result
+        except asyncio.TimeoutError:
+            proc.kill()
+            result.error = "timeout"
+            return result
+    text = out.decode(errors="replace")
+    result.rtts = [float(m) for m in re.findall(r"time[=<]([\d.]+)\s*ms", text)]
+    result.received = len(result.rtts)
+    return result
+
+
+async def subprocess_ping_many(hosts, count=1, timeout=1.0, concurrency=64, on_result=None):
+    """Fallback path: one `ping` process per host, bounded by `concurrency`."""
+    sem = asyncio.Semaphore(concurrency)
+    tasks = [asyncio.ensure_future(_subprocess_ping_one(sem, h, count, timeout)) for h in hosts]
+    results = []
+    for fut in asyncio.as_completed(tasks):
+        res = await fut
+        results.append(res)
+        if on_result:
+            on_result(res)
+    return results
+
+
+async def ping_many(hosts, count=1, timeout=1.0, interval=0.0, concurrency=4096, on_result=None):
+    """ICMP sweep via FleetPinger, falling back to subprocess `ping`."""
+    pinger = FleetPinger(count=count, timeout=timeout, interval=interval, concurrency=concurrency)
+    try:
+        return await pinger.run(hosts, on_result=on_result)
+    except IcmpUnavailable:
+        return await subprocess_ping_many(hosts, count, timeout, on_result=on_result)
+
+
+def ping_fleet(hosts, count=1, timeout=1.0, interval=0.0, concurrency=4096, on_result=None):
+    """Synchronous wrapper around `ping_many`."""
+    return asyncio.run(ping_many(hosts, count, timeout, interval, concurrency, on_result))
+
+
+def format_result(res: PingResult) -> str:
+    if res.error and not res.received:
+        return f"❌ {res.host} error: {res.error}"
+    if res.reachable:
+        return f"✅ {res.host} reachable ({res.rtt_avg:.3f} ms, loss {res.loss:.0%})"
+    return f"❌ {res.host} unreachable"
+
+
+# ──────────────────────────────────────────────
+# Self-test (loopback only, no network needed)
+# ──────────────────────────────────────────────
+UNROUTABLE = "240.0.0.1"  # reserved class E (RFC 1112), never routed
+
+
+def self_test() -> bool:
+    checks = []
+
+    def check(name, ok):
+        checks.append(ok)
+        print(f"{'✅' if ok else '❌'} {name}")
+
+    packet = build_echo_request(0x1234, 7)
+    check("echo request checksum verifies", checksum(packet) == 0)
+    check("echo request header", packet[:1] == bytes([ICMP_ECHO_REQUEST]) and packet[8:] == PAYLOAD)
+
+    hosts = ["127.0.0.1", "127.0.0.2", "127.1.2.3", UNROUTABLE]
+    try:
+        results = {r.host: r for r in asyncio.run(FleetPinger(count=2, timeout=0.5).run(hosts))}
+    except IcmpUnavailable as e:
+        print(f"⚠️ no ICMP socket ({e}); checking the subprocess fallback instead")
+        results = {r.host: r for r in asyncio.run(subprocess_ping_many(hosts, count=2, timeout=1.0))}
+    for host in hosts[:3]:
+        res = results[host]
+        check(f"{host} → reachable, 2/2 replies", res.received == 2 and res.rtt_min is not None)
+    res = results[UNROUTABLE]
+    check(f"{UNROUTABLE} → unreachable, 100% loss", not res.reachable and res.loss == 1.0)
+    check("one result per host", sorted(results) == sorted(hosts))
+    print(f"\n{sum(checks)}/{len(checks)} checks passed")
+    return all(checks)
+
+
+# ──────────────────────────────────────────────
+# MAIN
+# ──────────────────────────────────────────────
+def main():
+    parser = argparse.ArgumentParser(description="Asyncio ICMP fleet ping")
+    parser.add_argument("hosts", nargs="*", help="Hosts to ping")
+    parser.add_argument("--file", help="Read hosts from a file (one per line)")
+    parser.add_argument("--count", type=int, default=1, help="Echo requests per host")
+    parser.add_argument("--timeout", type=float, default=1.0, help="Per-probe timeout in seconds")
+    parser.add_argument("--concurrency", type=int, default=4096, help="Hosts probed at once")
+    parser.add_argument("--self-test", action="store_true", help="Ping 127.0.0.0/8 and an unroutable address")
+    args = parser.parse_args()
+
+    if args.self_test:
+        sys.exit(0 if self_test() else 1)
+
+    hosts = list(args.hosts)
+    if args.file:
+        with open(args.file) as f:
+            hosts += [line.strip() for line in f if line.strip()]
+    if not hosts:
+        parser.error("no hosts given")
+
+    start = time.perf_counter()
+    results = ping_fleet(hosts, args.count, args.timeout, concurrency=args.concurrency,
+                         on_result=lambda r: print(format_result(r)))
+    elapsed = time.perf_counter() - start
+    up = sum(1 for r in results if r.reachable)
+    print(f"\n📊 {up}/{len(results)} hosts reachable in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        sys.exit("\n🛑 Interrupted by user.")
@@ -0,0 +1,427 @@
+#!/usr/bin/env python3
+"""
+HTTP Checker — pooled keep-alive URL checks
+Author: Vitalie Procopan
+
+Goal:
+    Check thousands of URLs without paying a fresh TCP+TLS handshake
+    per request.
+
+Features:
+    1️⃣ Shared per-host pool of keep-alive HTTP/1.1 connections
+    2️⃣ Global and per-host concurrency limits
+    3️⃣ HEAD first, GET fallback when HEAD is not allowed
+    4️⃣ Redirects followed (up to --max-redirects hops), like requests.get
+    5️⃣ Streaming mode that never downloads response bodies
+    6️⃣ Results stream out as each check finishes
+    💡 Benchmark against a local http.server stand-in
+"""
+
+import argparse
+import asyncio
+import socket
+import ssl
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from urllib.parse import urljoin, urlsplit
+
+import dns_cache
+
+USER_AGENT = "devops-tool-http-checker/1.0"
+HEAD_FALLBACK_STATUSES = {405, 501}
+REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+MAX_REDIRECTS = 30  # Same hop limit as requests
+MAX_DRAIN = 1 << 20  # Bodies larger than this are never drained for reuse
+
+
+# ──────────────────────────────────────────────
+# Result type
+# ──────────────────────────────────────────────
+@dataclass
+class CheckResult:
+    url: str
+    status: int | None = None
+    method: str = "HEAD"
+    elapsed_ms: float = 0.0
+    reused: bool = False
+    redirects: int = 0
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status is not None and self.status < 400
+
+    def __str__(self):
+        if self.error:
+            return f"{self.url:<50} → ❌ {self.error}"
+        return f"{self.url:<50} → {self.status}"
+
+
+class _Conn:
+    """One pooled connection (reader/writer pair)."""
+
+    __slots__ = ("reader", "writer", "used")
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.used = 0
+
+    def close(self):
+        self.writer.close()
+
+
+# ──────────────────────────────────────────────
+# Pool + engine
+# ──────────────────────────────────────────────
+class HttpChecker:
+    """Async URL checker with a shared per-host keep-alive pool.
+
+    Use as an async context manager so pooled connections get closed:
+
+        async with HttpChecker() as checker:
+            async for res in checker.iter_check(urls):
+                print(res)
+    """
+
+    def __init__(self, concurrency=256, per_host=8, timeout=5.0, head_first=True, stream=True,
+                 max_redirects=MAX_REDIRECTS):
+        self.timeout = timeout
+        self.max_redirects = max_redirects
+        self.head_first = head_first
+        self.stream = stream
+        self.per_host = per_host
+        self._global = asyncio.Semaphore(concurrency)
+        self._host_sems: dict[tuple, asyncio.Semaphore] = {}
+        self._idle: dict[tuple, list[_Conn]] = {}
+        self._ssl = ssl.create_default_context()
+        self.connections_opened = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        for conns in self._idle.values():
+            for conn in conns:
+                conn.close()
+        self._idle.clear()
+
+    # ── connection pool ─────────────────────────
+    async def _acquire(self, key) -> tuple[_Conn, bool]:
+        idle = self._idle.get(key)
+        while idle:
+            conn = idle.pop()
+            if not conn.reader.at_eof() and not conn.writer.is_closing():
+                return conn, True
+            conn.close()
+        scheme, host, port = key
+        address = await dns_cache.default_resolver().aresolve_one(host, socket.AF_UNSPEC)
+        reader, writer = await asyncio.open_connection(
+            address, port,
+            ssl=self._ssl if scheme == "https" else None,
+            server_hostname=host if scheme == "https" else None,
+        )
+        self.connections_opened += 1
+        return _Conn(reader, writer), False
+
+    def _release(self, key, conn: _Conn, keep: bool):
+        if keep:
+            self._idle.setdefault(key, []).append(conn)
+        else:
+            conn.close()
+
+    # ── single request ──────────────────────────
+    async def _request(self, key, method, target, host_header) -> tuple[int, bool, str | None]:
+        """Send one request; return (status, connection_was_reused, location)."""
+        for attempt in range(2):
+            conn, reused = await self._acquire(key)
+            try:
+                status, keep, location = await self._exchange(conn, method, target, host_header)
+            except (ConnectionError, asyncio.IncompleteReadError) as e:
+                conn.close()
+                # A pooled connection may have been closed by the server
+                # while idle; retry once on a fresh one.
+                if reused and attempt == 0:
+                    continue
+                raise ConnectionError(str(e) or e.__class__.__name__) from e
+            except BaseException:
+                conn.close()
+                raise
+            self._release(key, conn, keep)
+            return status, reused, location
+        raise ConnectionError("unreachable")
+
+    async def _exchange(self, conn: _Conn, method, target, host_header) -> tuple[int, bool, str | None]:
+        conn.writer.write(
+            f"{method} {target} HTTP/1.1\r\n"
+            f"Host: {host_header}\r\n"
+            f"User-Agent: {USER_AGENT}\r\n"
+            "Accept: */*\r\n"
+            "Connection: keep-alive\r\n\r\n".encode("latin-1")
+        )
+        await conn.writer.drain()
+        head = await conn.reader.readuntil(b"\r\n\r\n")
+        conn.used += 1
+        lines = head.decode("latin-1").split("\r\n")
+        parts = lines[0].split(" ", 2)
+        if len(parts) < 2 or not parts[0].startswith("HTTP/"):
+            raise ConnectionError(f"bad status line: {lines[0]!r}")
+        status = int(parts[1])
+        headers = {}
+        for line in lines[1:]:
+            name, sep, value = line.partition(":")
+            if sep:
+                headers[name.strip().lower()] = value.strip()
+
+        keep = parts[0] == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+        location = headers.get("location") if status in REDIRECT_STATUSES else None
+        if method == "HEAD" or status in (204, 304) or 100 <= status < 200:
+            return status, keep, location
+        if self.stream:
+            # Never download bodies: the connection cannot be reused
+            return status, False, location
+        return status, keep and await self._drain_body(conn, headers), location
+
+    async def _drain_body(self, conn: _Conn, headers) -> bool:
+        """Discard a response body; return True if the connection is reusable."""
+        if "content-length" in headers:
+            length = int(headers["content-length"])
+            if length > MAX_DRAIN:
+                return False
+            await conn.reader.readexactly(length)
+            return True
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            total = 0
+            while True:
+                size = int((await conn.reader.readuntil(b"\r\n")).split(b";")[0], 16)
+                total += size
+                if total > MAX_DRAIN:
+                    return False
+                await conn.reader.readexactly(size + 2)
+                if size == 0:
+                    return True
+        # Body delimited by connection close
+        return False
+
+    # ── public API ──────────────────────────────
+    async def check(self, url: str) -> CheckResult:
+        """Check one URL, following redirects up to `max_redirects` hops.
+
+        Each hop takes its own slot under the per-host limits, so a redirect
+        to another host never waits while holding the first host's slot.
+        """
+        result = CheckResult(url)
+        start = time.perf_counter()
+        try:
+            while True:
+                location = await self._check_once(url, result)
+                if location is None or result.error or not self.max_redirects:
+                    break
+                if result.redirects >= self.max_redirects:
+                    result.error = f"more than {self.max_redirects} redirects"
+                    break
+                result.redirects += 1
+                url = urljoin(url, location)
+        except asyncio.TimeoutError:
+            result.error = "timeout"
+        except (OSError, ValueError, asyncio.LimitOverrunError) as e:
+            result.error = str(e) or e.__class__.__name__
+        result.elapsed_ms = (time.perf_counter() - start) * 1000.0
+        return result
+
+    async def _check_once(self, url: str, result: CheckResult) -> str | None:
+        """One hop: fill in result.status/method/reused; return a redirect target."""
+        parts = urlsplit(url)
+        scheme = parts.scheme or "http"
+        if scheme not in ("http", "https") or not parts.hostname:
+            result.error = "unsupported URL"
+            return None
+        port = parts.port or (443 if scheme == "https" else 80)
+        key = (scheme, parts.hostname, port)
+        host_header = parts.netloc.rpartition("@")[2]
+        target = parts.path or "/"
+        if parts.query:
+            target += "?" + parts.query
+
+        sem = self._host_sems.get(key)
+        if sem is None:
+            sem = self._host_sems[key] = asyncio.Semaphore(self.per_host)
+        async with self._global, sem:
+            method = "HEAD" if self.head_first else "GET"
+            status, reused, location = await asyncio.wait_for(
+                self._request(key, method, target, host_header), self.timeout)
+            if method == "HEAD" and status in HEAD_FALLBACK_STATUSES:
+                method = "GET"
+                status, reused, location = await asyncio.wait_for(
+                    self._request(key, method, target, host_header), self.timeout)
+        result.status, result.method, result.reused = status, method, reused
+        return location
+
+    async def iter_check(self, urls):
+        """Yield CheckResult objects in completion order."""
+        tasks = [asyncio.ensure_future(self.check(u)) for u in urls]
+        try:
+            for fut in asyncio.as_completed(tasks):
+                yield await fut
+        finally:
+            for t in tasks:
+                t.cancel()
+
+
+async def check_many(urls, on_result=None, **options) -> list[CheckResult]:
+    """Check all URLs; `on_result` is called as each one finishes."""
+    results = []
+    async with HttpChecker(**options) as checker:
+        async for res in checker.iter_check(urls):
+            results.append(res)
+            if on_result:
+                on_result(res)
+    return results
+
+
+def check_urls(urls, on_result=None, **options) -> list[CheckResult]:
+    """Synchronous wrapper around `check_many`."""
+    return asyncio.run(check_many(urls, on_result, **options))
+
+
+# ──────────────────────────────────────────────
+# 💡 Benchmark against a local http.server
+# ──────────────────────────────────────────────
+def start_local_server():
+    """Start a keep-alive ThreadingHTTPServer on 127.0.0.1; return (server, base_url)."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        body = b"ok\n"
+
+        def _send(self, with_body):
+            if self.path.startswith("/redirect/"):
+                # /redirect/<n>/<rest> → 302 to /redirect/<n-1>/<rest>, then /<rest>
+                _, _, hops, rest = self.path.split("/", 3)
+                hops = int(hops) - 1
+                self.send_response(302)
+                self.send_header("Location", f"/redirect/{hops}/{rest}" if hops else f"/{rest}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain")
+            self.send_header("Content-Length", str(len(self.body)))
+            self.end_headers()
+            if with_body:
+                self.wfile.write(self.body)
+
+        def do_HEAD(self):
+            self._send(False)
+
+        def do_GET(self):
+            self._send(True)
+
+        def log_message(self, *args):
+            pass
+
+    class Server(ThreadingHTTPServer):
+        # listen() backlog: the default 5 drops SYNs when benchmarks open
+        # many connections at once, and each retry costs the client 1 s
+        request_queue_size = 128
+        daemon_threads = True
+
+    server = Server(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def _baseline_get(url, timeout=5):
+    """Today's code path: one bare GET (fresh connection) per URL."""
+    try:
+        import requests
+        return requests.get(url, timeout=timeout).status_code
+    except ImportError:
+        from urllib.request import urlopen
+        with urlopen(url, timeout=timeout) as resp:
+            return resp.status
+
+
+def benchmark(n=10000, baseline_n=1000, concurrency=256, per_host=8):
+    """Compare requests/sec of HttpChecker against today's sequential and 5-thread paths."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    server, base = start_local_server()
+    urls = [f"{base}/item/{i}" for i in range(n)]
+    try:
+        start = time.perf_counter()
+        opened = {}
+
+        async def run():
+            async with HttpChecker(concurrency=concurrency, per_host=per_host) as checker:
+                ok = 0
+                async for res in checker.iter_check(urls):
+                    ok += res.ok
+                opened["n"] = checker.connections_opened
+                return ok
+
+        ok = asyncio.run(run())
+        pooled = time.perf_counter() - start
+        print(f"pooled      : {n} URLs, {ok} ok, {opened['n']} connections, "
+              f"{n / pooled:,.0f} req/s")
+
+        sample = urls[:baseline_n]
+        start = time.perf_counter()
+        for u in sample:
+            _baseline_get(u)
+        seq = time.perf_counter() - start
+        print(f"sequential  : {baseline_n} URLs, {baseline_n / seq:,.0f} req/s (day5 safe_get loop)")
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            list(executor.map(_baseline_get, sample))
+        thr = time.perf_counter() - start
+        print(f"5 threads   : {baseline_n} URLs, {baseline_n / thr:,.0f} req/s (stage6 parallel_fetch)")
+        print(f"speedup     : {seq / baseline_n * n / pooled:.1f}x vs sequential, "
+              f"{thr / baseline_n * n / pooled:.1f}x vs 5 threads")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+# ──────────────────────────────────────────────
+# MAIN
+# ──────────────────────────────────────────────
+def main():
+    parser = argparse.ArgumentParser(description="Pooled keep-alive URL checker")
+    parser.add_argument("urls", nargs="*", help="URLs to check")
+    parser.add_argument("--file", help="Read URLs from a file (one per line)")
+    parser.add_argument("--concurrency", type=int, default=256, help="Global in-flight limit")
+    parser.add_argument("--per-host", type=int, default=8, help="In-flight limit per host")
+    parser.add_argument("--timeout", type=float, default=5.0, help="Per-request timeout in seconds")
+    parser.add_argument("--get", action="store_true", help="Skip HEAD and always GET")
+    parser.add_argument("--max-redirects", type=int, default=MAX_REDIRECTS,
+                        help="Redirect hops to follow (0 = report 3xx as-is)")
+    parser.add_argument("--bench", type=int, metavar="N", help="Run the local benchmark with N URLs")
+    args = parser.parse_args()
+
+    if args.bench:
+        benchmark(args.bench, concurrency=args.concurrency, per_host=args.per_host)
+        return
+
+    urls = list(args.urls)
+    if args.file:
+        with open(args.file) as f:
+            urls += [line.strip() for line in f if line.strip()]
+    if not urls:
+        parser.error("no URLs given")
+    check_urls(urls, on_result=print, concurrency=args.concurrency, per_host=args.per_host,
+               timeout=args.timeout, head_first=not args.get, max_redirects=args.max_redirects)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        sys.exit("\n🛑 Interrupted by user.")
@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+"""
+Log Follow — "tail -F" for many files
+Author: Vitalie Procopan
+
+Goal:
+    Stream new lines from many log files at once, surviving rotation,
+    truncation and restarts, at 100k+ lines/sec.
+
+Features:
+    1️⃣ inotify through ctypes (directory watches), polling fallback
+    2️⃣ Rotation detected by inode change, truncation by size shrink
+    3️⃣ Per-file (inode, offset) checkpoint file → restarts resume exactly
+    4️⃣ Incremental parsing of "%(asctime)s [%(levelname)s] %(message)s"
+    💡 Benchmark: lines/sec while a writer appends to a file
+"""
+
+import argparse
+import os
+import select
+import signal
+import struct
+import sys
+import threading
+import time
+
+READ_SIZE = 1 << 20
+
+# inotify(7) constants
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+DIR_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT = struct.Struct("iIII")
+
+
+# ──────────────────────────────────────────────
+# Line parsing
+# ──────────────────────────────────────────────
+class LogLine:
+    # A plain class rather than a dataclass: `devops-tool follow` imports this
+    # module at startup and dataclasses costs ~8 ms to import
+
+    __slots__ = ("path", "asctime", "level", "message", "raw")
+
+    def __init__(self, path: str, asctime: str | None, level: str | None, message: str, raw: bytes):
+        self.path = path
+        self.asctime = asctime
+        self.level = level
+        self.message = message
+        self.raw = raw
+
+    def __repr__(self):
+        return (f"LogLine(path={self.path!r}, asctime={self.asctime!r}, level={self.level!r}, "
+                f"message={self.message!r}, raw={self.raw!r})")
+
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return (self.path, self.asctime, self.level, self.message, self.raw) == \
+            (other.path, other.asctime, other.level, other.message, other.raw)
+
+
+def parse_line(path, raw: bytes) -> LogLine:
+    """Split "YYYY-MM-DD HH:MM:SS,mmm [LEVEL] message" without regex.
+
+    Lines that do not match the format come back with asctime/level None.
+    """
+    if len(raw) > 26 and raw[23:25] == b" [":
+        end = raw.find(b"] ", 25)
+        if 0 < end < 40:
+            return LogLine(path, raw[:23].decode("ascii", "replace"), raw[25:end].decode("ascii", "replace"),
+                           raw[end + 2:].decode("utf-8", "replace"), raw)
+    return LogLine(path, None, None, raw.decode("utf-8", "replace"), raw)
+
+
+# ──────────────────────────────────────────────
+# Per-file state
+# ──────────────────────────────────────────────
+class _Tracked:
+    __slots__ = ("path", "fh", "ino", "offset", "partial")
+
+    def __init__(self, path):
+        self.path = path
+        self.fh = None
+        self.ino = None
+        self.offset = 0
+        self.partial = b""
+
+    def open(self, st, offset):
+        self.close()
+        self.fh = open(self.path, "rb", buffering=0)
+        self.ino = st.st_ino
+        self.offset = offset
+        self.partial = b""
+        self.fh.seek(offset)
+
+    def close(self):
+        if self.fh is not None:
+            self.fh.close()
+            self.fh = None
+
+    def read_new(self) -> list[bytes]:
+        """Complete lines appended since the last read."""
+        if self.fh is None:
+            return []
+        chunks = []
+        while True:
+            data = self.fh.read(READ_SIZE)
+            if not data:
+                break
+            chunks.append(data)
+            self.offset += len(data)
+        if not chunks:
+            return []
+        data = self.partial + b"".join(chunks)
+        lines = data.split(b"\n")
+        self.partial = lines.pop()
+        return lines
+
+
+# ──────────────────────────────────────────────
+# inotify via ctypes
+# ──────────────────────────────────────────────
+class _Inotify:
+    def __init__(self):
+        import ctypes  # only when following with inotify; keeps `devops-tool` startup fast
+
+        self._ctypes = ctypes
+        try:
+            libc = ctypes.CDLL("libc.so.6", use_errno=True)
+        except OSError:
+            import ctypes.util  # find_library shells out to ldconfig, so only as a fallback
+
+            libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._add = libc.inotify_add_watch
+        self._add.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.dirs = {}  # wd → directory
+
+    def watch_dir(self, directory):
+        wd = self._add(self.fd, os.fsencode(directory), DIR_MASK)
+        if wd < 0:
+            raise OSError(self._ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+        self.dirs[wd] = directory
+
+    def read_events(self, timeout):
+        """Yield (directory, name, mask) for events within timeout seconds."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return
+        try:
+            buf = os.read(self.fd, 65536)
+        except BlockingIOError:
+            return
+        pos = 0
+        while pos + EVENT.size <= len(buf):
+            wd, mask, _, length = EVENT.unpack_from(buf, pos)
+            name = buf[pos + EVENT.size:pos + EVENT.size + length].rstrip(b"\0")
+            pos += EVENT.size + length
+            yield self.dirs.get(wd), os.fsdecode(name), mask
+
+    def close(self):
+        os.close(self.fd)
+
+
+# ──────────────────────────────────────────────
+# Follower
+# ──────────────────────────────────────────────
+class Follower:
+    """Follow many files, calling on_lines(path, [raw lines]) for new data.
+
+    New files start at EOF (like tail -F) unless from_start is set; a
+    checkpoint entry with a matching inode overrides both.
+    """
+
+    def __init__(self, paths, on_lines, checkpoint=None, from_start=False, poll_interval=1.0,
+                 use_inotify=True, checkpoint_interval=2.0):
+        self.files = {os.path.abspath(p): _Tracked(os.path.abspath(p)) for p in paths}
+        self.on_lines = on_lines
+        self.checkpoint = checkpoint
+        self.from_start = from_start
+        self.poll_interval = poll_interval
+        self.checkpoint_interval = checkpoint_interval
+        self.lines_seen = 0
+        self._saved = {}
+        self._stop = threading.Event()
+        self._inotify = None
+        if use_inotify and sys.platform.startswith("linux"):
+            try:
+                self._inotify = _Inotify()
+                for d in {os.path.dirname(p) for p in self.files}:
+                    self._inotify.watch_dir(d)
+            except (OSError, AttributeError):
+                if self._inotify is not None:
+                    self._inotify.close()
+                self._inotify = None
+        self.mode = "inotify" if self._inotify else "poll"
+
+    # ── checkpoint ──────────────────────────────
+    def _load_checkpoint(self) -> dict:
+        if not self.checkpoint or not os.path.exists(self.checkpoint):
+            return {}
+        import json  # only with --checkpoint
+
+        try:
+            with open(self.checkpoint) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_checkpoint(self):
+        if not self.checkpoint:
+            return
+        # Offsets only count complete lines, so a resume never splits one
+        state = dict(self._saved)  # keep entries for files not followed this run
+        state.update({p: {"ino": t.ino, "offset": t.offset - len(t.partial)}
+                      for p, t in self.files.items() if t.ino is not None})
+        import json
+
+        tmp = f"{self.checkpoint}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp, self.checkpoint)
+
+    # ── file checks ─────────────────────────────
+    def _start(self, saved):
+        for path, t in self.files.items():
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entry = saved.get(path)
+            if entry and entry.get("ino") == st.st_ino and entry.get("offset", 0) <= st.st_size:
+                t.open(st, entry["offset"])
+            elif entry:
+                t.open(st, 0)  # rotated or truncated while we were not running
+            else:
+                t.open(st, 0 if self.from_start else st.st_size)
+
+    def _emit(self, t, lines):
+        if lines:
+            self.lines_seen += len(lines)
+            self.on_lines(t.path, lines)
+
+    def check(self, path):
+        """Read new data from path, handling rotation and truncation."""
+        t = self.files[path]
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            st = None
+        if t.fh is not None and (st is None or st.st_ino != t.ino):
+            # Rotated or removed: drain what is left of the old inode first
+            self._emit(t, t.read_new())
+            if t.partial:
+                self._emit(t, [t.partial])
+            t.close()
+            t.ino = None
+        if st is None:
+            return
+        if t.fh is None:
+            t.open(st, 0)  # a file appearing after start is read from the top
+        elif st.st_size < t.offset:
+            t.open(st, 0)  # truncated in place (copytruncate)
+        self._emit(t, t.read_new())
+
+    def check_all(self):
+        for path in self.files:
+            self.check(path)
+
+    # ── main loop ───────────────────────────────
+    def stop(self):
+        self._stop.set()
+
+    def run(self, duration=None):
+        """Follow until stop() (or for `duration` seconds)."""
+        self._saved = self._load_checkpoint()
+        self._start(self._saved)
+        deadline = None if duration is None else time.monotonic() + duration
+        last_save = time.monotonic()
+        try:
+            self.check_all()
+            while not self._stop.is_set():
+                if deadline is not None and time.monotonic() >= deadline:
+                    break
+                if self._inotify:
+                    dirty = set()
+                    for directory, name, mask in self._inotify.read_events(self.poll_interval):
+                        if mask & IN_Q_OVERFLOW or directory is None:
+                            dirty.update(self.files)
+                        else:
+                            path = os.path.join(directory, name)
+                            if path in self.files:
+                                dirty.add(path)
+                    for path in dirty:
+                        self.check(path)
+                    if not dirty:
+                        self.check_all()  # periodic safety net (e.g. NFS)
+                else:
+                    self._stop.wait(self.poll_interval)
+                    self.check_all()
+                if time.monotonic() - last_save >= self.checkpoint_interval:
+                    self.save_checkpoint()
+                    last_save = time.monotonic()
+        finally:
+            self.save_checkpoint()
+            for t in self.files.values():
+                t.close()
+            if self._inotify:
+                self._inotify.close()
+
+
+def follow(paths, levels=None, checkpoint=None, from_start=False, poll=False, out=None):
+    """Print new lines from every path as "<file> <line>", optionally filtered by level."""
+    out = out or sys.stdout
+    wanted = {lvl.upper() for lvl in levels} if levels else None
+    multi = len(paths) > 1
+
+    def on_lines(path, lines):
+        name = os.path.basename(path)
+        buf = []
+        for raw in lines:
+            if wanted is not None:
+                rec = parse_line(path, raw)
+                if rec.level not in wanted:
+                    continue
+            text = raw.decode("utf-8", "replace")
+            buf.append(f"{name}: {text}\n" if multi else text + "\n")
+        if buf:
+            out.write("".join(buf))
+            out.flush()
+
+    follower = Follower(paths, on_lines, checkpoint=checkpoint, from_start=from_start, use_inotify=not poll)
+    if threading.current_thread() is threading.main_thread():
+        # Service managers stop us with SIGTERM: exit cleanly so the checkpoint is saved
+        signal.signal(signal.SIGTERM, lambda *_: follower.stop())
+    print(f"👀 Following {len(paths)} file(s) via {follower.mode} — Ctrl+C to stop", file=sys.stderr)
+    try:
+        follower.run()
+    except KeyboardInterrupt:
+        pass
+    return follower
+
+
+# ──────────────────────────────────────────────
+# 💡 Benchmark
+# ──────────────────────────────────────────────
+def benchmark(lines=1_000_000, poll=False):
+    """Append `lines` log lines (with one rotation halfway) and measure follow throughput."""
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "devops.log")
+        open(path, "w").close()
+        parsed = [0]
+        errors = [0]
+
+        def on_lines(_, batch):
+            for raw in batch:
+                rec = parse_line(path, raw)
+                if rec.level == "ERROR":
+                    errors[0] += 1
+            parsed[0] += len(batch)
+
+        follower = Follower([path], on_lines, checkpoint=os.path.join(tmp, "ckpt.json"),
+                            from_start=True, poll_interval=0.05, use_inotify=not poll)
+        thread = threading.Thread(target=follower.run)
+        thread.start()
+        line = "2025-11-02 04:58:27,139 [INFO] 💻 Executing: ping -c 2 example.com\n"
+        err = "2025-11-02 04:58:27,139 [ERROR] Command not found: docker\n"
+        block = (line * 99 + err) * 100
+        start = time.perf_counter()
+        written = 0
+        with open(path, "a") as f:
+            while written < lines // 2:
+                f.write(block)
+                written += 10_000
+        os.rename(path, path + ".1")
+        with open(path, "a") as f:
+            while written < lines:
+                f.write(block)
+                written += 10_000
+        while parsed[0] < written and time.perf_counter() - start < 60:
+            time.sleep(0.01)
+        elapsed = time.perf_counter() - start
+        follower.stop()
+        thread.join()
+        print(f"mode         : {follower.mode}")
+        print(f"followed     : {parsed[0]:,}/{written:,} lines ({errors[0]:,} ERROR) across one rotation")
+        print(f"throughput   : {parsed[0] / elapsed:,.0f} lines/s (parsed)")
+
+
+# ──────────────────────────────────────────────
+# MAIN
+# ──────────────────────────────────────────────
+def build_parser(parser=None):
+    parser = parser or argparse.ArgumentParser(description="Follow log files (tail -F)")
+    parser.add_argument("paths", nargs="*", default=["devops.log", "devops_info.log"],
+                        help="Files to follow (default: devops.log devops_info.log)")
+    parser.add_argument("--level", action="append", help="Only show these levels (repeatable)")
+    parser.add_argument("--checkpoint", help="Offset checkpoint file for resuming")
+    parser.add_argument("--from-start", action="store_true", help="Read new files from the beginning")
+    parser.add_argument("--poll", action="store_true", help="Use polling instead of inotify")
+    return parser
+
+
+def main():
+    parser = build_parser()
+    parser.add_argument("--bench", type=int, metavar="LINES", help="Run the throughput benchmark")
+    args = parser.parse_args()
+    if args.bench:
+        benchmark(args.bench, args.poll)
+        return
+    follow(args.paths, args.level, args.checkpoint, args.from_start, args.poll)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Log Scan — find, count and tail log files
+Author: Vitalie Procopan
+
+Goal:
+    Summarise every log under a tree (line counts, per-level counts,
+    last N lines) quickly, even for multi-GB files, and only rescan the
+    bytes appended since the previous run.
+
+Features:
+    1️⃣ Recursive discovery by glob patterns (*.log by default)
+    2️⃣ mmap + chunked bytes.count() for lines and level markers
+    3️⃣ Tails read backwards from EOF
+    4️⃣ Files processed in a process pool
+    5️⃣ (dev, inode, size, mtime) cache → incremental rescans
+"""
+
+import argparse
+import fnmatch
+import json
+import mmap
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+DEFAULT_PATTERNS = ("*.log",)
+# Matches the "%(asctime)s [%(levelname)s] %(message)s" format used across the project
+LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL")
+CHUNK = 16 << 20
+TAIL_BLOCK = 8192
+CACHE_VERSION = 1
+POOL_THRESHOLD = 64 << 20  # bytes to scan before a process pool is worth starting
+
+
+def default_cache_path() -> Path:
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return Path(base) / "devops-tool" / "log_scan.json"
+
+
+# ──────────────────────────────────────────────
+# Discovery
+# ──────────────────────────────────────────────
+def find_logs(root=".", patterns=DEFAULT_PATTERNS):
+    """Yield paths of regular files under root matching any pattern."""
+    stack = [root]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file() and any(fnmatch.fnmatch(entry.name, p) for p in patterns):
+                        yield entry.path
+                except OSError:
+                    continue
+
+
+# ──────────────────────────────────────────────
+# Per-file scanning (runs in worker processes)
+# ──────────────────────────────────────────────
+def _count_range(mm, start, end, tokens):
+    """Count newlines and tokens in mm[start:end], chunk by chunk.
+
+    Chunk ends are moved to the next newline so a token never straddles
+    two chunks.
+    """
+    lines = 0
+    counts = [0] * len(tokens)
+    pos = start
+    while pos < end:
+        stop = min(pos + CHUNK, end)
+        if stop < end:
+            nl = mm.find(b"\n", stop, end)
+            stop = end if nl < 0 else nl + 1
+        chunk = mm[pos:stop]
+        lines += chunk.count(b"\n")
+        for i, tok in enumerate(tokens):
+            counts[i] += chunk.count(tok)
+        pos = stop
+    return lines, counts
+
+
+def tail_lines(path, n=10) -> list[str]:
+    """Last n lines of a file, reading fixed blocks backwards from EOF."""
+    if n <= 0:
+        return []
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        data = b""
+        while pos > 0 and data.count(b"\n") <= n:
+            step = min(TAIL_BLOCK, pos)
+            pos -= step
+            f.seek(pos)
+            data = f.read(step) + data
+    lines = data.splitlines()[-n:]
+    return [line.decode("utf-8", errors="replace") for line in lines]
+
+
+def scan_file(path, levels=LEVELS, tail=10, previous=None) -> dict:
+    """Scan one file; reuse `previous` (a cache entry) when the file only grew.
+
+    Same inode and size with a new mtime means it was rewritten in place
+    (not appended to), so it is rescanned from the start.
+    """
+    st = os.stat(path)
+    entry = {
+        "dev": st.st_dev,
+        "ino": st.st_ino,
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "scanned_to": 0,
+        "lines": 0,
+        "levels": {lvl: 0 for lvl in levels},
+        "rescanned_bytes": 0,
+    }
+    start = 0
+    if (previous and previous.get("dev") == st.st_dev and previous.get("ino") == st.st_ino
+            and previous.get("scanned_to", 0) <= st.st_size and set(previous["levels"]) == set(levels)):
+        if previous["size"] == st.st_size and previous["mtime_ns"] == st.st_mtime_ns:
+            entry.update(scanned_to=previous["scanned_to"], lines=previous["lines"],
+                         levels=dict(previous["levels"]))
+            cached_tail = previous.get("tail", [])
+            entry["tail"] = cached_tail[-tail:] if len(cached_tail) >= tail else tail_lines(path, tail)
+            return entry
+        if st.st_size > previous["size"]:
+            # Same inode and it only grew: resume after the last full line
+            start = previous["scanned_to"]
+            entry["lines"] = previous["lines"]
+            entry["levels"] = dict(previous["levels"])
+
+    if st.st_size > start:
+        with open(path, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                end = mm.rfind(b"\n", start) + 1  # stop after the last complete line
+                if end > start:
+                    tokens = [f"[{lvl}]".encode() for lvl in levels]
+                    lines, counts = _count_range(mm, start, end, tokens)
+                    entry["lines"] += lines
+                    for lvl, c in zip(levels, counts):
+                        entry["levels"][lvl] += c
+                    entry["scanned_to"] = end
+                    entry["rescanned_bytes"] = end - start
+                else:
+                    entry["scanned_to"] = start
+    else:
+        entry["scanned_to"] = start
+    entry["tail"] = tail_lines(path, tail)
+    return entry
+
+
+def _scan_job(args):
+    path, levels, tail, previous = args
+    try:
+        return path, scan_file(path, levels, tail, previous)
+    except (OSError, ValueError) as e:  # ValueError: mmap of a file truncated to empty after stat
+        return path, {"error": str(e)}
+
+
+# ──────────────────────────────────────────────
+# Engine
+# ──────────────────────────────────────────────
+def scan_logs(root=".", patterns=DEFAULT_PATTERNS, levels=LEVELS, tail=10, workers=None,
+              cache_path=None, use_cache=True) -> dict:
+    """Scan every matching log under root; returns {path: entry}.
+
+    Results are cached in cache_path (default ~/.cache/devops-tool/log_scan.json)
+    keyed by absolute path and validated by (dev, inode, size, mtime_ns).
+    """
+    cache_path = Path(cache_path) if cache_path else default_cache_path()
+    cache = {}
+    if use_cache and cache_path.exists():
+        try:
+            data = json.loads(cache_path.read_text())
+            if data.get("version") == CACHE_VERSION:
+                cache = data["files"]
+        except (OSError, ValueError, KeyError):
+            cache = {}
+
+    paths = [os.path.abspath(p) for p in find_logs(root, patterns)]
+    jobs = [(p, tuple(levels), tail, cache.get(p)) for p in paths]
+    pending = 0
+    for p, _, _, prev in jobs:
+        try:
+            pending += os.path.getsize(p) - (prev or {}).get("scanned_to", 0)
+        except OSError:
+            pass
+    results = {}
+    # Worker start-up costs more than scanning a few MB in-process
+    if workers == 1 or len(jobs) < 2 or pending < POOL_THRESHOLD:
+        results.update(map(_scan_job, jobs))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results.update(executor.map(_scan_job, jobs, chunksize=max(1, len(jobs) // 64)))
+
+    if use_cache:
+        cache.update({p: e for p, e in results.items() if "error" not in e})
+        # Other roots share the cache, so entries are pruned by existence, not by this walk
+        cache = {p: e for p, e in cache.items() if p in results or os.path.exists(p)}
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        # Unique temp name: concurrent runs must not clobber each other's file before os.replace
+        fd, tmp = tempfile.mkstemp(dir=cache_path.parent, prefix=cache_path.name, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump({"version": CACHE_VERSION, "files": cache}, f)
+            os.replace(tmp, cache_path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+    return results
+
+
+def print_report(results, tail=5):
+    total_lines = sum(e.get("lines", 0) for e in results.values())
+    rescanned = sum(e.get("rescanned_bytes", 0) for e in results.values())
+    print(f"🧾 {len(results)} log file(s), {total_lines:,} lines ({rescanned:,} bytes scanned this run)")
+    for path, e in sorted(results.items()):
+        if "error" in e:
+            print(f"   ❌ {path}: {e['error']}")
+            continue
+        levels = " ".join(f"{k}={v}" for k, v in e["levels"].items() if v)
+        print(f"   - {path}: {e['lines']:,} lines, {e['size']:,} bytes  {levels}")
+        for line in e.get("tail", [])[-tail:]:
+            print(f"       │ {line}")
+
+
+# ──────────────────────────────────────────────
+# MAIN
+# ──────────────────────────────────────────────
+def main():
+    parser = argparse.ArgumentParser(description="Find, count and tail log files")
+    parser.add_argument("root", nargs="?", default=".", help="Directory to search (default: .)")
+    parser.add_argument("--pattern", action="append", help="Glob for log names (repeatable, default *.log)")
+    parser.add_argument("--tail", type=int, default=5, help="Lines to show from the end of each file")
+    parser.add_argument("--workers", type=int, help="Process pool size (default: CPU count)")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore and do not update the scan cache")
+    parser.add_argument("--cache", help="Cache file path")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    results = scan_logs(args.root, tuple(args.pattern or DEFAULT_PATTERNS), tail=args.tail,
+                        workers=args.workers, cache_path=args.cache, use_cache=not args.no_cache)
+    print_report(results, args.tail)
+    print(f"⏱️  {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        sys.exit("\n🛑 Interrupted by user.")
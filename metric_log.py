@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+"""
+Metric Log — append-only binary sample segments
+Author: Vitalie Procopan
+
+Goal:
+    Persist samples as fixed-size binary records instead of text log
+    lines, so time-range analysis is a memory scan rather than a regex
+    parse of every line.
+
+Features:
+    1️⃣ Fixed 24-byte records (int64 ts_ns, uint32 metric id, float64 value)
+    2️⃣ Segment files that grow, rotate by size and expire by count
+    3️⃣ Reader that mmaps segments, with a sparse timestamp index
+    4️⃣ Zero-copy memoryview / NumPy frombuffer views of matching ranges
+    💡 Benchmark: generate and scan N records
+
+Layout:
+    <dir>/metrics.names         one metric name per line (line number = id)
+    <dir>/seg-<first_ts_ns>.dml 64-byte header + records
+"""
+
+import argparse
+import mmap
+import os
+import struct
+import time
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+
+try:
+    import numpy as np
+except ImportError:  # memoryview fallback
+    np = None
+
+try:
+    import fcntl
+except ImportError:  # Windows: single writer per directory assumed
+    fcntl = None
+
+MAGIC = b"DVML"
+VERSION = 1
+HEADER = struct.Struct("<4sHH56x")  # magic, version, record size, padding → 64 bytes
+RECORD = struct.Struct("<qI4xd")    # ts_ns, metric id, pad, value → 24 bytes
+INDEX_STRIDE = 4096                 # one sparse-index entry per 4096 records
+NAMES_FILE = "metrics.names"
+
+if np is not None:
+    RECORD_DTYPE = np.dtype([("ts", "<i8"), ("metric", "<u4"), ("_pad", "<u4"), ("value", "<f8")])
+
+
+def _segments(directory: Path):
+    return sorted(directory.glob("seg-*.dml"))
+
+
+# ──────────────────────────────────────────────
+# Writer
+# ──────────────────────────────────────────────
+class MetricLogWriter:
+    """Append samples to rotating segment files.
+
+    Records are packed into an in-memory batch and written with one
+    write() per flush; a segment is closed and a new one started once it
+    reaches `segment_bytes`. Only the newest `max_segments` are kept.
+    Samples are expected in time order (the reader's index relies on it).
+
+    Several processes may write one directory: ids are assigned under an
+    flock on metrics.names, and each open segment is flock'ed by its
+    writer, so a concurrent writer starts its own segment instead of
+    interleaving records.
+    """
+
+    def __init__(self, directory, segment_bytes=64 << 20, max_segments=64, batch_records=4096):
+        self.dir = Path(directory)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.segment_bytes = segment_bytes
+        self.max_segments = max_segments
+        self._batch = bytearray(RECORD.size * batch_records)
+        self._batch_len = 0
+        self._file = None
+        self._size = 0
+        self._names_path = self.dir / NAMES_FILE
+        self._ids = {}
+        if self._names_path.exists():
+            for i, name in enumerate(self._names_path.read_text().splitlines()):
+                self._ids[name] = i
+
+    def metric_id(self, name) -> int:
+        mid = self._ids.get(name)
+        if mid is None:
+            mid = self._register(name)
+        return mid
+
+    def _register(self, name) -> int:
+        # Another process may have added names since we last looked:
+        # re-read under the lock so an id is never handed out twice
+        with open(self._names_path, "a+") as f:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            f.seek(0)
+            names = f.read().splitlines()
+            self._ids = {n: i for i, n in enumerate(names)}
+            mid = self._ids.get(name)
+            if mid is None:
+                f.write(name + "\n")
+                mid = self._ids[name] = len(names)
+        return mid
+
+    @staticmethod
+    def _claim(path, ts_ns):
+        """Open path for appending if no other writer holds it and ts_ns keeps it sorted."""
+        f = open(path, "ab")
+        try:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            size = f.tell()
+            if size > HEADER.size:
+                if (size - HEADER.size) % RECORD.size:
+                    raise ValueError("torn record")
+                with open(path, "rb") as r:
+                    r.seek(size - RECORD.size)
+                    if RECORD.unpack(r.read(RECORD.size))[0] > ts_ns:
+                        raise ValueError("out of order")
+        except (OSError, ValueError):
+            f.close()
+            return None
+        return f
+
+    def _open_segment(self, ts_ns):
+        # Short-lived writers (one CLI run each) keep filling the newest
+        # segment instead of leaving one tiny file per process behind.
+        segs = _segments(self.dir)
+        self._file = None
+        if segs and segs[-1].stat().st_size < self.segment_bytes:
+            self._file = self._claim(segs[-1], ts_ns)
+        while self._file is None:
+            path = self.dir / f"seg-{ts_ns:020d}.dml"
+            if not path.exists():
+                self._file = self._claim(path, ts_ns)
+            ts_ns += 1  # name taken by a concurrent writer
+        self._size = self._file.tell()
+        if self._size == 0:
+            self._file.write(HEADER.pack(MAGIC, VERSION, RECORD.size))
+            self._size = HEADER.size
+        # Expire the oldest segments
+        segs = _segments(self.dir)
+        for old in segs[:max(0, len(segs) - self.max_segments)]:
+            old.unlink()
+
+    def append(self, name, value, ts=None):
+        """Queue one sample (ts in epoch seconds, default now)."""
+        ts_ns = time.time_ns() if ts is None else int(ts * 1e9)
+        if self._batch_len + RECORD.size > len(self._batch):
+            self.flush()
+        RECORD.pack_into(self._batch, self._batch_len, ts_ns, self.metric_id(name), float(value))
+        self._batch_len += RECORD.size
+        if self._file is None:
+            self._open_segment(ts_ns)
+        if self._size + self._batch_len >= self.segment_bytes:
+            self.flush()
+
+    def append_many(self, values: dict, ts=None):
+        """Queue every numeric value of a flat dict under one timestamp."""
+        ts = time.time() if ts is None else ts
+        for name, value in values.items():
+            if isinstance(value, (int, float)):
+                self.append(name, value, ts)
+
+    def append_array(self, records):
+        """Write a prepared NumPy RECORD_DTYPE array directly (bulk import)."""
+        self.flush()
+        data = records.tobytes()
+        for start in range(0, len(data), RECORD.size * 65536):
+            if self._file is None:
+                self._open_segment(int(records["ts"][start // RECORD.size]))
+            chunk = data[start:start + RECORD.size * 65536]
+            self._file.write(chunk)
+            self._size += len(chunk)
+            if self._size >= self.segment_bytes:
+                self._rotate()
+
+    def flush(self):
+        if self._batch_len and self._file is not None:
+            self._file.write(memoryview(self._batch)[:self._batch_len])
+            self._size += self._batch_len
+            self._file.flush()
+            self._batch_len = 0
+            if self._size >= self.segment_bytes:
+                self._rotate()
+
+    def _rotate(self):
+        self._file.close()
+        self._file = None
+
+    def close(self):
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ──────────────────────────────────────────────
+# Reader
+# ──────────────────────────────────────────────
+class _Segment:
+    """One mmapped segment with a sparse index of every INDEX_STRIDE-th ts."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._fh = open(path, "rb")
+        size = os.fstat(self._fh.fileno()).st_size
+        self.count = max(0, (size - HEADER.size) // RECORD.size)
+        self.mm = None
+        self.index = []
+        if self.count == 0:
+            return
+        self.mm = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, rec_size = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC or rec_size != RECORD.size:
+            raise ValueError(f"{path}: not a metric log segment")
+        self.index = [self._ts(i) for i in range(0, self.count, INDEX_STRIDE)]
+        self.first_ts = self.index[0]
+        self.last_ts = self._ts(self.count - 1)
+
+    def _ts(self, i):
+        return struct.unpack_from("<q", self.mm, HEADER.size + i * RECORD.size)[0]
+
+    def _search(self, ts, right):
+        """Record index of ts: sparse index first, then inside one block."""
+        block = (bisect_right if right else bisect_left)(self.index, ts)
+        lo = max(0, block - 1) * INDEX_STRIDE
+        hi = min(self.count, block * INDEX_STRIDE + 1)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            v = self._ts(mid)
+            if v < ts or (right and v == ts):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def range(self, start_ns, end_ns):
+        """Zero-copy view of the records with start_ns <= ts <= end_ns."""
+        if self.count == 0 or end_ns < self.first_ts or start_ns > self.last_ts:
+            return None
+        lo, hi = self._search(start_ns, False), self._search(end_ns, True)
+        if lo >= hi:
+            return None
+        if np is not None:
+            return np.frombuffer(self.mm, dtype=RECORD_DTYPE, count=hi - lo,
+                                 offset=HEADER.size + lo * RECORD.size)
+        return memoryview(self.mm)[HEADER.size + lo * RECORD.size:HEADER.size + hi * RECORD.size]
+
+    def close(self):
+        if self.mm is not None:
+            try:
+                self.mm.close()
+            except BufferError:
+                pass  # views still alive; closed when garbage-collected
+        self._fh.close()
+
+
+class MetricLogReader:
+    """Time-range queries over every segment in a metric log directory."""
+
+    def __init__(self, directory):
+        self.dir = Path(directory)
+        names_path = self.dir / NAMES_FILE
+        self.names = names_path.read_text().splitlines() if names_path.exists() else []
+        self.ids = {n: i for i, n in enumerate(self.names)}
+        self.segments = [_Segment(p) for p in _segments(self.dir)]
+
+    def close(self):
+        for seg in self.segments:
+            seg.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def scan(self, start=None, end=None):
+        """Yield one zero-copy view per segment overlapping [start, end] (epoch seconds).
+
+        Views are NumPy structured arrays (ts, metric, value) when NumPy is
+        available, otherwise memoryviews of packed RECORD bytes.
+        """
+        start_ns = -(1 << 63) if start is None else int(start * 1e9)
+        end_ns = (1 << 63) - 1 if end is None else int(end * 1e9)
+        for seg in self.segments:
+            view = seg.range(start_ns, end_ns)
+            if view is not None:
+                yield view
+
+    def records(self, start=None, end=None, metric=None):
+        """Iterate (ts_seconds, name, value) tuples — convenient, not fast."""
+        mid = None if metric is None else self.ids.get(metric, -1)
+        for view in self.scan(start, end):
+            rows = (zip(view["ts"].tolist(), view["metric"].tolist(), view["value"].tolist())
+                    if np is not None else ((t, m, v) for t, m, v in RECORD.iter_unpack(view)))
+            for ts, m, value in rows:
+                if mid is None or m == mid:
+                    yield ts / 1e9, self.names[m], value
+
+    def aggregate(self, metric, start=None, end=None) -> dict:
+        """count/min/max/avg of one metric over a time range."""
+        mid = self.ids.get(metric)
+        if mid is None:
+            raise KeyError(metric)
+        count, total, lo, hi = 0, 0.0, float("inf"), float("-inf")
+        for view in self.scan(start, end):
+            if np is not None:
+                values = view["value"][view["metric"] == mid]
+                if values.size:
+                    count += int(values.size)
+                    total += float(values.sum())
+                    lo = min(lo, float(values.min()))
+                    hi = max(hi, float(values.max()))
+                continue
+            for _, m, value in RECORD.iter_unpack(view):
+                if m == mid:
+                    count += 1
+                    total += value
+                    lo = min(lo, value)
+                    hi = max(hi, value)
+        if not count:
+            return {"count": 0}
+        return {"count": count, "min": lo, "max": hi, "avg": total / count}
+
+
+# ──────────────────────────────────────────────
+# 💡 Benchmark
+# ──────────────────────────────────────────────
+def benchmark(directory, n=10_000_000, metrics=16):
+    """Write n synthetic records, then time a full-range and a 10% range scan."""
+    if np is None:
+        raise SystemExit("❌ The benchmark needs NumPy to generate records quickly.")
+    directory = Path(directory)
+    start_ns = time.time_ns() - n * 1_000_000
+    chunk = 1_000_000
+    t0 = time.perf_counter()
+    with MetricLogWriter(directory, segment_bytes=256 << 20, max_segments=1 << 20) as writer:
+        for m in range(metrics):
+            writer.metric_id(f"metric{m}")
+        for base in range(0, n, chunk):
+            k = min(chunk, n - base)
+            recs = np.zeros(k, dtype=RECORD_DTYPE)
+            recs["ts"] = start_ns + (np.arange(base, base + k, dtype=np.int64) * 1_000_000)
+            recs["metric"] = np.arange(base, base + k) % metrics
+            recs["value"] = np.arange(base, base + k) % 100
+            writer.append_array(recs)
+    write_s = time.perf_counter() - t0
+
+    with MetricLogReader(directory) as reader:
+        t0 = time.perf_counter()
+        full = reader.aggregate("metric0")
+        full_s = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        lo = (start_ns + n * 450_000) / 1e9
+        part = reader.aggregate("metric0", lo, lo + n * 100_000 / 1e9)
+        part_s = time.perf_counter() - t0
+    print(f"write        : {n:,} records in {write_s:.2f}s ({n / write_s / 1e6:.1f} M rec/s)")
+    print(f"full scan    : {full_s:.2f}s ({n / full_s / 1e6:.1f} M rec/s) → {full}")
+    print(f"10% range    : {part_s * 1000:.1f} ms → count={part['count']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Binary metric log tools")
+    parser.add_argument("directory", help="Metric log directory")
+    parser.add_argument("--metric", help="Aggregate this metric")
+    parser.add_argument("--since", type=float, help="Start of range (epoch seconds)")
+    parser.add_argument("--until", type=float, help="End of range (epoch seconds)")
+    parser.add_argument("--bench", type=int, metavar="N", help="Write and scan N synthetic records")
+    args = parser.parse_args()
+
+    if args.bench:
+        benchmark(args.directory, args.bench)
+    else:
+        with MetricLogReader(args.directory) as log:
+            if args.metric:
+                print(log.aggregate(args.metric, args.since, args.until))
+            else:
+                for name in log.names:
+                    print(f"{name}: {log.aggregate(name, args.since, args.until)}")
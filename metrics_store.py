@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+Metrics Store — compact in-process time series
+Author: Vitalie Procopan
+
+Goal:
+    Keep weeks of per-second samples in bounded memory and answer
+    window queries without materialising Python objects per sample.
+
+Features:
+    1️⃣ One fixed-size ring buffer per metric (array, NumPy views when available)
+    2️⃣ Timestamps stored as int64 millisecond deltas from the store epoch
+    3️⃣ O(1) append, min/max/avg/percentile over time windows
+    4️⃣ Downsampling tiers 1s → 1m → 1h
+    💡 Benchmark: memory per million samples vs a list of dicts
+"""
+
+import argparse
+import math
+import time
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # pure-Python fallback
+    np = None
+
+MINUTE_MS = 60_000
+HOUR_MS = 3_600_000
+
+
+# ──────────────────────────────────────────────
+# Ring buffers
+# ──────────────────────────────────────────────
+class Ring:
+    """Fixed-capacity ring of (int64 timestamp delta, float64 columns...)."""
+
+    def __init__(self, capacity, columns=("value",)):
+        self.capacity = capacity
+        self.columns = columns
+        self.ts = array("q", bytes(8 * capacity))
+        self.cols = {c: array("d", bytes(8 * capacity)) for c in columns}
+        self.head = 0  # next physical slot to write
+        self.size = 0
+
+    def append(self, ts, *values):
+        i = self.head
+        self.ts[i] = ts
+        for col, v in zip(self.cols.values(), values):
+            col[i] = v
+        self.head = (i + 1) % self.capacity
+        if self.size < self.capacity:
+            self.size += 1
+
+    def __len__(self):
+        return self.size
+
+    def _phys(self, i):
+        return (self.head - self.size + i) % self.capacity
+
+    def first_ts(self):
+        return self.ts[self._phys(0)] if self.size else None
+
+    def _index(self, ts, right=False):
+        """Logical index of ts via binary search over the (sorted) ring."""
+        lo, hi = 0, self.size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            v = self.ts[self._phys(mid)]
+            if v < ts or (right and v == ts):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _segments(self, lo, hi):
+        """Physical [start, end) ranges covering logical [lo, hi)."""
+        if lo >= hi:
+            return []
+        a, b = self._phys(lo), self._phys(hi - 1) + 1
+        return [(a, b)] if a < b else [(a, self.capacity), (0, b)]
+
+    def window(self, start, end, column="value"):
+        """Values of `column` with start <= ts <= end (ndarray or list)."""
+        lo, hi = self._index(start), self._index(end, right=True)
+        col = self.cols[column]
+        segs = self._segments(lo, hi)
+        if np is not None:
+            view = np.frombuffer(col, dtype=np.float64)
+            parts = [view[a:b] for a, b in segs]
+            return np.concatenate(parts) if len(parts) > 1 else (parts[0] if parts else view[:0])
+        out = []
+        for a, b in segs:
+            out.extend(col[a:b])
+        return out
+
+    def nbytes(self):
+        return self.ts.itemsize * self.capacity + sum(c.itemsize * self.capacity for c in self.cols.values())
+
+
+class _Bucket:
+    """Running aggregate for the downsampling bucket currently being filled."""
+
+    __slots__ = ("start", "count", "total", "lo", "hi")
+
+    def __init__(self, start):
+        self.start = start
+        self.count = 0
+        self.total = 0.0
+        self.lo = math.inf
+        self.hi = -math.inf
+
+    def add(self, count, total, lo, hi):
+        self.count += count
+        self.total += total
+        self.lo = min(self.lo, lo)
+        self.hi = max(self.hi, hi)
+
+
+# ──────────────────────────────────────────────
+# One metric with 1s / 1m / 1h tiers
+# ──────────────────────────────────────────────
+class Series:
+    AGG_COLUMNS = ("avg", "min", "max", "count")
+
+    def __init__(self, raw_capacity, minute_capacity, hour_capacity):
+        self.raw = Ring(raw_capacity)
+        self.minute = Ring(minute_capacity, self.AGG_COLUMNS)
+        self.hour = Ring(hour_capacity, self.AGG_COLUMNS)
+        self._minute_bucket = None
+        self._hour_bucket = None
+
+    def append(self, ts, value):
+        self.raw.append(ts, value)
+        bucket = self._minute_bucket
+        if bucket is not None and 0 <= ts - bucket.start < MINUTE_MS:
+            # Fast path: still inside the current minute
+            bucket.count += 1
+            bucket.total += value
+            if value < bucket.lo:
+                bucket.lo = value
+            if value > bucket.hi:
+                bucket.hi = value
+            return
+        self._minute_bucket = self._roll(self._minute_bucket, self.minute, MINUTE_MS, ts,
+                                         1, value, value, value, self._to_hour)
+
+    def _to_hour(self, bucket):
+        self._hour_bucket = self._roll(self._hour_bucket, self.hour, HOUR_MS, bucket.start,
+                                       bucket.count, bucket.total, bucket.lo, bucket.hi, None)
+
+    @staticmethod
+    def _roll(bucket, ring, width, ts, count, total, lo, hi, on_flush):
+        start = ts - ts % width
+        if bucket is not None and bucket.start != start:
+            ring.append(bucket.start, bucket.total / bucket.count, bucket.lo, bucket.hi, bucket.count)
+            if on_flush:
+                on_flush(bucket)
+            bucket = None
+        if bucket is None:
+            bucket = _Bucket(start)
+        bucket.add(count, total, lo, hi)
+        return bucket
+
+    def open_buckets(self, ring) -> list:
+        """Buckets still being filled whose samples are not in `ring` yet.
+
+        The open minute has not reached the hour tier either, so an hour
+        answer needs both.
+        """
+        if ring is self.minute:
+            buckets = [self._minute_bucket]
+        elif ring is self.hour:
+            buckets = [self._hour_bucket, self._minute_bucket]
+        else:
+            buckets = []
+        return [b for b in buckets if b is not None and b.count]
+
+    def pick_tier(self, start):
+        """Finest tier whose retained history still reaches back to start."""
+        for ring in (self.raw, self.minute):
+            first = ring.first_ts()
+            if first is not None and (first <= start or len(ring) < ring.capacity):
+                return ring
+        return self.hour if len(self.hour) else (self.minute if len(self.minute) else self.raw)
+
+
+# ──────────────────────────────────────────────
+# Store
+# ──────────────────────────────────────────────
+def _stats(ring, start, end, percentiles, open_buckets=()):
+    raw = ring.columns == ("value",)
+    values = ring.window(start, end, "value" if raw else "avg")
+    if raw:
+        lo_vals = hi_vals = values
+        weights = None
+    else:
+        lo_vals = ring.window(start, end, "min")
+        hi_vals = ring.window(start, end, "max")
+        weights = ring.window(start, end, "count")
+        extra = [b for b in open_buckets if start <= b.start <= end]
+        if extra:
+            values = [*values, *(b.total / b.count for b in extra)]
+            lo_vals = [*lo_vals, *(float(b.lo) for b in extra)]
+            hi_vals = [*hi_vals, *(float(b.hi) for b in extra)]
+            weights = [*weights, *(b.count for b in extra)]
+    n = len(values)
+    if not n:
+        return {"count": 0}
+    out = {}
+    if np is not None:
+        out["min"] = float(np.min(lo_vals))
+        out["max"] = float(np.max(hi_vals))
+        out["avg"] = float(np.average(values, weights=weights))
+        out["count"] = int(np.sum(weights)) if weights is not None else n
+        for p in percentiles:
+            out[f"p{p:g}"] = float(np.percentile(values, p))
+        return out
+    out["min"] = min(lo_vals)
+    out["max"] = max(hi_vals)
+    if weights is None:
+        out["avg"] = sum(values) / n
+        out["count"] = n
+    else:
+        total = sum(weights)
+        out["avg"] = sum(v * w for v, w in zip(values, weights)) / total
+        out["count"] = int(total)
+    ordered = sorted(values)
+    for p in percentiles:
+        # Linear interpolation, same as numpy's default
+        k = (n - 1) * p / 100.0
+        f = math.floor(k)
+        c = min(f + 1, n - 1)
+        out[f"p{p:g}"] = ordered[f] + (ordered[c] - ordered[f]) * (k - f)
+    return out
+
+
+class MetricsStore:
+    """Bounded-memory history for many named metrics.
+
+    Defaults keep 1 day of 1s samples, 30 days of 1m aggregates and
+    400 days of 1h aggregates: ~2.5 MiB per metric regardless of uptime.
+    """
+
+    def __init__(self, raw_capacity=86_400, minute_capacity=43_200, hour_capacity=9_600):
+        self.capacities = (raw_capacity, minute_capacity, hour_capacity)
+        self.epoch_ms = int(time.time() * 1000)
+        self.series: dict[str, Series] = {}
+
+    def _delta(self, ts):
+        return int(ts * 1000) - self.epoch_ms
+
+    def record(self, name, value, ts=None):
+        """Append one sample (ts in epoch seconds, default now)."""
+        series = self.series.get(name)
+        if series is None:
+            series = self.series[name] = Series(*self.capacities)
+        series.append(self._delta(time.time() if ts is None else ts), value)
+
+    def record_many(self, values: dict, ts=None):
+        """Append every numeric entry of a flat dict (None values skipped)."""
+        ts = time.time() if ts is None else ts
+        for name, value in values.items():
+            if isinstance(value, (int, float)):
+                self.record(name, value, ts)
+
+    def query(self, name, start=None, end=None, percentiles=(50, 95, 99), tier="auto") -> dict:
+        """min/max/avg/count/percentiles for name over [start, end] epoch seconds.
+
+        tier is "raw", "minute", "hour" or "auto" (finest tier covering start).
+        """
+        series = self.series.get(name)
+        if series is None:
+            raise KeyError(name)
+        start_ms = -(1 << 62) if start is None else self._delta(start)
+        end_ms = (1 << 62) if end is None else self._delta(end)
+        ring = series.pick_tier(start_ms) if tier == "auto" else getattr(series, tier)
+        return _stats(ring, start_ms, end_ms, percentiles, series.open_buckets(ring))
+
+    def names(self):
+        return list(self.series)
+
+    def nbytes(self):
+        return sum(s.raw.nbytes() + s.minute.nbytes() + s.hour.nbytes() for s in self.series.values())
+
+
+# ──────────────────────────────────────────────
+# 💡 Benchmark
+# ──────────────────────────────────────────────
+def _fill_ring(n, base):
+    store = MetricsStore(raw_capacity=n)
+    for i in range(n):
+        store.record("cpu", i % 100, base + i)
+    return store
+
+
+def _fill_list(n, base):
+    rows = []
+    for i in range(n):
+        rows.append({"ts": base + i, "name": "cpu", "value": float(i % 100)})
+    return rows
+
+
+def _measure(fill, n, base):
+    """(object, bytes allocated, seconds) — timed on a second, untraced run."""
+    import tracemalloc
+
+    tracemalloc.start()
+    obj = fill(n, base)
+    mem = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del obj
+    t0 = time.perf_counter()
+    obj = fill(n, base)
+    return obj, mem, time.perf_counter() - t0
+
+
+def benchmark(n=1_000_000):
+    """Memory and append/query time for n samples: ring vs list of dicts."""
+    base = time.time() - n
+    store, ring_mem, append_s = _measure(_fill_ring, n, base)
+    t0 = time.perf_counter()
+    stats = store.query("cpu", base + n // 2, base + n, tier="raw")
+    query_s = time.perf_counter() - t0
+
+    rows, list_mem, list_append_s = _measure(_fill_list, n, base)
+    t0 = time.perf_counter()
+    window = [r["value"] for r in rows if base + n // 2 <= r["ts"] <= base + n]
+    sorted(window)
+    list_query_s = time.perf_counter() - t0
+
+    scale = 1_000_000 / n
+    print(f"backend      : {'numpy' if np is not None else 'array (pure Python)'}")
+    print(f"ring store   : {ring_mem * scale / 2**20:8.1f} MiB / 1M samples, "
+          f"append {append_s / n * 1e9:.0f} ns, window query {query_s * 1000:.1f} ms")
+    print(f"list of dicts: {list_mem * scale / 2**20:8.1f} MiB / 1M samples, "
+          f"append {list_append_s / n * 1e9:.0f} ns, window query {list_query_s * 1000:.1f} ms")
+    print(f"ratio        : {list_mem / ring_mem:.1f}x less memory; p95={stats['p95']:.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ring-buffer metrics store")
+    parser.add_argument("--bench", type=int, default=1_000_000, metavar="N",
+                        help="Samples for the memory benchmark (default: 1,000,000)")
+    benchmark(parser.parse_args().bench)
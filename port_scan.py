@@ -0,0 +1,490 @@
+#!/usr/bin/env python3
+"""
+Port Scan — asyncio TCP connect scanner for host:port inventories
+Author: Vitalie Procopan
+
+Goal:
+    Answer "is this service port accepting connections?" for thousands of
+    host:port pairs at once, without pinging (ICMP says nothing about the
+    port) or sending full HTTP requests.
+
+Features:
+    1️⃣ Targets: host:port lists, host:22,80,8000-8010, CIDR × port ranges (expanded lazily)
+    2️⃣ Thousands of non-blocking connects in flight, capped by the free fds under RLIMIT_NOFILE
+    3️⃣ Connect latency; results classified as open / refused / timeout / unreachable / error
+    4️⃣ NDJSON output streamed as results arrive
+    5️⃣ Self-test against localhost listeners (open, refused and timeout cases)
+    💡 Benchmark against a serial socket.create_connection loop
+"""
+
+import argparse
+import asyncio
+import errno
+import ipaddress
+import json
+import os
+import socket
+import struct
+import sys
+import time
+from dataclasses import asdict, dataclass
+
+import dns_cache
+
+FD_RESERVE = 64  # descriptors kept free for the event loop, stdout, resolver...
+DEFAULT_CONCURRENCY = 4096
+LINGER_RESET = struct.pack("ii", 1, 0)  # SO_LINGER on, 0 s: close() sends RST
+UNREACHABLE = {errno.EHOSTUNREACH, errno.ENETUNREACH, errno.EHOSTDOWN, errno.EADDRNOTAVAIL}
+
+
+# ──────────────────────────────────────────────
+# Result type
+# ──────────────────────────────────────────────
+@dataclass
+class PortResult:
+    host: str
+    port: int
+    address: str | None = None
+    status: str = "error"            # open | refused | timeout | unreachable | error
+    latency_ms: float | None = None  # time to SYN-ACK (open) or RST (refused)
+    error: str | None = None
+
+    @property
+    def open(self) -> bool:
+        return self.status == "open"
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), separators=(",", ":"))
+
+
+# ──────────────────────────────────────────────
+# Targets
+# ──────────────────────────────────────────────
+def parse_ports(spec: str) -> list[int]:
+    """ "22,80,8000-8010" → [22, 80, 8000, ..., 8010]"""
+    ports = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        low, _, high = part.partition("-")
+        first, last = int(low), int(high or low)
+        if not 0 < first <= last <= 65535:
+            raise ValueError(f"invalid port range: {part}")
+        ports.extend(range(first, last + 1))
+    return ports
+
+
+def _split_host_port(spec: str) -> tuple[str, str | None]:
+    if spec.startswith("["):  # [2001:db8::1]:443
+        host, _, rest = spec[1:].partition("]")
+        return host, rest[1:] if rest.startswith(":") else None
+    if spec.count(":") == 1:
+        host, _, ports = spec.partition(":")
+        return host, ports
+    return spec, None  # bare host, or an IPv6 literal without port
+
+
+def iter_targets(specs, default_ports=None):
+    """Yield (host, port) for every spec without materialising CIDR × port products.
+
+    A spec is "host:port", "host:22,80,8000-8010", "10.0.0.0/24:22" or a
+    bare host / CIDR that uses `default_ports` ("80,443" or a list).
+    """
+    if isinstance(default_ports, str):
+        default_ports = parse_ports(default_ports)
+    for spec in specs:
+        spec = spec.strip()
+        if not spec or spec.startswith("#"):
+            continue
+        host, port_spec = _split_host_port(spec)
+        ports = parse_ports(port_spec) if port_spec else default_ports
+        if not ports:
+            raise ValueError(f"no port given for {spec!r} (use host:port or --ports)")
+        if "/" in host:
+            network = ipaddress.ip_network(host, strict=False)
+            hosts = network.hosts() if network.num_addresses > 2 else iter(network)
+            for addr in hosts:
+                for port in ports:
+                    yield str(addr), port
+        else:
+            for port in ports:
+                yield host, port
+
+
+def _open_fds() -> int:
+    try:
+        return len(os.listdir("/proc/self/fd"))
+    except OSError:
+        return 0  # no procfs: only the reserve is held back
+
+
+def fd_budget(requested=None) -> int:
+    """Connections that may be open at once: free descriptors under RLIMIT_NOFILE minus a reserve."""
+    try:
+        import resource
+
+        soft = resource.getrlimit(resource.RLIMIT_NOFILE)[0]
+    except (ImportError, ValueError):
+        soft = 1024
+    return max(1, min(requested or DEFAULT_CONCURRENCY, soft - _open_fds() - FD_RESERVE))
+
+
+# ──────────────────────────────────────────────
+# Async engine
+# ──────────────────────────────────────────────
+class PortScanner:
+    """Connect to many (host, port) pairs concurrently.
+
+    Targets are pulled from the iterator only when a connection slot is
+    free, so neither tasks nor targets pile up in memory however large
+    the sweep is; each in-flight task holds one socket.
+    """
+
+    def __init__(self, timeout=1.0, concurrency=None, linger_reset=True):
+        self.timeout = timeout
+        self.concurrency = fd_budget(concurrency)
+        # RST instead of FIN on close: no TIME_WAIT pile-up on the scanning host
+        self.linger_reset = linger_reset
+        self._addresses: dict[str, tuple] = {}
+
+    async def _resolve(self, loop, host: str):
+        cached = self._addresses.get(host)
+        if cached is not None:
+            if isinstance(cached, Exception):
+                raise cached
+            return cached
+        try:
+            ip = ipaddress.ip_address(host)
+            entry = (socket.AF_INET if ip.version == 4 else socket.AF_INET6, str(ip))
+        except ValueError:
+            try:
+                address = await dns_cache.default_resolver().aresolve_one(host, socket.AF_UNSPEC)
+            except socket.gaierror as e:
+                self._addresses[host] = e
+                raise
+            entry = (socket.AF_INET6 if ":" in address else socket.AF_INET, address)
+        self._addresses[host] = entry
+        return entry
+
+    def _connect(self, loop, sock, address, port) -> asyncio.Future:
+        """Future for a non-blocking connect: resolves to 0 or an errno, or None on timeout.
+
+        Cheaper than wait_for(loop.sock_connect()), which costs an extra
+        task per connection: one writer callback and one timer instead.
+        """
+        fut = loop.create_future()
+        err = sock.connect_ex((address, port))
+        if err != errno.EINPROGRESS:
+            fut.set_result(err)
+            return fut
+        fd = sock.fileno()
+
+        def finish(value):
+            if not fut.done():
+                loop.remove_writer(fd)
+                timer.cancel()
+                fut.set_result(value)
+
+        loop.add_writer(fd, lambda: finish(sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)))
+        timer = loop.call_later(self.timeout, finish, None)
+        return fut
+
+    async def probe(self, loop, host: str, port: int) -> PortResult:
+        result = PortResult(host, port)
+        try:
+            family, result.address = await self._resolve(loop, host)
+        except socket.gaierror as e:
+            result.error = f"resolve failed: {e}"
+            return result
+        try:
+            sock = socket.socket(family, socket.SOCK_STREAM)
+        except OSError as e:  # EMFILE / ENFILE / ENOBUFS: report it, never drop the target
+            result.error = e.strerror or str(e)
+            return result
+        try:
+            sock.setblocking(False)
+            start = time.perf_counter()
+            try:
+                err = await self._connect(loop, sock, result.address, port)
+            except OSError as e:
+                result.error = e.strerror or str(e)
+                return result
+            elapsed = round((time.perf_counter() - start) * 1000.0, 3)
+            if err == 0:
+                result.status, result.latency_ms = "open", elapsed
+                if self.linger_reset:
+                    sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, LINGER_RESET)
+            elif err is None:
+                result.status = "timeout"
+            elif err == errno.ECONNREFUSED:
+                result.status, result.latency_ms = "refused", elapsed
+            else:
+                result.status = "unreachable" if err in UNREACHABLE else "error"
+                result.error = os.strerror(err)
+        finally:
+            sock.close()
+        return result
+
+    async def run(self, targets, on_result=None) -> dict[str, int]:
+        """Scan (host, port) pairs; returns counts per status.
+
+        Results are passed to `on_result` as they complete and are not
+        kept, so arbitrarily large sweeps run in constant memory.
+        """
+        loop = asyncio.get_running_loop()
+        slots = asyncio.Semaphore(self.concurrency)
+        counts: dict[str, int] = {}
+        pending = set()
+
+        def done(task, host, port):
+            pending.discard(task)
+            slots.release()
+            if task.cancelled() or task.exception() is not None:
+                # a bug, not a port state: still one result per target
+                exc = "cancelled" if task.cancelled() else repr(task.exception())
+                res = PortResult(host, port, error=exc)
+            else:
+                res = task.result()
+            counts[res.status] = counts.get(res.status, 0) + 1
+            if on_result:
+                on_result(res)
+
+        for host, port in targets:
+            await slots.acquire()
+            task = loop.create_task(self.probe(loop, host, port))
+            pending.add(task)
+            task.add_done_callback(lambda t, host=host, port=port: done(t, host, port))
+        while pending:
+            await asyncio.wait(set(pending))
+        return counts
+
+
+def scan(targets, timeout=1.0, concurrency=None, on_result=None) -> list[PortResult]:
+    """Synchronous helper: scan and return every result (collects them in memory)."""
+    results = []
+
+    def collect(res):
+        results.append(res)
+        if on_result:
+            on_result(res)
+
+    asyncio.run(PortScanner(timeout, concurrency).run(targets, collect))
+    return results
+
+
+class NdjsonWriter:
+    """One JSON object per line, flushed at most every `interval` seconds."""
+
+    def __init__(self, stream=None, open_only=False, interval=0.1):
+        self.stream = stream or sys.stdout
+        self.open_only = open_only
+        self.interval = interval
+        self._last_flush = time.monotonic()
+
+    def __call__(self, res: PortResult):
+        if self.open_only and not res.open:
+            return
+        self.stream.write(res.to_json() + "\n")
+        now = time.monotonic()
+        if now - self._last_flush >= self.interval:
+            self.stream.flush()
+            self._last_flush = now
+
+
+# ──────────────────────────────────────────────
+# Self-test & benchmark (localhost only)
+# ──────────────────────────────────────────────
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]  # closed again: connects are refused
+
+
+def _full_backlog_listener():
+    """A listener that never accepts, with its backlog already full: SYNs are dropped."""
+    srv = socket.socket()
+    srv.bind(("127.0.0.1", 0))
+    srv.listen(0)
+    fillers = []
+    port = srv.getsockname()[1]
+    for _ in range(8):
+        c = socket.socket()
+        c.setblocking(False)
+        c.connect_ex(("127.0.0.1", port))
+        fillers.append(c)
+    time.sleep(0.05)
+    return srv, fillers
+
+
+def self_test() -> bool:
+    listener = socket.create_server(("127.0.0.1", 0), backlog=512)
+    open_port = listener.getsockname()[1]
+    refused_port = _free_port()
+    stalled, fillers = _full_backlog_listener()
+    stalled_port = stalled.getsockname()[1]
+    checks = []
+
+    def check(name, ok):
+        checks.append(ok)
+        print(f"{'✅' if ok else '❌'} {name}")
+
+    try:
+        check("parse_ports('22,80,8000-8002')", parse_ports("22,80,8000-8002") == [22, 80, 8000, 8001, 8002])
+        check("CIDR × ports expands lazily",
+              list(iter_targets(["127.0.0.0/30:1,2"])) == [("127.0.0.1", 1), ("127.0.0.1", 2),
+                                                           ("127.0.0.2", 1), ("127.0.0.2", 2)])
+        check("[::1]:443 and --ports default",
+              list(iter_targets(["[::1]:443", "h"], "80")) == [("::1", 443), ("h", 80)])
+        specs = [f"127.0.0.1:{open_port}", f"127.0.0.1:{refused_port}", f"127.0.0.1:{stalled_port}",
+                 f"127.0.0.0/28:{open_port}"]
+        by_target = {(r.host, r.port): r for r in scan(iter_targets(specs), timeout=0.5, concurrency=64)}
+        res = by_target[("127.0.0.1", open_port)]
+        check("open port → open with latency", res.status == "open" and res.latency_ms is not None)
+        check("closed port → refused", by_target[("127.0.0.1", refused_port)].status == "refused")
+        check("listener with full backlog → timeout",
+              by_target[("127.0.0.1", stalled_port)].status == "timeout")
+        check("127.0.0.0/28 → 14 hosts scanned",
+              sum(1 for h, p in by_target if p == open_port and h != "127.0.0.1") == 13)
+        check("NDJSON line round-trips", json.loads(res.to_json())["status"] == "open")
+        check("fd budget respected", PortScanner(concurrency=10**9).concurrency <= fd_budget(10**9))
+        import resource
+
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        check("fd budget leaves out descriptors already open",
+              fd_budget(10**9) <= max(1, soft - _open_fds() - FD_RESERVE + 1))
+
+        async def starved():
+            # descriptors run out after the budget was computed: EMFILE on socket()
+            results = []
+            scanner = PortScanner(0.5, concurrency=64)
+            resource.setrlimit(resource.RLIMIT_NOFILE, (_open_fds() + 4, hard))
+            try:
+                await scanner.run([("127.0.0.1", open_port)] * 200, results.append)
+            finally:
+                resource.setrlimit(resource.RLIMIT_NOFILE, (soft, hard))
+            return results
+
+        results = asyncio.run(starved())
+        errors = sum(r.status == "error" for r in results)
+        check(f"EMFILE → 'error' results, none lost ({len(results)}/200, {errors} errors)",
+              len(results) == 200 and errors > 0)
+    finally:
+        listener.close()
+        stalled.close()
+        for c in fillers:
+            c.close()
+    print(f"\n{sum(checks)}/{len(checks)} checks passed")
+    return all(checks)
+
+
+def benchmark(n=4096, concurrency=None, timeout=1.0, filtered=1000):
+    """Localhost only: n open targets (127.0.0.0/8 × one port), then `filtered`
+    targets whose SYNs are dropped (full backlog), async vs a serial loop."""
+    import threading
+
+    listener = socket.create_server(("0.0.0.0", 0), backlog=4096)
+    port = listener.getsockname()[1]
+    targets = [(str(ipaddress.IPv4Address(0x7F000001 + i)), port) for i in range(n)]
+    stop = threading.Event()
+
+    def accept_loop():  # accept and drop, so the backlog never fills
+        listener.settimeout(0.2)
+        while not stop.is_set():
+            try:
+                listener.accept()[0].close()
+            except OSError:
+                pass
+
+    acceptor = threading.Thread(target=accept_loop, daemon=True)
+    acceptor.start()
+    stalled, fillers = _full_backlog_listener()
+    dropped = [("127.0.0.1", stalled.getsockname()[1])] * filtered
+    drop_timeout = 0.25
+    try:
+        scanner = PortScanner(timeout, concurrency)
+        t0 = time.perf_counter()
+        counts = asyncio.run(scanner.run(targets))
+        fast = time.perf_counter() - t0
+        serial_n = min(n, 500)
+        t0 = time.perf_counter()
+        for host, p in targets[:serial_n]:
+            with socket.create_connection((host, p), timeout=timeout):
+                pass
+        serial = (time.perf_counter() - t0) / serial_n * n
+
+        t0 = time.perf_counter()
+        drop_counts = asyncio.run(PortScanner(drop_timeout, concurrency).run(dropped))
+        fast_drop = time.perf_counter() - t0
+        serial_drop = drop_timeout * filtered  # every serial connect waits out its timeout
+    finally:
+        stop.set()
+        acceptor.join()
+        listener.close()
+        stalled.close()
+        for c in fillers:
+            c.close()
+    print(f"{scanner.concurrency} connects in flight")
+    print(f"{n:,} open (localhost)   : {fast:7.3f}s ({n / fast:,.0f}/s) {counts}; "
+          f"serial {serial:.3f}s (speed-up {serial / fast:.1f}x)")
+    print(f"{filtered:,} dropped SYN ({drop_timeout}s): {fast_drop:7.3f}s {drop_counts}; "
+          f"serial {serial_drop:.1f}s (speed-up {serial_drop / fast_drop:.0f}x)")
+
+
+# ──────────────────────────────────────────────
+# MAIN
+# ──────────────────────────────────────────────
+def build_parser(parser):
+    parser.add_argument("targets", nargs="*", metavar="TARGET",
+                        help="host:port, host:22,80,8000-8010, 10.0.0.0/24:22, or host/CIDR with --ports")
+    parser.add_argument("--ports", help="Ports for targets given without one (e.g. 22,80,443,8000-8100)")
+    parser.add_argument("--file", help="Read targets from a file (one per line, # comments)")
+    parser.add_argument("--timeout", type=float, default=1.0, help="Connect timeout in seconds (default: 1)")
+    parser.add_argument("--concurrency", type=int, help="Connects in flight (default: fd budget)")
+    parser.add_argument("--open-only", action="store_true", help="Only print open ports")
+    return parser
+
+
+def run_cli(args) -> int:
+    """Shared by `python port_scan.py` and `devops-tool scan`; exit 1 if nothing is open."""
+    specs = list(args.targets)
+    if args.file:
+        with open(args.file) as f:
+            specs += f.read().splitlines()
+    if not specs:
+        sys.exit("❌ Error: no targets given")
+    try:
+        targets = iter_targets(specs, args.ports)
+        start = time.perf_counter()
+        writer = NdjsonWriter(open_only=args.open_only)
+        counts = asyncio.run(PortScanner(args.timeout, args.concurrency).run(targets, writer))
+    except ValueError as e:
+        sys.exit(f"❌ Error: {e}")
+    sys.stdout.flush()
+    elapsed = time.perf_counter() - start
+    summary = ", ".join(f"{n} {status}" for status, n in sorted(counts.items()))
+    print(f"📊 {sum(counts.values())} targets in {elapsed:.2f}s: {summary or 'none'}", file=sys.stderr)
+    return 0 if counts.get("open") else 1
+
+
+def main():
+    parser = build_parser(argparse.ArgumentParser(description="Asyncio TCP connect scanner (NDJSON output)"))
+    parser.add_argument("--self-test", action="store_true", help="Check against localhost listeners")
+    parser.add_argument("--bench", type=int, metavar="N", help="Benchmark N localhost connects")
+    args = parser.parse_args()
+    if args.self_test:
+        sys.exit(0 if self_test() else 1)
+    if args.bench:
+        benchmark(args.bench, args.concurrency, args.timeout)
+        return
+    sys.exit(run_cli(args))
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        sys.exit("\n🛑 Interrupted by user.")
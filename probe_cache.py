@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Probe Cache — TTL cache for tool/daemon detection shared between processes
+Author: Vitalie Procopan
+
+Goal:
+    Stop forking `docker --version`, `systemctl is-active docker` or
+    `pgrep` on every run when the CLI is called every few seconds from
+    cron or a monitoring agent.
+
+Features:
+    1️⃣ Probe results keyed by (command, binary path, binary inode/mtime) with per-probe TTLs
+    2️⃣ PATH lookups cached via shutil.which, keyed by $PATH
+    3️⃣ Negative cache: a missing binary is answered without forking
+    4️⃣ Small marshal store under ~/.cache, locked and replaced atomically
+       (marshal and os.path only: nothing beyond what the interpreter loads at start-up)
+    💡 Instrumentation: forks done / forks avoided, per process and cumulative
+"""
+
+import argparse
+import atexit
+import marshal
+import os
+import sys
+import threading
+import time
+import zlib
+
+try:
+    import fcntl
+except ImportError:  # Windows: last writer wins, it is only a cache
+    fcntl = None
+
+STORE_VERSION = 2  # 1 was JSON; such a file reads as empty and is replaced
+WHICH_TTL = 300.0  # positive PATH lookups (re-validated with stat on every hit)
+NEGATIVE_TTL = 60.0  # "binary not found", so a fresh install is noticed soon
+VERSION_TTL = 3600.0  # suggested TTLs for callers
+STATUS_TTL = 10.0
+_COUNTERS = ("hits", "misses", "negative_hits", "which_hits", "which_misses", "forks")
+
+
+def default_store_path() -> str:
+    override = os.environ.get("DEVOPS_PROBE_CACHE")
+    if override:
+        return override
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "devops-tool", "probes.bin")
+
+
+class ProbeResult:
+    # A plain class rather than a dataclass: this module sits on the
+    # devops-tool startup path and dataclasses costs ~12 ms to import
+
+    __slots__ = ("cmd", "returncode", "stdout", "stderr", "checked_at", "cached")
+
+    def __init__(self, cmd: list[str], returncode: int, stdout: str = "", stderr: str = "",
+                 checked_at: float = 0.0, cached: bool = False):
+        self.cmd = cmd
+        self.returncode = returncode
+        self.stdout = stdout
+        self.stderr = stderr
+        self.checked_at = checked_at  # time.time() of the fork that produced it
+        self.cached = cached
+
+    def __repr__(self):
+        return f"ProbeResult(cmd={self.cmd!r}, returncode={self.returncode}, cached={self.cached})"
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.checked_at
+
+    @property
+    def output(self) -> str:
+        return self.stdout + self.stderr
+
+
+# ──────────────────────────────────────────────
+# Cache
+# ──────────────────────────────────────────────
+class ProbeCache:
+    """Cache of command results and PATH lookups, persisted to one marshal file.
+
+    A cached result is reused while it is younger than the caller's TTL
+    and the binary at the resolved path has the same inode and mtime,
+    so upgrading docker invalidates `docker --version` immediately.
+    The store is read once per instance and rewritten (under an flock,
+    via os.replace) only after a miss; counters are merged in at exit.
+    """
+
+    def __init__(self, path=None, which_ttl=WHICH_TTL, negative_ttl=NEGATIVE_TTL):
+        self.path = os.fspath(path) if path else default_store_path()
+        self.which_ttl = which_ttl
+        self.negative_ttl = negative_ttl
+        self._data = None
+        self._lock = threading.Lock()
+        self._pending = {}  # key → entry not yet written (which / probes)
+        self.stats = dict.fromkeys(_COUNTERS, 0)
+        self._flushed = dict.fromkeys(_COUNTERS, 0)
+
+    @property
+    def forks_avoided(self) -> int:
+        return self.stats["hits"] + self.stats["negative_hits"]
+
+    # ── store ───────────────────────────────────
+    def _read_store(self) -> dict:
+        try:
+            with open(self.path, "rb") as f:
+                data = marshal.load(f)
+            if data.get("version") == STORE_VERSION:
+                return data
+        except (OSError, ValueError, EOFError, TypeError, AttributeError):
+            pass  # missing, truncated, or not a store written by this version
+        return {"version": STORE_VERSION, "which": {}, "probes": {}, "stats": {}}
+
+    def _store(self) -> dict:
+        if self._data is None:
+            self._data = self._read_store()
+        return self._data
+
+    def flush(self):
+        """Merge pending entries and counter deltas into the on-disk store."""
+        with self._lock:
+            deltas = {k: self.stats[k] - self._flushed[k] for k in _COUNTERS}
+            if not self._pending and not any(deltas.values()):
+                return
+            directory, name = os.path.split(self.path)
+            try:
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with open(os.path.join(directory, f".{name}.lock"), "a") as lf:
+                    if fcntl:
+                        fcntl.flock(lf, fcntl.LOCK_EX)
+                    data = self._read_store()  # another process may have written meanwhile
+                    now = time.time()
+                    for section, key, entry in self._pending.values():
+                        data[section][key] = entry
+                    for section in ("which", "probes"):
+                        data[section] = {k: e for k, e in data[section].items() if e["expires"] > now}
+                    for k, v in deltas.items():
+                        data["stats"][k] = data["stats"].get(k, 0) + v
+                    # Unique among writers holding the lock; tempfile would cost
+                    # ~4 ms of import (random) on every run that bumps a counter
+                    tmp = os.path.join(directory, f".{name}.{os.getpid()}.tmp")
+                    with open(tmp, "wb") as f:
+                        marshal.dump(data, f)
+                    os.replace(tmp, self.path)
+            except OSError:
+                return  # read-only home: keep working without persistence
+            self._data = data
+            self._pending.clear()
+            self._flushed = dict(self.stats)
+
+    def clear(self):
+        with self._lock:
+            self._data = {"version": STORE_VERSION, "which": {}, "probes": {}, "stats": {}}
+            self._pending.clear()
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+
+    def _remember(self, section, key, entry):
+        with self._lock:
+            self._store()[section][key] = entry
+            self._pending[(section, key)] = (section, key, entry)
+
+    # ── PATH lookups ────────────────────────────
+    def which(self, name: str) -> str | None:
+        """shutil.which(name), cached per $PATH; None is cached too (negative_ttl)."""
+        if os.sep in name or (os.altsep and os.altsep in name):
+            return name if os.access(name, os.X_OK) else None
+        env_path = os.environ.get("PATH", os.defpath)
+        key = f"{zlib.crc32(env_path.encode()):08x}:{name}"
+        entry = self._store()["which"].get(key)
+        now = time.time()
+        if entry and entry["expires"] > now and (entry["path"] is None or os.path.exists(entry["path"])):
+            self.stats["which_hits"] += 1
+            return entry["path"]
+        self.stats["which_misses"] += 1
+        import shutil  # only needed on a miss
+
+        found = shutil.which(name, path=env_path)
+        ttl = self.which_ttl if found else self.negative_ttl
+        self._remember("which", key, {"path": found, "expires": now + ttl})
+        return found
+
+    # ── probes ──────────────────────────────────
+    def _probe_key(self, cmd, binary):
+        st = os.stat(binary)
+        return "\0".join([binary, str(st.st_ino), str(st.st_mtime_ns), *cmd])
+
+    def lookup(self, cmd: list[str], ttl: float) -> tuple[str | None, ProbeResult | None]:
+        """Return (key, result). A result means no fork is needed; key is
+        what store() wants after running the command (None = not cacheable)."""
+        binary = self.which(cmd[0])
+        if binary is None:
+            self.stats["negative_hits"] += 1
+            return None, ProbeResult(list(cmd), 127, stderr=f"{cmd[0]}: command not found",
+                                     checked_at=time.time(), cached=True)
+        try:
+            key = self._probe_key(cmd, binary)
+        except OSError:
+            return None, None
+        entry = self._store()["probes"].get(key)
+        if entry and ttl > 0 and entry["checked_at"] + ttl > time.time():
+            self.stats["hits"] += 1
+            return key, ProbeResult(list(cmd), entry["returncode"], entry["stdout"], entry["stderr"],
+                                    entry["checked_at"], cached=True)
+        self.stats["misses"] += 1
+        return key, None
+
+    def store(self, key: str | None, result: ProbeResult, ttl: float):
+        """Record a freshly forked result (counts one fork)."""
+        self.stats["forks"] += 1
+        if key is None or ttl <= 0:
+            return
+        self._remember("probes", key, {
+            "returncode": result.returncode, "stdout": result.stdout, "stderr": result.stderr,
+            "checked_at": result.checked_at, "expires": result.checked_at + ttl,
+        })
+        self.flush()
+
+    def run(self, cmd: list[str], ttl: float = VERSION_TTL, timeout: float = 10.0) -> ProbeResult:
+        """Cached subprocess.run(cmd); ttl=0 always forks (and does not store)."""
+        key, result = self.lookup(cmd, ttl)
+        if result is not None:
+            return result
+        import subprocess  # only needed on a miss
+
+        now = time.time()
+        try:
+            proc = subprocess.run(cmd, text=True, capture_output=True, timeout=timeout, check=False)
+            result = ProbeResult(list(cmd), proc.returncode, proc.stdout, proc.stderr, now)
+        except FileNotFoundError:
+            result = ProbeResult(list(cmd), 127, stderr=f"{cmd[0]}: command not found", checked_at=now)
+        except subprocess.TimeoutExpired:
+            self.stats["forks"] += 1
+            return ProbeResult(list(cmd), 124, stderr=f"timed out after {timeout}s", checked_at=now)
+        self.store(key, result, ttl)
+        return result
+
+    def summary(self) -> dict:
+        """Per-process counters plus the cumulative ones from the store."""
+        stats = dict(self.stats)
+        stats["forks_avoided"] = self.forks_avoided
+        total = {k: self._read_store()["stats"].get(k, 0) + self.stats[k] - self._flushed[k]
+                 for k in _COUNTERS}
+        total["forks_avoided"] = total["hits"] + total["negative_hits"]
+        return {"process": stats, "total": total}
+
+
+_DEFAULT = None
+
+
+def default_cache() -> ProbeCache:
+    """Process-wide cache; its counters are flushed to the store at exit."""
+    global _DEFAULT
+    if _DEFAULT is None:
+        _DEFAULT = ProbeCache()
+        atexit.register(_DEFAULT.flush)
+    return _DEFAULT
+
+
+def probe(cmd: list[str], ttl: float = VERSION_TTL, timeout: float = 10.0) -> ProbeResult:
+    """Run cmd through the process-wide cache."""
+    return default_cache().run(cmd, ttl, timeout)
+
+
+# ──────────────────────────────────────────────
+# 💡 Benchmark
+# ──────────────────────────────────────────────
+def benchmark(runs=200):
+    import shutil
+    import subprocess
+    import tempfile
+
+    tmp = tempfile.mkdtemp(prefix="probe-cache-")
+    store = os.path.join(tmp, "probes.bin")
+    cmd = ["uname", "-a"]
+    try:
+        t0 = time.perf_counter()
+        for _ in range(runs):
+            subprocess.run(cmd, capture_output=True, check=False)
+        forked = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        for _ in range(runs):
+            # A fresh instance each time, like one cron invocation per run
+            ProbeCache(store).run(cmd, ttl=60)
+        cached = time.perf_counter() - t0
+        missing = ProbeCache(store)
+        for _ in range(runs):
+            missing.run(["surely-not-installed-tool", "--version"])
+        print(f"{runs} probes of {' '.join(cmd)}")
+        print(f"{'fork every time':<18}: {forked * 1000:8.1f} ms ({forked / runs * 1e6:6.0f} µs/probe)")
+        print(f"{'probe cache':<18}: {cached * 1000:8.1f} ms ({cached / runs * 1e6:6.0f} µs/probe)")
+        print(f"missing binary    : {missing.stats['negative_hits']} answers, {missing.stats['forks']} forks")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+# ──────────────────────────────────────────────
+# MAIN
+# ──────────────────────────────────────────────
+def main():
+    parser = argparse.ArgumentParser(description="Cached tool/daemon probes")
+    parser.add_argument("cmd", nargs=argparse.REMAINDER,
+                        help="Command to probe, after the options (e.g. --stats docker --version)")
+    parser.add_argument("--ttl", type=float, default=VERSION_TTL, help="Max age of a reused result in seconds")
+    parser.add_argument("--stats", action="store_true", help="Show fork counters")
+    parser.add_argument("--clear", action="store_true", help="Delete the on-disk store")
+    parser.add_argument("--bench", type=int, metavar="N", help="Benchmark N probes, forked vs cached")
+    args = parser.parse_args()
+
+    cache = default_cache()
+    if args.bench:
+        benchmark(args.bench)
+    elif args.clear:
+        cache.clear()
+        print(f"🧹 Cleared {cache.path}")
+    elif args.cmd:
+        res = cache.run(args.cmd, args.ttl)
+        source = f"cached, {res.age:.0f}s old" if res.cached else "forked"
+        print(res.output.rstrip())
+        print(f"↩️  exit {res.returncode} ({source})")
+    if args.stats:
+        for scope, counters in cache.summary().items():
+            print(f"{scope:<8}: " + ", ".join(f"{k}={v}" for k, v in counters.items()))
+    elif not (args.bench or args.clear or args.cmd):
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,10 +3,16 @@ from setuptools import setup, find_packages
 setup(
     name="devops_tool",
     version="1.0.0",
-    py_modules=["day7_devops_cli"],
+    py_modules=["day7_devops_cli", "metric_log", "log_pipeline", "log_follow", "probe_cache",
+                "docker_api", "devops_tool", "devops_daemon",
+                # modules behind the devops-tool subcommands
+                "sysinfo", "du_scan", "env_snapshot", "metrics_store", "stage2_system", "log_scan",
+                "day5_networking", "stage6_concurrency", "fleet_ping", "http_checker", "ssh_pool",
+                "proc_top", "port_scan", "config_loader", "dns_cache", "bench_suite",
+                "telemetry"],
     entry_points={
         "console_scripts": [
-            "devops-tool = day7_devops_cli:main",
+            "devops-tool = devops_tool:main",
         ],
     },
 )
\ No newline at end of file
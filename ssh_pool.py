@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+"""
+SSH Pool — persistent Paramiko sessions
+Author: Vitalie Procopan
+
+Goal:
+    Pay the SSH handshake and key exchange once per host, not once per
+    command.
+
+Features:
+    1️⃣ Long-lived sessions keyed by (host, port, user, key)
+    2️⃣ Idle eviction and transport health checks
+    3️⃣ Many commands per host as separate channels over one transport
+    4️⃣ stdout and stderr drained together, so chatty stderr never stalls a command
+    💡 --self-test against a local paramiko stand-in server (N commands → 1 handshake)
+"""
+
+import argparse
+import os
+import select
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+
+import paramiko
+
+import dns_cache
+
+READ_CHUNK = 32768
+
+
+@dataclass
+class CommandResult:
+    host: str
+    command: str
+    exit_status: int | None = None
+    stdout: str = ""
+    stderr: str = ""
+    error: str | None = None
+    elapsed_ms: float | None = None  # channel open → exit status, for this command alone
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and self.exit_status == 0
+
+
+class _Session:
+    __slots__ = ("client", "last_used", "last_checked", "lock")
+
+    def __init__(self, client):
+        self.client = client
+        self.last_used = self.last_checked = time.monotonic()
+        self.lock = threading.Lock()
+
+
+# ──────────────────────────────────────────────
+# Session pool
+# ──────────────────────────────────────────────
+class SSHSessionPool:
+    """Thread-safe pool of connected paramiko.SSHClient objects.
+
+    Sessions idle for longer than `idle_timeout` seconds are closed on
+    the next pool access (or by `evict_idle()`); sessions idle for longer
+    than `health_interval` are probed with an SSH_MSG_IGNORE before reuse.
+    """
+
+    def __init__(self, idle_timeout=300.0, health_interval=30.0, connect_timeout=5.0,
+                 max_channels=8, missing_host_key_policy=None):
+        self.idle_timeout = idle_timeout
+        self.health_interval = health_interval
+        self.connect_timeout = connect_timeout
+        self.max_channels = max_channels
+        self.missing_host_key_policy = missing_host_key_policy or paramiko.AutoAddPolicy()
+        self.handshakes = 0
+        self._sessions: dict[tuple, _Session] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(host, user="root", key_file=None, port=22) -> tuple:
+        name, sep, port_text = host.rpartition(":")
+        if sep and port_text.isdigit() and ":" not in name:  # "host:2222"
+            host, port = name, int(port_text)
+        if key_file:
+            key_file = os.path.expanduser(key_file)
+        return host, port, user, key_file
+
+    # ── lifecycle ───────────────────────────────
+    def _connect(self, key) -> paramiko.SSHClient:
+        host, port, user, key_file = key
+        client = paramiko.SSHClient()
+        client.set_missing_host_key_policy(self.missing_host_key_policy)
+        # Cached address for the TCP connect; host keys are still checked against `host`
+        sock = dns_cache.create_connection(host, port, self.connect_timeout)
+        # Channel opens and exec requests are small writes: with Nagle each one
+        # waits for the peer's delayed ACK (~40 ms per command on a pooled session)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        client.connect(
+            hostname=host, port=port, username=user, key_filename=key_file, sock=sock,
+            timeout=self.connect_timeout, banner_timeout=self.connect_timeout,
+            auth_timeout=self.connect_timeout,
+        )
+        # Keepalives stop NAT/firewalls from dropping idle pooled sessions
+        client.get_transport().set_keepalive(30)
+        self.handshakes += 1
+        return client
+
+    def _healthy(self, session: _Session) -> bool:
+        transport = session.client.get_transport()
+        if transport is None or not transport.is_active():
+            return False
+        if time.monotonic() - session.last_checked > self.health_interval:
+            try:
+                transport.send_ignore()
+            except (EOFError, OSError, paramiko.SSHException):
+                return False
+            session.last_checked = time.monotonic()
+        return True
+
+    def _session(self, key) -> _Session:
+        self.evict_idle()
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = self._sessions[key] = _Session(None)
+        # Per-key lock: concurrent callers for one host share one handshake
+        with session.lock:
+            if session.client is None or not self._healthy(session):
+                if session.client is not None:
+                    session.client.close()
+                session.client = None
+                session.client = self._connect(key)
+                session.last_checked = time.monotonic()
+            session.last_used = time.monotonic()
+        return session
+
+    def get(self, host, user="root", key_file=None, port=22) -> paramiko.SSHClient:
+        """Return a connected client for host, reusing a pooled session if possible."""
+        return self._session(self.make_key(host, user, key_file, port)).client
+
+    def discard(self, host, user="root", key_file=None, port=22):
+        """Drop a pooled session, e.g. after a transport error."""
+        with self._lock:
+            session = self._sessions.pop(self.make_key(host, user, key_file, port), None)
+        if session and session.client:
+            session.client.close()
+
+    def evict_idle(self):
+        """Close sessions unused for longer than idle_timeout."""
+        cutoff = time.monotonic() - self.idle_timeout
+        with self._lock:
+            stale = [k for k, s in self._sessions.items()
+                     if s.client is not None and s.last_used < cutoff and not s.lock.locked()]
+            closing = [self._sessions.pop(k) for k in stale]
+        for session in closing:
+            session.client.close()
+
+    def close(self):
+        with self._lock:
+            sessions, self._sessions = list(self._sessions.values()), {}
+        for session in sessions:
+            if session.client:
+                session.client.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ── command execution ───────────────────────
+    def run_many(self, host, commands, user="root", key_file=None, port=22, timeout=30.0):
+        """Run commands concurrently as separate channels over one transport."""
+        results = [CommandResult(host, c) for c in commands]
+        try:
+            transport = self.get(host, user, key_file, port).get_transport()
+        except Exception as e:
+            for r in results:
+                r.error = str(e) or e.__class__.__name__
+            return results
+
+        # Open at most max_channels at a time; each batch runs in parallel remotely
+        for start in range(0, len(results), self.max_channels):
+            batch = results[start:start + self.max_channels]
+            channels = []
+            for res in batch:
+                started = time.perf_counter()
+                try:
+                    chan = transport.open_session(timeout=self.connect_timeout)
+                    chan.settimeout(timeout)
+                    chan.exec_command(res.command)
+                    channels.append((res, chan, started))
+                except Exception as e:
+                    res.error = str(e) or e.__class__.__name__
+            try:
+                self._collect(channels, timeout)
+            finally:
+                for _, chan, _ in channels:
+                    chan.close()
+        if any(r.error for r in results) and not transport.is_active():
+            self.discard(host, user, key_file, port)
+        return results
+
+    def run(self, host, command, user="root", key_file=None, port=22, timeout=30.0) -> CommandResult:
+        return self.run_many(host, [command], user, key_file, port, timeout)[0]
+
+    @staticmethod
+    def _collect(channels, timeout):
+        """Read stdout and stderr of every channel together until EOF.
+
+        Both streams share one flow-control window: reading stdout to EOF
+        first would leave a command that fills the window with stderr
+        blocked until the timeout.
+        """
+        pending = {chan: (res, started, [], []) for res, chan, started in channels}
+        deadline = time.monotonic() + timeout
+        while pending:
+            remaining = deadline - time.monotonic()
+            ready = select.select(list(pending), [], [], remaining)[0] if remaining > 0 else []
+            if not ready:
+                for res, _, _, _ in pending.values():
+                    res.error = "timeout"
+                return
+            for chan in ready:
+                res, started, out, err = pending[chan]
+                try:
+                    # Data always precedes EOF, so draining after seeing EOF gets all of it
+                    done = chan.eof_received or chan.closed
+                    while chan.recv_stderr_ready():
+                        err.append(chan.recv_stderr(READ_CHUNK))
+                    while chan.recv_ready():
+                        out.append(chan.recv(READ_CHUNK))
+                    if not done:
+                        continue
+                    res.stdout = b"".join(out).decode(errors="replace").strip()
+                    res.stderr = b"".join(err).decode(errors="replace").strip()
+                    res.exit_status = chan.recv_exit_status()
+                    res.elapsed_ms = (time.perf_counter() - started) * 1000
+                except Exception as e:
+                    res.error = str(e) or e.__class__.__name__
+                del pending[chan]
+
+
+# Shared by stage6_concurrency helpers so sessions survive across calls
+DEFAULT_POOL = SSHSessionPool()
+
+
+# ──────────────────────────────────────────────
+# Local stand-in server
+# ──────────────────────────────────────────────
+def _standin_reply(command: str) -> tuple[bytes, bytes, int]:
+    return b"standin\n", b"", 0
+
+
+class StandInSSH:
+    """Paramiko SSH server on 127.0.0.1 that accepts any public key.
+
+    Each exec request is answered by `handler(command) -> (stdout, stderr,
+    exit_status)`; by default "standin" and exit status 0, so benchmarks
+    measure the client side: pool, transport and channels. `handshakes`
+    counts accepted transports.
+    """
+
+    def __init__(self, host_key, handler=_standin_reply):
+        self.host_key = host_key
+        self.handler = handler
+        self.sock = socket.create_server(("127.0.0.1", 0), backlog=64)
+        self.port = self.sock.getsockname()[1]
+        self.transports = []
+
+    @property
+    def handshakes(self) -> int:
+        return len(self.transports)
+
+    def __enter__(self):
+        threading.Thread(target=self._accept, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.sock.close()
+        for transport in self.transports:
+            transport.close()
+
+    def _accept(self):
+        handler = self.handler
+
+        class Server(paramiko.ServerInterface):
+            def get_allowed_auths(self, username):
+                return "publickey"
+
+            def check_auth_publickey(self, username, key):
+                return paramiko.AUTH_SUCCESSFUL
+
+            def check_channel_request(self, kind, chanid):
+                if kind == "session":
+                    return paramiko.OPEN_SUCCEEDED
+                return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+            def check_channel_exec_request(self, channel, command):
+                threading.Thread(target=self._reply, args=(channel, command), daemon=True).start()
+                return True
+
+            @staticmethod
+            def _reply(channel, command):
+                out, err, status = handler(command.decode(errors="replace"))
+                # Blocks while the client's window is full, like a real remote process
+                if err:
+                    channel.sendall_stderr(err)
+                if out:
+                    channel.sendall(out)
+                channel.send_exit_status(status)
+                # EOF, not close: a close can overtake the exec acknowledgement
+                # and fail the client's exec_command; the client closes the channel
+                channel.shutdown_write()
+
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)  # as sshd does
+            transport = paramiko.Transport(conn)
+            transport.add_server_key(self.host_key)
+            transport.start_server(server=Server())
+            self.transports.append(transport)
+
+
+# ──────────────────────────────────────────────
+# Self-test
+# ──────────────────────────────────────────────
+def _test_reply(command: str) -> tuple[bytes, bytes, int]:
+    """echo <text> | stderr <bytes> | exit <status>"""
+    verb, _, arg = command.partition(" ")
+    if verb == "echo":
+        return arg.encode() + b"\n", b"", 0
+    if verb == "stderr":
+        return b"done\n", b"e" * int(arg), 0
+    if verb == "exit":
+        return b"", b"", int(arg)
+    return b"", f"{verb}: command not found\n".encode(), 127
+
+
+def self_test(commands=20) -> bool:
+    checks = []
+
+    def check(name, ok):
+        checks.append(ok)
+        print(f"{'✅' if ok else '❌'} {name}")
+
+    tmp = tempfile.mkdtemp(prefix="ssh-pool-test-")
+    key_file = os.path.join(tmp, "id_rsa")
+    paramiko.RSAKey.generate(2048).write_private_key_file(key_file)
+    try:
+        with StandInSSH(paramiko.RSAKey.generate(2048), _test_reply) as server, \
+                SSHSessionPool(missing_host_key_policy=paramiko.AutoAddPolicy()) as pool:
+            host = f"127.0.0.1:{server.port}"
+            cmds = [f"echo {i}" for i in range(commands)]
+            start = time.perf_counter()
+            results = pool.run_many(host, cmds, user="test", key_file=key_file, timeout=5.0)
+            wall_ms = (time.perf_counter() - start) * 1000
+            check(f"{commands} commands → outputs in order",
+                  [r.stdout for r in results] == [str(i) for i in range(commands)] and all(r.ok for r in results))
+            check("each command timed on its own channel (within the batch's wall time)",
+                  all(r.elapsed_ms is not None and 0 < r.elapsed_ms <= wall_ms for r in results))
+            threads = [threading.Thread(target=pool.run_many, args=(host, cmds[:4]),
+                                        kwargs={"user": "test", "key_file": key_file}) for _ in range(4)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            res = pool.run(host, "exit 3", user="test", key_file=key_file)
+            check(f"{commands + 17} commands from 5 threads → 1 handshake",
+                  server.handshakes == 1 and pool.handshakes == 1)
+            check("exit status passed through", res.exit_status == 3 and not res.ok)
+            start = time.perf_counter()
+            res = pool.run(host, "stderr 4000000", user="test", key_file=key_file, timeout=5.0)
+            check(f"4 MB of stderr does not stall stdout ({(time.perf_counter() - start) * 1000:.0f} ms)",
+                  res.ok and res.stdout == "done" and len(res.stderr) == 4000000)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    print(f"\n{sum(checks)}/{len(checks)} checks passed")
+    return all(checks)
+
+
+# ──────────────────────────────────────────────
+# MAIN
+# ──────────────────────────────────────────────
+def main():
+    parser = argparse.ArgumentParser(description="Persistent Paramiko SSH session pool")
+    parser.add_argument("--self-test", action="store_true", help="Check against a local stand-in server")
+    args = parser.parse_args()
+    if args.self_test:
+        sys.exit(0 if self_test() else 1)
+    parser.print_help()
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        sys.exit("\n🛑 Interrupted by user.")
@@ -30,6 +30,14 @@ def count_log_files(path="."):
             print("   -", os.path.basename(f))
     print()
 
+def summarize_logs(path=".", tail=3):
+    """Recursive log summary: line/level counts and last lines (see log_scan)."""
+    from log_scan import print_report, scan_logs
+
+    print(f"🔎 Scanning logs under {os.path.abspath(path)}")
+    print_report(scan_logs(path, tail=tail), tail)
+    print()
+
 def create_and_delete_temp_file():
     print("🧪 Creating and deleting a temporary file...")
     with tempfile.NamedTemporaryFile(delete=False, suffix=".tmp") as tmp:
@@ -43,4 +51,5 @@ if __name__ == "__main__":
     show_system_info()
     list_files(".")        # or change to '/tmp' if available
     count_log_files(".")   # count .log files in current directory
+    summarize_logs(".")    # line / level counts for every .log under "."
     create_and_delete_temp_file()
\ No newline at end of file
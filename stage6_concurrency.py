@@ -9,23 +9,30 @@ Goal:
 Features:
     1️⃣ Parallel ping of multiple hosts
     2️⃣ Fetch multiple URLs concurrently
-    3️⃣ Parallel SSH info gathering using Paramiko
+    3️⃣ Parallel SSH info gathering using pooled Paramiko sessions
 """
 
 import subprocess
 import platform
 import re
-import requests
-import paramiko
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+# asyncio, requests and paramiko (via ssh_pool) are imported inside the
+# task that needs them: pinging must not pay for the SSH stack.
+
 # ──────────────────────────────────────────────
 # 1️⃣ Parallel Ping of Multiple Hosts
 # ──────────────────────────────────────────────
 def ping_host(host):
     """Ping one host and return latency or status."""
+    import dns_cache
+
+    try:
+        address = dns_cache.default_resolver().resolve_one(host)
+    except OSError:
+        return f"❌ {host} unresolvable"
     system = platform.system()
-    cmd = ["ping", "-c", "1", host] if system != "Windows" else ["ping", "-n", "1", host]
+    cmd = ["ping", "-c", "1", address] if system != "Windows" else ["ping", "-n", "1", address]
     try:
         result = subprocess.run(cmd, text=True, capture_output=True, timeout=5)
         if result.returncode == 0:
@@ -39,12 +46,24 @@ def ping_host(host):
     except Exception as e:
         return f"❌ {host} error: {e}"
 
-def parallel_ping(hosts):
+def parallel_ping(hosts, count=1, timeout=1.0):
+    """Ping all hosts from one asyncio ICMP socket (see fleet_ping).
+
+    Falls back to one `ping` subprocess per host via ping_host when
+    no ICMP socket can be opened.
+    """
+    import asyncio
+    import fleet_ping
+
     print("\n🌐 Parallel Ping Test\n────────────────────────")
-    with ThreadPoolExecutor(max_workers=5) as executor:
-        futures = {executor.submit(ping_host, h): h for h in hosts}
-        for f in as_completed(futures):
-            print(f.result())
+    try:
+        pinger = fleet_ping.FleetPinger(count=count, timeout=timeout)
+        return asyncio.run(pinger.run(hosts, on_result=lambda r: print(fleet_ping.format_result(r))))
+    except fleet_ping.IcmpUnavailable:
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            futures = {executor.submit(ping_host, h): h for h in hosts}
+            for f in as_completed(futures):
+                print(f.result())
 
 
 # ──────────────────────────────────────────────
@@ -52,40 +71,78 @@ def parallel_ping(hosts):
 # ──────────────────────────────────────────────
 def fetch_url(url):
     """Fetch URL and return status code or error."""
-    try:
-        resp = requests.get(url, timeout=5)
-        return f"{url} → {resp.status_code}"
-    except requests.exceptions.RequestException as e:
-        return f"{url} → ❌ {e.__class__.__name__}"
+    import dns_cache
+    import requests
+    import telemetry
+
+    dns_cache.install()  # once per process; later calls find it in place
+    with telemetry.span("fetch_url") as span:
+        try:
+            resp = requests.get(url, timeout=5)
+            return f"{url} → {resp.status_code}"
+        except requests.exceptions.RequestException as e:
+            span.fail()
+            return f"{url} → ❌ {e.__class__.__name__}"
+
+def parallel_fetch(urls, concurrency=64, per_host=8):
+    """Check URLs over pooled keep-alive connections (see http_checker)."""
+    import http_checker
 
-def parallel_fetch(urls):
     print("\n🔗 Parallel URL Fetch\n────────────────────────")
-    with ThreadPoolExecutor(max_workers=5) as executor:
-        futures = {executor.submit(fetch_url, u): u for u in urls}
-        for f in as_completed(futures):
-            print(f.result())
+    return http_checker.check_urls(
+        urls,
+        on_result=lambda r: print(f"{r.url} → ❌ {r.error}" if r.error else f"{r.url} → {r.status}"),
+        concurrency=concurrency,
+        per_host=per_host,
+    )
 
 
 # ──────────────────────────────────────────────
 # 3️⃣ Parallel SSH Info Gathering
 # ──────────────────────────────────────────────
-def get_remote_info(host, user="root", key_file=None, cmd="hostname"):
-    """Gather basic info via SSH using Paramiko."""
-    try:
-        ssh = paramiko.SSHClient()
-        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        ssh.connect(hostname=host, username=user, key_filename=key_file, timeout=5)
-        stdin, stdout, stderr = ssh.exec_command(cmd)
-        output = stdout.read().decode().strip()
-        ssh.close()
-        return f"✅ {host}: {output}"
-    except Exception as e:
-        return f"❌ {host}: {e}"
+def get_remote_info(host, user="root", key_file=None, cmd="hostname", pool=None):
+    """Gather basic info via SSH, reusing a pooled Paramiko session."""
+    import ssh_pool
+    import telemetry
+
+    pool = pool or ssh_pool.DEFAULT_POOL
+    with telemetry.span("get_remote_info") as span:
+        res = pool.run(host, cmd, user=user, key_file=key_file)
+        if res.error:
+            span.fail()
+            return f"❌ {host}: {res.error}"
+    return f"✅ {host}: {res.stdout}"
+
+def run_remote_commands(host, cmds, user="root", key_file=None, pool=None):
+    """Run several commands on one host as channels over a single transport."""
+    import ssh_pool
+
+    pool = pool or ssh_pool.DEFAULT_POOL
+    lines = []
+    for res in pool.run_many(host, cmds, user=user, key_file=key_file):
+        if res.error:
+            lines.append(f"❌ {host} [{res.command}]: {res.error}")
+        else:
+            lines.append(f"✅ {host} [{res.command}]: {res.stdout}")
+    return "\n".join(lines)
+
+def parallel_ssh(hosts, user="root", key_file="~/.ssh/id_rsa", cmd="hostname", pool=None):
+    """Run `cmd` on every host.
+
+    `cmd` may be a single command, a list of commands for every host, or
+    a dict mapping host → list of commands.
+    """
+    import ssh_pool
 
-def parallel_ssh(hosts, user="root", key_file="~/.ssh/id_rsa", cmd="hostname"):
     print("\n🔐 Parallel SSH Info Gathering\n────────────────────────")
+    pool = pool or ssh_pool.DEFAULT_POOL
+    if isinstance(cmd, dict):
+        plan = {h: cmd.get(h, []) for h in hosts}
+    else:
+        plan = {h: [cmd] if isinstance(cmd, str) else list(cmd) for h in hosts}
     with ThreadPoolExecutor(max_workers=5) as executor:
-        futures = {executor.submit(get_remote_info, h, user, key_file, cmd): h for h in hosts}
+        futures = {executor.submit(run_remote_commands, h, cmds, user, key_file, pool): h
+                   for h, cmds in plan.items() if cmds}
         for f in as_completed(futures):
             print(f.result())
 
@@ -109,7 +166,7 @@ def main():
     parallel_fetch(urls)
 
     ##ssh_hosts = ["server1.domain.com"]
-    ##parallel_ssh(ssh_hosts, user="root", key_file="/Users/vprocopan/.ssh/id_rsa", cmd="uptime")
+    ##parallel_ssh(ssh_hosts, user="root", key_file="/Users/vprocopan/.ssh/id_rsa", cmd=["uptime", "df -h /"])
 
     print("\n✅ All concurrent tasks completed.\n")
 
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Startup Bench — devops-tool startup time with a regression budget
+Author: Vitalie Procopan
+
+Goal:
+    Keep the `devops-tool` entry point fast: agents start it thousands
+    of times a day, so every eagerly imported module is paid for on
+    every run.
+
+Features:
+    1️⃣ Wall clock per subcommand (best of N runs, minus a bare interpreter run alongside)
+    2️⃣ `-X importtime` parsing: heaviest imports per subcommand
+    3️⃣ Modules that must never load at startup (yaml, requests, paramiko, asyncio, ...)
+    4️⃣ Budget per subcommand; exit status 1 on a regression (CI friendly)
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+CLI = str(HERE / "day7_devops_cli.py")
+TOOL = str(HERE / "devops_tool.py")  # console entry point: daemon check, then CLI
+
+# name → (argv after the interpreter, budget in ms above a bare `python -c pass`).
+# Budgets are what the command may cost, not what it costs today: an import
+# that slips back onto a startup path (pathlib, json, tempfile, dataclasses,
+# shutil, platform: 2-8 ms each) should turn the gate red
+TARGETS = {
+    "import": (["-c", "import day7_devops_cli"], 30.0),
+    "--help": ([CLI, "--help"], 40.0),
+    "--info": ([CLI, "--info"], 45.0),
+    "--check-docker": ([CLI, "--check-docker"], 45.0),
+    "follow --help": ([CLI, "follow", "--help"], 40.0),
+    "devops-tool --info": ([TOOL, "--info"], 50.0),
+}
+# Heavy dependencies that only specific subcommands may load
+FORBIDDEN = ("yaml", "requests", "paramiko", "asyncio", "ssl", "http.client", "numpy")
+
+
+def _env(tmp: Path) -> dict:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(HERE), env.get("PYTHONPATH")]))
+    env["DEVOPS_PROBE_CACHE"] = str(tmp / "probes.bin")
+    env["DEVOPS_DAEMON_SOCKET"] = str(tmp / "no-daemon.sock")  # measure the local fallback
+    return env
+
+
+def wall_ms(argv, runs, cwd, env) -> list[float]:
+    """Wall-clock milliseconds of `runs` executions (after one untimed warm-up)."""
+    return paired_ms(argv, None, runs, cwd, env)[0]
+
+
+def paired_ms(argv, other, runs, cwd, env) -> tuple[list[float], list[float]]:
+    """Alternate runs of argv and other, so both see the same machine load."""
+    times = ([], [])
+    for i in range(runs + 1):
+        for argv_, out in ((argv, times[0]), (other, times[1])):
+            if argv_ is None:
+                continue
+            t0 = time.perf_counter()
+            subprocess.run([sys.executable, *argv_], cwd=cwd, env=env,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+            if i:
+                out.append((time.perf_counter() - t0) * 1000.0)
+    return times
+
+
+def import_times(argv, cwd, env) -> dict[str, tuple[float, int]]:
+    """{module: (cumulative ms, depth)} from one `python -X importtime` run."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", *argv], cwd=cwd, env=env,
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=False)
+    modules = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules[name.strip()] = (int(cumulative) / 1000.0, depth)
+    return modules
+
+
+def run(runs=15, top=5, scale=1.0, as_json=False) -> bool:
+    tmp = Path(tempfile.mkdtemp(prefix="startup-bench-"))
+    env = _env(tmp)
+    report = {}
+    try:
+        bare = []
+        base_modules = set(import_times(["-c", "pass"], tmp, env))
+        for name, (argv, budget) in TARGETS.items():
+            # Noise only ever adds time, so compare the best runs; each target
+            # gets its own interleaved bare runs so load drift cancels out
+            times, bare_times = paired_ms(argv, ["-c", "pass"], runs, tmp, env)
+            bare += bare_times
+            modules = import_times(argv, tmp, env)
+            own = {m: v for m, v in modules.items() if m not in base_modules}
+            heaviest = sorted(((m, ms) for m, (ms, depth) in own.items() if depth == 1),
+                              key=lambda item: -item[1])[:top]
+            overhead = min(times) - min(bare_times)
+            forbidden = sorted(m for m in own if m.split(".")[0] in FORBIDDEN or m in FORBIDDEN)
+            report[name] = {
+                "median_ms": round(statistics.median(times), 1),
+                "min_ms": round(min(times), 1),
+                "overhead_ms": round(overhead, 1),
+                "budget_ms": budget * scale,
+                "modules": len(own),
+                "heaviest": [(m, round(ms, 1)) for m, ms in heaviest],
+                "forbidden": forbidden,
+                "ok": overhead <= budget * scale and not forbidden,
+            }
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    baseline = min(bare)
+    if as_json:
+        print(json.dumps({"baseline_ms": round(baseline, 1), "targets": report}, indent=2))
+    else:
+        print(f"bare interpreter: {baseline:.1f} ms (best of {len(bare)})\n")
+        print(f"{'target':<20} {'median':>8} {'best':>7} {'+python':>8} {'budget':>7} {'mods':>5}  heaviest imports")
+        for name, r in report.items():
+            mark = "✅" if r["ok"] else "❌"
+            heavy = ", ".join(f"{m} {ms:.1f}" for m, ms in r["heaviest"])
+            print(f"{name:<20} {r['median_ms']:7.1f} {r['min_ms']:7.1f}  {r['overhead_ms']:7.1f}  {r['budget_ms']:6.0f} "
+                  f"{r['modules']:5d}  {mark} {heavy}")
+            if r["forbidden"]:
+                print(f"{'':<20} ⚠️  imports at startup: {', '.join(r['forbidden'])}")
+    return all(r["ok"] for r in report.values())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="devops-tool startup benchmark and budget check")
+    parser.add_argument("--runs", type=int, default=15, help="Timed runs per target")
+    parser.add_argument("--top", type=int, default=5, help="Heaviest imports to list per target")
+    parser.add_argument("--budget-scale", type=float, default=1.0,
+                        help="Multiply every budget (e.g. 2 on slow CI runners)")
+    parser.add_argument("--json", action="store_true", help="Machine-readable output")
+    args = parser.parse_args()
+    sys.exit(0 if run(args.runs, args.top, args.budget_scale, args.json) else 1)
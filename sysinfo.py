@@ -10,6 +10,8 @@ import socket
 import shutil
 import argparse
 import logging
+import sys
+import time
 from datetime import datetime
 
 def banner():
@@ -23,20 +25,250 @@ def system_info():
     print(f"👤 User: {os.getenv('USER') or os.getenv('USERNAME')}")
     print(f"📂 Working dir: {os.getcwd()}")
 
-def disk_usage(path="/"):
+def disk_usage(path="/", metric_log=None):
     total, used, free = shutil.disk_usage(path)
+    if metric_log is not None:
+        metric_log.append_many({
+            f"disk_total_bytes:{path}": total,
+            f"disk_used_bytes:{path}": used,
+            f"disk_free_bytes:{path}": free,
+        })
     print(f"\n💾 Disk usage on {path}:")
     print(f"  Total: {total // (2**30)} GiB")
     print(f"  Used:  {used // (2**30)} GiB")
     print(f"  Free:  {free // (2**30)} GiB")
 
-def show_env(limit=None):
-    print("\n🌍 Environment Variables:")
-    for i, (k, v) in enumerate(os.environ.items()):
-        print(f"  {k}={v}")
-        if limit and i >= limit:
-            print("  ...")
-            break
+def show_env(limit=None, prefixes=(), pattern=None, pid=None, redact=True):
+    """Filtered, redacted environment of this process (or `pid`), written in one go.
+
+    See env_snapshot; secret-looking values are masked unless redact=False.
+    """
+    import re
+
+    from env_snapshot import snapshot
+
+    if isinstance(pattern, str):
+        try:
+            pattern = re.compile(pattern.encode())
+        except re.error as e:
+            sys.exit(f"❌ Error: --env-match {pattern!r}: {e}")
+    snap = snapshot(pid, prefixes, pattern, redact)
+    who = f" of PID {pid}" if pid else ""
+    sys.stdout.write(f"\n🌍 Environment Variables{who} ({len(snap.entries)}/{snap.total}, "
+                     f"{snap.redacted} redacted):\n" + snap.to_text(limit))
+
+# ──────────────────────────────────────────────
+# Streaming sampler (/proc fast path, Linux only)
+# ──────────────────────────────────────────────
+class ProcSampler:
+    """Low-overhead sampler for --watch mode.
+
+    The /proc files stay open and are re-read with pread into
+    preallocated buffers; only the fields we need are parsed and each
+    sample is turned into rates against the previous one.
+    """
+
+    FILES = ("/proc/stat", "/proc/meminfo", "/proc/loadavg", "/proc/diskstats")
+    SKIP_DISK_PREFIXES = ("loop", "ram", "zram")
+    SECTOR = 512
+
+    def __init__(self, paths=("/",)):
+        if not os.path.exists("/proc/stat"):
+            raise RuntimeError("--watch needs Linux /proc")
+        self.paths = list(paths)
+        self._fds = {p: os.open(p, os.O_RDONLY) for p in self.FILES}
+        self._bufs = {p: bytearray(4096) for p in self.FILES}
+        self._bufs["/proc/diskstats"] = bytearray(65536)
+        self.disks = self._physical_disks()
+        self._prev = None
+
+    @classmethod
+    def _physical_disks(cls) -> set[bytes]:
+        """Block devices whose I/O is not already counted on another one.
+
+        dm-* (LVM, LUKS) and md* (RAID) devices list the disks they sit on
+        under slaves/; their requests show up again on those disks, so
+        only the bottom of each stack is summed.
+        """
+        try:
+            names = os.listdir("/sys/block")
+        except OSError:
+            return set()
+        disks = set()
+        for name in names:
+            if name.startswith(cls.SKIP_DISK_PREFIXES):
+                continue
+            try:
+                if os.listdir(f"/sys/block/{name}/slaves"):
+                    continue
+            except OSError:
+                pass
+            disks.add(name.encode())
+        return disks
+
+    def close(self):
+        for fd in self._fds.values():
+            os.close(fd)
+        self._fds = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _read(self, path) -> memoryview:
+        buf = self._bufs[path]
+        n = os.preadv(self._fds[path], [buf], 0)
+        while n == len(buf) and path != "/proc/stat":
+            # Output did not fit: grow once and re-read (first line of
+            # /proc/stat is all we need, so it never grows)
+            buf = self._bufs[path] = bytearray(len(buf) * 2)
+            n = os.preadv(self._fds[path], [buf], 0)
+        return memoryview(buf)[:n]
+
+    def _cpu(self):
+        data = self._read("/proc/stat")
+        line = bytes(data).partition(b"\n")[0]
+        fields = [int(x) for x in line.split()[1:]]
+        idle = fields[3] + (fields[4] if len(fields) > 4 else 0)  # idle + iowait
+        return sum(fields[:8]), idle
+
+    def _mem(self):
+        total = avail = 0
+        for line in bytes(self._read("/proc/meminfo")).split(b"\n"):
+            if line.startswith(b"MemTotal:"):
+                total = int(line.split()[1])
+            elif line.startswith(b"MemAvailable:"):
+                avail = int(line.split()[1])
+                break
+        return total * 1024, avail * 1024
+
+    def _load(self):
+        return tuple(float(x) for x in bytes(self._read("/proc/loadavg")).split()[:3])
+
+    def _disk(self):
+        reads = writes = rsect = wsect = 0
+        for line in bytes(self._read("/proc/diskstats")).split(b"\n"):
+            f = line.split()
+            if len(f) > 9 and f[2] in self.disks:
+                reads += int(f[3])
+                rsect += int(f[5])
+                writes += int(f[7])
+                wsect += int(f[9])
+        return reads, writes, rsect * self.SECTOR, wsect * self.SECTOR
+
+    def sample(self) -> dict:
+        """Take one sample; rates are None on the very first call."""
+        cost_start = time.process_time()
+        now = time.monotonic()
+        cpu_total, cpu_idle = self._cpu()
+        mem_total, mem_avail = self._mem()
+        load = self._load()
+        reads, writes, rbytes, wbytes = self._disk()
+        disks = {}
+        for path in self.paths:
+            total, used, free = shutil.disk_usage(path)
+            disks[path] = {"total": total, "used": used, "free": free}
+
+        out = {
+            "time": time.time(),
+            "cpu_pct": None,
+            "mem_used_pct": 100.0 * (mem_total - mem_avail) / mem_total if mem_total else None,
+            "load": load,
+            "read_iops": None,
+            "write_iops": None,
+            "read_bps": None,
+            "write_bps": None,
+            "disks": disks,
+        }
+        prev = self._prev
+        if prev is not None:
+            dt = now - prev[0]
+            d_total = cpu_total - prev[1]
+            if d_total > 0:
+                out["cpu_pct"] = 100.0 * (d_total - (cpu_idle - prev[2])) / d_total
+            if dt > 0:
+                out["read_iops"] = (reads - prev[3]) / dt
+                out["write_iops"] = (writes - prev[4]) / dt
+                out["read_bps"] = (rbytes - prev[5]) / dt
+                out["write_bps"] = (wbytes - prev[6]) / dt
+        self._prev = (now, cpu_total, cpu_idle, reads, writes, rbytes, wbytes)
+        out["cost_s"] = time.process_time() - cost_start
+        return out
+
+
+def format_sample(sample, interval) -> str:
+    def pct(v):
+        return "  -  " if v is None else f"{v:5.1f}"
+
+    def num(v, scale=1.0):
+        return "-" if v is None else f"{v / scale:.1f}"
+
+    disks = " ".join(f"{p} {100.0 * d['used'] / d['total']:.0f}%"
+                     for p, d in sample["disks"].items() if d["total"])
+    cost = sample["cost_s"]
+    return (
+        f"{datetime.fromtimestamp(sample['time']).strftime('%H:%M:%S')} "
+        f"cpu {pct(sample['cpu_pct'])}% | mem {pct(sample['mem_used_pct'])}% | "
+        f"load {sample['load'][0]:.2f} | "
+        f"io r/w {num(sample['read_iops'])}/{num(sample['write_iops'])} IOPS "
+        f"{num(sample['read_bps'], 2**20)}/{num(sample['write_bps'], 2**20)} MiB/s | "
+        f"💾 {disks} | cost {cost * 1000:.3f} ms ({100.0 * cost / interval:.3f}% core)"
+    )
+
+
+SUMMARY_METRICS = ("cpu_pct", "mem_used_pct", "load1", "read_iops", "write_iops", "cost_ms")
+
+
+def _flat_sample(sample) -> dict:
+    flat = {
+        "cpu_pct": sample["cpu_pct"],
+        "mem_used_pct": sample["mem_used_pct"],
+        "load1": sample["load"][0],
+        "read_iops": sample["read_iops"],
+        "write_iops": sample["write_iops"],
+        "read_bps": sample["read_bps"],
+        "write_bps": sample["write_bps"],
+        "cost_ms": sample["cost_s"] * 1000.0,
+    }
+    for path, d in sample["disks"].items():
+        flat[f"disk_used_bytes:{path}"] = d["used"]
+        flat[f"disk_free_bytes:{path}"] = d["free"]
+    return flat
+
+
+def watch(interval=1.0, paths=("/",), count=None, store=None, metric_log=None):
+    """Print one sample per interval until interrupted (or `count` samples).
+
+    When a metrics_store.MetricsStore is given every sample is also kept
+    in its history; a metric_log.MetricLogWriter persists it to disk.
+    """
+    with ProcSampler(paths) as sampler:
+        n = 0
+        next_tick = time.monotonic()
+        while count is None or n < count:
+            sample = sampler.sample()
+            print(format_sample(sample, interval), flush=True)
+            if store is not None or metric_log is not None:
+                flat = _flat_sample(sample)
+                if store is not None:
+                    store.record_many(flat, sample["time"])
+                if metric_log is not None:
+                    metric_log.append_many(flat, sample["time"])
+                    metric_log.flush()
+            n += 1
+            next_tick += interval
+            time.sleep(max(0.0, next_tick - time.monotonic()))
+
+
+def print_summary(store):
+    print("\n📈 Summary (min / avg / p95 / max):")
+    for name in SUMMARY_METRICS:
+        if name in store.series:
+            st = store.query(name, percentiles=(95,))
+            print(f"  {name:<13} {st['min']:9.2f} {st['avg']:9.2f} {st['p95']:9.2f} {st['max']:9.2f}")
+
 
 if __name__ == "__main__":
     logging.basicConfig(
@@ -45,18 +277,63 @@ if __name__ == "__main__":
         format="%(asctime)s [%(levelname)s] %(message)s",
     )
     parser = argparse.ArgumentParser(description="DevOps System Diagnostic Tool")
-    parser.add_argument("--path", default="/", help="Path for disk usage")
+    parser.add_argument("--path", nargs="+", default=["/"], help="Path(s) for disk usage")
+    parser.add_argument("--du", action="store_true",
+                        help="Also size the subtrees under --path (du-style, top-N directories)")
+    parser.add_argument("--top", type=int, default=10, help="Largest directories shown by --du")
     parser.add_argument("--env", action="store_true", help="Show environment variables")
     parser.add_argument("--limit", type=int, help="Limit number of env vars shown")
+    parser.add_argument("--env-prefix", action="append", default=[], metavar="PREFIX",
+                        help="Only env vars starting with PREFIX (repeatable)")
+    parser.add_argument("--env-match", metavar="REGEX", help="Only env vars whose name matches REGEX")
+    parser.add_argument("--env-pid", type=int, metavar="PID",
+                        help="Show the environment of another process (/proc/PID/environ)")
+    parser.add_argument("--no-redact", action="store_true", help="Print secret env values as they are")
+    parser.add_argument("--watch", type=float, metavar="INTERVAL",
+                        help="Sample CPU/memory/load/disk I/O every INTERVAL seconds")
+    parser.add_argument("--count", type=int, help="Stop --watch after this many samples")
+    parser.add_argument("--metric-log", metavar="DIR",
+                        help="Also append samples to a binary metric log in DIR")
     args = parser.parse_args()
 
+    metric_log = None
+    if args.metric_log:
+        from metric_log import MetricLogWriter
+
+        metric_log = MetricLogWriter(args.metric_log)
+
+    if args.watch:
+        from metrics_store import MetricsStore
+
+        store = MetricsStore()
+        try:
+            watch(args.watch, args.path, args.count, store, metric_log)
+        except KeyboardInterrupt:
+            print("\n🛑 Interrupted by user.")
+        except RuntimeError as e:
+            sys.exit(f"❌ Error: {e}")
+        finally:
+            if metric_log is not None:
+                metric_log.close()
+        print_summary(store)
+        sys.exit(0)
+
     banner()
     try:
         system_info()
-        disk_usage(args.path)
+        for path in args.path:
+            disk_usage(path, metric_log)
+        if args.du:
+            from du_scan import print_result, scan_tree
+
+            for path in args.path:
+                print_result(scan_tree(path, top_n=args.top))
         if args.env:
-            show_env(args.limit)
+            show_env(args.limit, args.env_prefix, args.env_match, args.env_pid, not args.no_redact)
         logging.info("Diagnostics completed successfully")
     except Exception as e:
         logging.exception("Error in diagnostics")
-        print(f"❌ Error: {e}")
\ No newline at end of file
+        print(f"❌ Error: {e}")
+    finally:
+        if metric_log is not None:
+            metric_log.close()
\ No newline at end of file
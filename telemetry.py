@@ -0,0 +1,661 @@
+#!/usr/bin/env python3
+"""
+Telemetry — in-process metrics and span timing with a Prometheus endpoint
+Author: Vitalie Procopan
+
+Goal:
+    See where time goes in shell commands, HTTP checks, SSH calls and
+    config loads, at a cost low enough to leave on everywhere.
+
+Features:
+    1️⃣ Counters, gauges and fixed-bucket histograms
+    2️⃣ Every thread writes to its own shard (a plain list): no locks when recording;
+       histogram samples are appended raw and bucketed in batches (sort + bisect per bound)
+    3️⃣ Shards merged on scrape; shards of finished threads are folded in, not lost
+    4️⃣ span("name") timing around hot paths (devops_span_seconds / devops_span_errors_total):
+       one thread-local lookup per span, none in __enter__ / __exit__
+    5️⃣ Prometheus text exposition served from a background thread (--metrics-port)
+    💡 Benchmark: nanoseconds per recorded event, 1 and N threads; fails at ≥ 1 µs
+"""
+
+import argparse
+import re
+import sys
+import threading
+import time
+from bisect import bisect_right
+from operator import add
+from time import perf_counter
+
+# Seconds; covers a cached config load (sub-ms) up to a slow SSH command
+LATENCY_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+                   2.5, 5.0, 10.0, 30.0)
+FOLD_AT = 1024          # raw histogram samples a thread buffers before bucketing them
+EVENT_BUDGET_NS = 1000  # --bench fails when any recorded event costs this much
+METRIC_NAME = re.compile(r"[a-zA-Z_:][a-zA-Z0-9_:]*$")
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# ──────────────────────────────────────────────
+# Per-thread shards
+# ──────────────────────────────────────────────
+# Each metric owns one or more slots (indexes). A thread records into its
+# own list, so a hot-path update is one list item += with no lock; a scrape
+# adds the lists up. Slots are only ever appended, so shards just grow.
+# Histograms instead append raw samples to a per-thread buffer, bucketed
+# into _folded (under the lock) every FOLD_AT samples and on scrape.
+_local = threading.local()
+_lock = threading.Lock()
+_size = 0                                  # slots allocated so far
+_shards: list[tuple[threading.Thread, list]] = []
+_retired: list = []                        # summed shards of threads that have exited
+_buffers: list[tuple[threading.Thread, "Histogram", list]] = []
+_folded: list = []                         # bucketed histogram samples, by slot
+_families: dict[str, "_Family"] = {}
+
+
+def _alloc(n) -> int:
+    global _size
+    with _lock:
+        start = _size
+        _size += n
+    return start
+
+
+def _values() -> list:
+    """This thread's shard, created on first use and grown to the current slot count."""
+    values = getattr(_local, "values", None)
+    if values is None:
+        values = _local.values = [0] * _size
+        with _lock:
+            _shards.append((threading.current_thread(), values))
+    if len(values) < _size:
+        values.extend([0] * (_size - len(values)))
+    return values
+
+
+def _buffer(hist) -> list:
+    """This thread's raw-sample buffer for hist, created and registered on first use."""
+    buffers = getattr(_local, "buffers", None)
+    if buffers is None:
+        buffers = _local.buffers = {}
+    buf = buffers.get(hist)
+    if buf is None:
+        buf = buffers[hist] = []
+        with _lock:
+            _buffers.append((threading.current_thread(), hist, buf))
+    return buf
+
+
+def _fold(hist, buf):
+    """Bucket buffered samples into _folded. Caller holds _lock.
+
+    The owning thread may append meanwhile: only the first n samples are
+    taken, and appends and slice deletes are atomic.
+    """
+    n = len(buf)
+    if not n:
+        return
+    batch = buf[:n]
+    del buf[:n]
+    batch.sort()
+    if len(_folded) < _size:
+        _folded.extend([0] * (_size - len(_folded)))
+    _folded[hist._base] += sum(batch)
+    below = 0
+    for i, bound in enumerate(hist._bounds):  # le is inclusive: bisect_right
+        upto = bisect_right(batch, bound)
+        _folded[hist._base + 1 + i] += upto - below
+        below = upto
+    _folded[hist._base + 1 + len(hist._bounds)] += n - below
+
+
+def _fold_full(hist, buf):
+    with _lock:
+        _fold(hist, buf)
+
+
+def _merged() -> list:
+    """Per-slot totals over all shards; folds shards of dead threads into _retired."""
+    global _retired
+    with _lock:
+        live = []
+        for thread, hist, buf in _buffers:
+            _fold(hist, buf)
+            if thread.is_alive():
+                live.append((thread, hist, buf))
+        _buffers[:] = live
+        size = _size
+        totals = [0] * size
+        live = []
+        for thread, values in _shards:
+            snapshot = values[:]
+            snapshot.extend([0] * (size - len(snapshot)))
+            if thread.is_alive():
+                live.append((thread, values))
+                totals = list(map(add, totals, snapshot))
+            else:
+                _retired = list(map(add, _retired + [0] * (size - len(_retired)), snapshot))
+        _shards[:] = live
+        retired = _retired + [0] * (size - len(_retired))
+        folded = _folded + [0] * (size - len(_folded))
+    return list(map(add, map(add, totals, retired), folded))
+
+
+# ──────────────────────────────────────────────
+# Metric types
+# ──────────────────────────────────────────────
+class Counter:
+    """Monotonic count; inc() costs one thread-local lookup and one list add."""
+
+    __slots__ = ("_slot",)
+
+    def __init__(self):
+        self._slot = _alloc(1)
+
+    def inc(self, amount=1, _local=_local):
+        try:
+            _local.values[self._slot] += amount
+        except (AttributeError, IndexError):
+            _values()[self._slot] += amount
+
+    def _samples(self, totals, name, labels):
+        yield name, labels, totals[self._slot]
+
+
+class Gauge:
+    """Value that goes up and down.
+
+    inc()/dec() are sharded like counters; set() stores the value
+    directly (last writer wins). Use one style per gauge, not both.
+    """
+
+    __slots__ = ("_slot", "_value")
+
+    def __init__(self):
+        self._slot = _alloc(1)
+        self._value = 0
+
+    def inc(self, amount=1, _local=_local):
+        try:
+            _local.values[self._slot] += amount
+        except (AttributeError, IndexError):
+            _values()[self._slot] += amount
+
+    def dec(self, amount=1):
+        self.inc(-amount)
+
+    def set(self, value):
+        self._value = value
+
+    def _samples(self, totals, name, labels):
+        yield name, labels, self._value + totals[self._slot]
+
+
+class Histogram:
+    """Fixed-bucket distribution (Prometheus `le` buckets, cumulative on scrape).
+
+    Slot layout: [sum, bucket_0 ... bucket_n-1, +Inf]. observe() appends
+    the raw value to this thread's buffer; buckets and sum are filled in
+    batches of FOLD_AT (one sort, one bisect per bound) and on scrape.
+    """
+
+    __slots__ = ("_base", "_bounds")
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self._bounds = tuple(sorted(buckets))
+        self._base = _alloc(len(self._bounds) + 2)
+
+    def observe(self, value, _local=_local):
+        try:
+            buf = _local.buffers[self]
+        except (AttributeError, KeyError):
+            buf = _buffer(self)
+        buf.append(value)
+        if len(buf) >= FOLD_AT:
+            _fold_full(self, buf)
+
+    def _samples(self, totals, name, labels):
+        counts = totals[self._base + 1:self._base + len(self._bounds) + 2]
+        running = 0
+        for bound, count in zip(self._bounds + (float("inf"),), counts):
+            running += count
+            yield f"{name}_bucket", labels + (("le", _format_value(bound)),), running
+        yield f"{name}_sum", labels, totals[self._base]
+        yield f"{name}_count", labels, running
+
+
+_KINDS = {"counter": Counter, "gauge": Gauge, "histogram": Histogram}
+
+
+class _Family:
+    """All children of one metric name, keyed by label values."""
+
+    def __init__(self, name, help_text, kind, labelnames, options):
+        self.name, self.help, self.kind = name, help_text, kind
+        self.labelnames = tuple(labelnames)
+        self.options = options
+        self._children: dict[tuple, object] = {}
+
+    def labels(self, *values):
+        """Child metric for these label values (created on first use)."""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            with _lock:
+                child = self._children.get(values)
+            if child is None:
+                child = _KINDS[self.kind](**self.options)
+                with _lock:
+                    child = self._children.setdefault(values, child)
+        return child
+
+
+def _family(name, help_text, kind, labelnames, **options):
+    if not METRIC_NAME.match(name):
+        raise ValueError(f"Invalid metric name: {name!r}")
+    with _lock:
+        family = _families.get(name)
+    if family is None:
+        family = _Family(name, help_text, kind, labelnames, options)
+        with _lock:
+            family = _families.setdefault(name, family)
+    if family.kind != kind or family.labelnames != tuple(labelnames):
+        raise ValueError(f"{name} is already registered as a {family.kind} with labels {family.labelnames}")
+    return family if labelnames else family.labels()
+
+
+def counter(name, help_text="", labelnames=()):
+    """Counter `name` (get or create). With labelnames, call .labels(...) for a child."""
+    return _family(name, help_text, "counter", labelnames)
+
+
+def gauge(name, help_text="", labelnames=()):
+    return _family(name, help_text, "gauge", labelnames)
+
+
+def histogram(name, help_text="", labelnames=(), buckets=LATENCY_BUCKETS):
+    return _family(name, help_text, "histogram", labelnames, buckets=buckets)
+
+
+# ──────────────────────────────────────────────
+# Spans
+# ──────────────────────────────────────────────
+SPAN_SECONDS = histogram("devops_span_seconds", "Duration of instrumented operations", ("span",))
+SPAN_ERRORS = counter("devops_span_errors_total", "Instrumented operations that raised or reported failure",
+                      ("span",))
+_spans: dict[str, tuple["Histogram", "Counter"]] = {}  # span name → (histogram, error counter)
+
+
+class _Span:
+    """Timer for one span name on one thread.
+
+    span() hands each thread its own cached object holding that thread's
+    sample buffer, so __enter__ / __exit__ do no thread-local lookups: the
+    start time is an attribute. Nested use of the same name on one thread
+    (recursion) parks the outer start on a small stack.
+    """
+
+    __slots__ = ("_hist", "_errors", "_buf", "_start", "_outer")
+
+    def __init__(self, hist, errors):
+        self._hist, self._errors = hist, errors
+        self._buf = _buffer(hist)
+        self._start = None
+        self._outer = []
+
+    def __enter__(self):
+        if self._start is not None:
+            self._outer.append(self._start)
+        self._start = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        buf = self._buf
+        buf.append(perf_counter() - self._start)
+        self._start = self._outer.pop() if self._outer else None
+        if len(buf) >= FOLD_AT:
+            _fold_full(self._hist, buf)
+        if exc_type is not None:
+            self._errors.inc()
+        return False
+
+    def fail(self):
+        """Count an error for this span without raising (for code that returns error values)."""
+        self._errors.inc()
+
+
+def _span_for(name) -> _Span:
+    """Create this thread's _Span for name (the slow path of span())."""
+    try:
+        hist, errors = _spans[name]
+    except KeyError:
+        hist, errors = _spans.setdefault(name, (SPAN_SECONDS.labels(name), SPAN_ERRORS.labels(name)))
+    spans = getattr(_local, "spans", None)
+    if spans is None:
+        spans = _local.spans = {}
+    timer = spans[name] = _Span(hist, errors)
+    return timer
+
+
+def span(name, _local=_local) -> _Span:
+    """Context manager timing one operation into devops_span_seconds{span=name}."""
+    try:
+        return _local.spans[name]
+    except (AttributeError, KeyError):
+        return _span_for(name)
+
+
+def traced(name):
+    """Decorator form of span(name)."""
+    def wrap(fn):
+        import functools
+
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            timer = span(name)
+            start = perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            except Exception:
+                timer._errors.inc()
+                raise
+            finally:
+                buf = timer._buf
+                buf.append(perf_counter() - start)
+                if len(buf) >= FOLD_AT:
+                    _fold_full(timer._hist, buf)
+        return inner
+    return wrap
+
+
+# ──────────────────────────────────────────────
+# Exposition
+# ──────────────────────────────────────────────
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value)) if value else "0"
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", r"\\").replace("\n", r"\n").replace('"', r'\"')
+
+
+def render() -> str:
+    """All metrics in Prometheus text exposition format (0.0.4)."""
+    totals = _merged()
+    lines = []
+    with _lock:
+        families = sorted(_families.items())
+        children = {name: sorted(f._children.items()) for name, f in families}
+    for name, family in families:
+        if family.help:
+            help_text = family.help.replace("\\", r"\\").replace("\n", r"\n")
+            lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {family.kind}")
+        for values, child in children[name]:
+            labels = tuple(zip(family.labelnames, values))
+            for sample, sample_labels, value in child._samples(totals, name, labels):
+                if sample_labels:
+                    text = ",".join(f'{k}="{_escape(v)}"' for k, v in sample_labels)
+                    lines.append(f"{sample}{{{text}}} {_format_value(value)}")
+                else:
+                    lines.append(f"{sample} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+_SERVER = None
+
+
+def serve(port, host="127.0.0.1"):
+    """Serve /metrics from a daemon thread. Idempotent: later calls return the running server."""
+    global _SERVER
+    if _SERVER is not None:
+        return _SERVER
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/metrics", "/"):
+                self.send_error(404)
+                return
+            body = render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    _SERVER = server
+    return server
+
+
+# ──────────────────────────────────────────────
+# Self-test & benchmark
+# ──────────────────────────────────────────────
+def self_test() -> bool:
+    import urllib.request
+
+    checks = []
+
+    def check(label, ok):
+        checks.append(ok)
+        print(f"{'✅' if ok else '❌'} {label}")
+
+    c = counter("selftest_events_total", "Events", ("kind",))
+    hits = c.labels("hit")
+
+    def work():
+        for _ in range(10_000):
+            hits.inc()
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    text = render()
+    check("8 threads × 10k inc merged (threads already exited)",
+          'selftest_events_total{kind="hit"} 80000' in text)
+    check("exited threads' shards folded, not dropped",
+          not any(t in (s[0] for s in _shards) for t in threads) and 'kind="hit"} 80000' in render())
+
+    h = histogram("selftest_latency_seconds", "Latency", buckets=(0.1, 1.0))
+    for v in (0.05, 0.1, 0.5, 2.0):
+        h.observe(v)
+    text = render()
+    check("histogram buckets cumulative, le inclusive",
+          'selftest_latency_seconds_bucket{le="0.1"} 2' in text and 'le="1"} 3' in text
+          and 'le="+Inf"} 4' in text and "selftest_latency_seconds_count 4" in text
+          and "selftest_latency_seconds_sum 2.65" in text)
+
+    def observe_many():
+        for _ in range(FOLD_AT + 10):  # crosses one batch fold, leaves 10 buffered
+            h.observe(0.5)
+
+    threads = [threading.Thread(target=observe_many) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    text = render()
+    check("buffered samples of exited threads bucketed on scrape",
+          f'le="1"}} {3 + 4 * (FOLD_AT + 10)}' in text
+          and f"selftest_latency_seconds_count {4 + 4 * (FOLD_AT + 10)}" in text
+          and not any(b[0] in threads for b in _buffers))
+
+    g = gauge("selftest_in_flight", "In flight")
+    g.inc(3)
+    g.dec()
+    check("gauge inc/dec", "selftest_in_flight 2" in render())
+
+    with span("selftest_op"):
+        time.sleep(0.002)
+    with span("selftest_op") as s:
+        s.fail()
+    try:
+        with span("selftest_op"):
+            raise RuntimeError
+    except RuntimeError:
+        pass
+    text = render()
+    check("span timing + errors (fail() and exceptions)",
+          'devops_span_seconds_count{span="selftest_op"} 3' in text
+          and 'devops_span_errors_total{span="selftest_op"} 2' in text)
+    with span("selftest_op"):
+        with span("selftest_op"):  # recursion: inner exit must not clobber the outer start
+            time.sleep(0.002)
+        time.sleep(0.002)
+    text = render()
+    total = float(re.search(r'devops_span_seconds_sum\{span="selftest_op"\} (\S+)', text).group(1))
+    check("nested same-name spans both timed",
+          'devops_span_seconds_count{span="selftest_op"} 5' in text and total >= 0.008)
+    check("metric registered late still recorded by an existing thread",
+          (counter("selftest_late_total").inc() or True) and "selftest_late_total 1" in render())
+    check("escaped label values", (c.labels('a"b\\c\n').inc() or True) and r'kind="a\"b\\c\n"' in render())
+    try:
+        counter("selftest_events_total")
+        check("kind/label mismatch rejected", False)
+    except ValueError:
+        check("kind/label mismatch rejected", True)
+
+    server = serve(0)
+    url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+    with urllib.request.urlopen(url, timeout=5) as resp:
+        body = resp.read().decode()
+        check("HTTP endpoint serves exposition format",
+              resp.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+              and "# TYPE devops_span_seconds histogram" in body)
+    check("serve() is idempotent", serve(0) is server)
+    passed = sum(checks)
+    print(f"\n{passed}/{len(checks)} checks passed")
+    return passed == len(checks)
+
+
+def benchmark(n=1_000_000, threads=8):
+    c = counter("bench_events_total")
+    g = gauge("bench_in_flight")
+    h = histogram("bench_latency_seconds")
+    value = 0.003
+    rng = range(n // 5)
+
+    def per_event(fn, repeat=5):
+        best = float("inf")
+        for _ in range(repeat):  # best of N: scheduler noise only ever adds time
+            t0 = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - t0)
+        return best / len(rng) * 1e9
+
+    def empty():
+        for _ in rng:
+            pass
+
+    def inc():
+        for _ in rng:
+            c.inc()
+
+    def gauge_inc():
+        for _ in rng:
+            g.inc()
+
+    def observe():
+        for _ in rng:
+            h.observe(value)
+
+    def spans():
+        for _ in rng:
+            with span("bench"):
+                pass
+
+    def locked():
+        # what observe() replaces: bucket + sum into one shared list under a lock
+        lock, box, bounds = threading.Lock(), [0] * (len(LATENCY_BUCKETS) + 2), LATENCY_BUCKETS
+        for _ in rng:
+            with lock:
+                box[1 + bisect_right(bounds, value)] += 1
+                box[0] += value
+
+    @traced("bench_traced")
+    def nothing():
+        pass
+
+    def decorated():
+        for _ in rng:
+            nothing()
+
+    def clock():
+        for _ in rng:
+            perf_counter()
+
+    loop = per_event(empty)
+    print(f"{len(rng):,} events per case (best of 5), loop overhead {loop:.1f} ns subtracted; "
+          f"perf_counter() itself costs {per_event(clock) - loop:.1f} ns here (spans call it twice)")
+    slow = []
+    for label, fn, gated in (("counter.inc()", inc, True), ("gauge.inc()", gauge_inc, True),
+                             ("histogram.observe()", observe, True), ("with span()", spans, True),
+                             ("@traced call", decorated, True), ("baseline: observe under a Lock", locked, False)):
+        fn()  # warm: shard created and sized
+        cost = per_event(fn) - loop
+        over = gated and cost >= EVENT_BUDGET_NS
+        if over:
+            slow.append(label)
+        print(f"{label:<30}: {cost:7.1f} ns/event{'  ❌ over budget' if over else ''}")
+
+    def worker():
+        for _ in range(n // threads):
+            c.inc()
+            h.observe(value)
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    t0 = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    print(f"{threads} threads, inc + observe  : {elapsed / (n // threads * threads * 2) * 1e9:7.1f} ns/event (wall)")
+    t0 = time.perf_counter()
+    text = render()
+    print(f"scrape ({len(_families)} families, {len(text):,} bytes): {(time.perf_counter() - t0) * 1000:.2f} ms")
+    print(f"{'✅' if not slow else '❌'} budget {EVENT_BUDGET_NS} ns/event"
+          f"{': ' + ', '.join(slow) + ' over' if slow else ''}")
+    return not slow
+
+
+# ──────────────────────────────────────────────
+# MAIN
+# ──────────────────────────────────────────────
+def main():
+    parser = argparse.ArgumentParser(description="In-process metrics with a Prometheus endpoint")
+    parser.add_argument("--self-test", action="store_true", help="Run checks (threads, histogram, HTTP)")
+    parser.add_argument("--bench", type=int, metavar="N", help="Time N recorded events per metric type")
+    parser.add_argument("--serve", type=int, metavar="PORT", help="Serve this process's metrics until Ctrl-C")
+    args = parser.parse_args()
+
+    if args.self_test:
+        sys.exit(0 if self_test() else 1)
+    if args.bench:
+        sys.exit(0 if benchmark(args.bench) else 1)
+    if args.serve is not None:
+        server = serve(args.serve)
+        print(f"📈 http://127.0.0.1:{server.server_address[1]}/metrics")
+        while True:
+            time.sleep(3600)
+    parser.print_help()
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        sys.exit("\n🛑 Interrupted by user.")